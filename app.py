@@ -1,33 +1,71 @@
-import requests
+import asyncio
+import os
+import uuid
+
+import httpx
 import gradio as gr
 
-API_URL = "http://127.0.0.1:8000/chat"
+API_BASE = os.getenv("PETDOCTOR_API", "http://127.0.0.1:8000")
+API_URL = f"{API_BASE}/chat"
 
+# 서버로 보내는 최근 대화 턴 수 (서버 rewrite도 최근 2턴만 사용)
+HISTORY_WINDOW = int(os.getenv("UI_HISTORY_WINDOW", "4"))
+# 동시 처리 가능한 채팅 수 (async 핸들러라 worker 스레드를 점유하지 않음)
+UI_CONCURRENCY = int(os.getenv("UI_CONCURRENCY", "64"))
+REQUEST_TIMEOUT_S = float(os.getenv("UI_REQUEST_TIMEOUT_S", "60"))
+
+
+# =========================
+# 1️⃣ 공유 HTTP client (keep-alive pool)
+# =========================
+
+_client = None
+
+# session → (request_id, task): 같은 세션의 이전 요청 취소용
+_inflight = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_S, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=UI_CONCURRENCY,
+                max_keepalive_connections=UI_CONCURRENCY,
+            ),
+        )
+    return _client
 
-def chat_fn(user_input, history):
-    payload = {
-        "question": user_input,
-        "history": [
-            {"user": h[0], "assistant": h[1]}
-            for h in history
-        ],
-    }
 
+async def _cancel_server(request_id: str) -> None:
     try:
-        resp = requests.post(API_URL, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-    except Exception as e:
-        history.append((user_input, f"❌ 서버 오류: {e}"))
-        return history
+        await get_client().delete(f"{API_URL}/{request_id}", timeout=5.0)
+    except httpx.HTTPError:
+        pass
+
+
+def cancel_inflight(session: str) -> None:
+    """
+    진행 중인 요청 취소: 연결 종료 + 서버에 취소 통보 (다음 node 경계에서 중단)
+    """
+    entry = _inflight.pop(session, None)
+    if entry is None:
+        return
+    request_id, task = entry
+    if not task.done():
+        task.cancel()
+        asyncio.get_running_loop().create_task(_cancel_server(request_id))
+
 
+def format_answer(data) -> str:
     answer = data.get("answer", "")
     confidence = data.get("confidence", "")
     urls = data.get("evidence_urls", [])
 
     url_text = "\n".join(urls) if urls else "근거 URL 없음"
 
-    final_answer = f"""
+    return f"""
 🩺 답변:
 {answer}
 
@@ -37,11 +75,60 @@ def chat_fn(user_input, history):
 {url_text}
 """.strip()
 
-    history.append((user_input, final_answer))
-    return history
+
+# =========================
+# 2️⃣ Chat handler
+# =========================
+
+async def chat_fn(user_input, chat_history, turns, request: gr.Request):
+    """
+    chat_history: 화면 표시용 (포맷된 답변)
+    turns: 서버 전송용 원문 대화 [{"user", "assistant"}]
+    """
+    session = request.session_hash if request is not None else "default"
+
+    # 같은 세션에서 새 메시지 → 이전 요청 취소
+    cancel_inflight(session)
+
+    request_id = uuid.uuid4().hex
+    payload = {
+        "question": user_input,
+        "history": turns[-HISTORY_WINDOW:] if HISTORY_WINDOW > 0 else [],
+    }
+
+    task = asyncio.ensure_future(get_client().post(
+        API_URL,
+        json=payload,
+        headers={"X-Request-Id": request_id},
+    ))
+    _inflight[session] = (request_id, task)
+
+    try:
+        resp = await task
+        resp.raise_for_status()
+        data = resp.json()
+    except asyncio.CancelledError:
+        # 같은 세션의 새 메시지로 취소됨 → 화면은 그대로 (새 요청 결과가 덮어씀)
+        if not task.cancelled():
+            # 핸들러 자체가 취소된 경우 (초기화 / 탭 종료)
+            task.cancel()
+            asyncio.get_running_loop().create_task(_cancel_server(request_id))
+            raise
+        return chat_history, turns
+    except Exception as e:
+        return chat_history + [(user_input, f"❌ 서버 오류: {e}")], turns
+    finally:
+        if _inflight.get(session, (None,))[0] == request_id:
+            _inflight.pop(session, None)
+
+    return (
+        chat_history + [(user_input, format_answer(data))],
+        turns + [{"user": user_input, "assistant": data.get("answer", "")}],
+    )
 
 
 # 🗑️ 버튼용: UI + 내부 state 모두 초기화
+# (진행 중 요청은 clear 이벤트의 cancels로 취소 → chat_fn에서 서버 취소 통보)
 def clear_chat():
     return [], []
 
@@ -59,15 +146,9 @@ with gr.Blocks(css="""
     # 🔹 Chatbot (구버전 Gradio 호환)
     chatbot = gr.Chatbot(height=1000)
 
-    # 🔹 내부 대화 히스토리
+    # 🔹 서버 전송용 원문 대화 (포맷된 표시용 답변과 분리)
     state = gr.State([])
 
-    # 🔹 🗑️ 클릭 시 state까지 함께 초기화 (핵심)
-    chatbot.clear(
-        fn=clear_chat,
-        outputs=[chatbot, state],
-    )
-
     gr.Markdown("")  # 간격 보정
 
     with gr.Row(elem_id="input-row"):
@@ -78,34 +159,33 @@ with gr.Blocks(css="""
         )
         btn = gr.Button("전송", scale=1)
 
-    # Enter 전송
-    inp.submit(
-        chat_fn,
-        inputs=[inp, state],
-        outputs=chatbot,
-    ).then(
-        lambda h: h,
-        chatbot,
-        state,
-    ).then(
-        lambda: "",
-        None,
-        inp,
-    )
+    # Enter / 버튼 전송
+    send_events = [
+        trigger(
+            chat_fn,
+            inputs=[inp, chatbot, state],
+            outputs=[chatbot, state],
+        )
+        for trigger in (inp.submit, btn.click)
+    ]
+    for event in send_events:
+        event.then(
+            lambda: "",
+            None,
+            inp,
+        )
 
-    # 버튼 전송
-    btn.click(
-        chat_fn,
-        inputs=[inp, state],
-        outputs=chatbot,
-    ).then(
-        lambda h: h,
-        chatbot,
-        state,
-    ).then(
-        lambda: "",
-        None,
-        inp,
+    # 🔹 🗑️ 클릭 시 진행 중 요청 취소 + state까지 함께 초기화 (핵심)
+    chatbot.clear(
+        fn=clear_chat,
+        outputs=[chatbot, state],
+        cancels=send_events,
     )
 
+# async 핸들러 → 동시 채팅 수만큼 이벤트 동시 실행 (Gradio 3.x / 4.x)
+try:
+    demo.queue(default_concurrency_limit=UI_CONCURRENCY)
+except TypeError:
+    demo.queue(concurrency_count=UI_CONCURRENCY)
+
 demo.launch()
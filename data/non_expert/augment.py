@@ -1,36 +1,34 @@
-import os
+# 비전문가(보호자 톤) 답변 증강
+# - 비동기 동시 요청 (semaphore) + token bucket 속도 제한 + 지수 backoff 재시도
+# - 완료 즉시 JSONL append (checkpoint) → 재실행 시 끝난 질문은 건너뜀
+# - JSONL → CSV 변환은 한 줄씩 스트리밍
+#
+# 실행 예:
+#   python augment.py generate --data /path/naver_kin_qna_detail.csv --out response.jsonl
+#   python augment.py to-csv --jsonl response.jsonl --out non_expert_answers.csv
+#   python augment.py all --data ... --out response.jsonl --csv non_expert_answers.csv
+#
+# 로컬 fake LLM (src/bench/mock_openai.py) 으로 테스트:
+#   python augment.py generate ... --base-url http://127.0.0.1:9000/v1 --api-key mock
+
+import argparse
+import asyncio
+import csv
 import json
+import os
 import random
-import pandas as pd
-from tqdm import tqdm
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-if OPENAI_API_KEY is None:
-    raise ValueError("OPENAI_API_KEY not found in .env")
-
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 
 DATA_PATH = "/home/ys0660/happycat/data/expert/naver_kin_qna_detail.csv"
 SAMPLE_SIZE = 1000
 RANDOM_SEED = 42
-
-df = pd.read_csv(DATA_PATH)
-
-df_sample = (
-    df[["question"]]
-    .dropna()
-    .sample(n=SAMPLE_SIZE, random_state=RANDOM_SEED)
-    .reset_index(drop=True)
-)
-
-questions = df_sample["question"].tolist()
-
-print(f"Loaded {len(df)} rows, sampled {len(questions)} questions")
+MODEL = "gpt-4.1-mini"
+ERROR_PREFIX = "[GENERATION_ERROR]"
 
 
 SYSTEM_PROMPT = """
@@ -58,57 +56,270 @@ USER_PROMPT_TEMPLATE = """
 위 예시와 비슷한 톤으로 답변해줘.
 """
 
-OUTPUT_JSONL = "response.jsonl"
-
-with open(OUTPUT_JSONL, "w", encoding="utf-8") as f:
-    for q in tqdm(questions, desc="Generating non-expert answers"):
-        prompt = USER_PROMPT_TEMPLATE.format(question=q)
 
+# =========================
+# 1️⃣ 질문 샘플링
+# =========================
+
+def sample_questions(data_path: str = DATA_PATH, sample_size: int = SAMPLE_SIZE, seed: int = RANDOM_SEED) -> List[str]:
+    import pandas as pd
+
+    df = pd.read_csv(data_path, usecols=["question"])
+    questions = df["question"].dropna()
+    if sample_size and sample_size < len(questions):
+        questions = questions.sample(n=sample_size, random_state=seed)
+
+    print(f"Loaded {len(df)} rows, sampled {len(questions)} questions")
+    return questions.tolist()
+
+
+# =========================
+# 2️⃣ 속도 제한 / 재시도
+# =========================
+
+class TokenBucket:
+    """
+    초당 rate 개 토큰 보충, 최대 burst 개 적립
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def with_retries(
+    fn: Callable[[], Awaitable[str]],
+    retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> str:
+    for attempt in range(retries + 1):
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-
-            answer = resp.choices[0].message.content.strip()
-
-        except Exception as e:
-            answer = f"[GENERATION_ERROR] {str(e)}"
-
-        record = {
-            "question": q,
-            "answer": answer
-        }
-
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
-
-print(f"Saved non-expert responses to {OUTPUT_JSONL}")
-
-
-rows = []
-
-with open(OUTPUT_JSONL, "r", encoding="utf-8") as f:
-    for line in f:
-        obj = json.loads(line)
-        rows.append({
-            "url": None,
-            "title": None,
-            "question": obj["question"],
-            "answer": obj["answer"],
-            "answer_type": "non_expert_llm"
-        })
-
-df_non_expert = pd.DataFrame(rows)
-
-print("Non-expert DataFrame created")
-print(df_non_expert.head(3))
-
-
-OUTPUT_CSV = "non_expert_answers.csv"
-df_non_expert.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
-
-print(f"Saved DataFrame to {OUTPUT_CSV}")
+            return await fn()
+        except Exception:
+            if attempt == retries:
+                raise
+            # 지수 backoff + full jitter (429 / 5xx 동시 재시도 폭주 방지)
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+def openai_completer(
+    model: str = MODEL,
+    temperature: float = 0.7,
+    base_url: str = None,
+    api_key: str = None,
+    timeout: float = 60.0,
+) -> Callable[[str], Awaitable[str]]:
+    from openai import AsyncOpenAI
+
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if api_key is None:
+        raise ValueError("OPENAI_API_KEY not found in .env")
+
+    # 재시도는 with_retries에서 일괄 처리
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+    async def complete(question: str) -> str:
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(question=question)},
+            ],
+            temperature=temperature,
+        )
+        return resp.choices[0].message.content.strip()
+
+    return complete
+
+
+# =========================
+# 3️⃣ 생성 (checkpoint / resume)
+# =========================
+
+def load_done(jsonl_path: str) -> Set[str]:
+    """
+    이미 정상 생성된 질문 (에러 기록 / 잘린 마지막 줄은 재시도 대상)
+    """
+    done: Set[str] = set()
+    if not os.path.exists(jsonl_path):
+        return done
+
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if obj.get("error") or str(obj.get("answer", "")).startswith(ERROR_PREFIX):
+                continue
+            done.add(obj["question"])
+    return done
+
+
+def _open_append(jsonl_path: str):
+    # 이전 실행이 줄 중간에서 끊겼으면 개행부터 보정
+    needs_newline = False
+    if os.path.exists(jsonl_path) and os.path.getsize(jsonl_path) > 0:
+        with open(jsonl_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    f = open(jsonl_path, "a", encoding="utf-8")
+    if needs_newline:
+        f.write("\n")
+    return f
+
+
+async def generate(
+    questions: Iterable[str],
+    jsonl_path: str,
+    complete: Callable[[str], Awaitable[str]],
+    concurrency: int = 16,
+    rate: float = 8.0,
+    retries: int = 5,
+) -> dict:
+    done = load_done(jsonl_path)
+    todo = list(dict.fromkeys(q for q in questions if q not in done))
+    print(f"{len(done)} done, {len(todo)} to generate")
+
+    bucket = TokenBucket(rate)
+    sem = asyncio.Semaphore(concurrency)
+    stats = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    with _open_append(jsonl_path) as f:
+
+        async def worker(question: str) -> None:
+            async with sem:
+
+                async def call() -> str:
+                    await bucket.acquire()
+                    return await complete(question)
+
+                try:
+                    record = {"question": question, "answer": await with_retries(call, retries)}
+                    stats["ok"] += 1
+                except Exception as e:
+                    record = {"question": question, "answer": None, "error": str(e)}
+                    stats["error"] += 1
+
+            # 단일 이벤트 루프 → 줄 단위 write가 섞이지 않음, 즉시 flush (checkpoint)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+            finished = stats["ok"] + stats["error"]
+            if finished % 50 == 0 or finished == len(todo):
+                elapsed = time.perf_counter() - started
+                print(f"  {finished}/{len(todo)} ({finished / elapsed:.1f} req/s, errors={stats['error']})")
+
+        await asyncio.gather(*(worker(q) for q in todo))
+
+    stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+    print(f"Saved non-expert responses to {jsonl_path}: {stats}")
+    return stats
+
+
+# =========================
+# 4️⃣ JSONL → CSV (스트리밍)
+# =========================
+
+def to_csv(jsonl_path: str, csv_path: str) -> int:
+    """
+    한 줄 읽고 한 줄 쓰기 (에러 기록 / 중복 질문 제외)
+    """
+    seen: Set[str] = set()
+    with open(jsonl_path, "r", encoding="utf-8") as f, \
+            open(csv_path, "w", encoding="utf-8-sig", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=["url", "title", "question", "answer", "answer_type"])
+        writer.writeheader()
+
+        for line in f:
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            answer = obj.get("answer")
+            if obj.get("error") or not answer or answer.startswith(ERROR_PREFIX):
+                continue
+            if obj["question"] in seen:
+                continue
+            seen.add(obj["question"])
+
+            writer.writerow({
+                "url": "",
+                "title": "",
+                "question": obj["question"],
+                "answer": answer,
+                "answer_type": "non_expert_llm",
+            })
+
+    print(f"Saved {len(seen)} rows to {csv_path}")
+    return len(seen)
+
+
+# =========================
+# 5️⃣ CLI
+# =========================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Non-expert answer augmentation")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_generate_args(p):
+        p.add_argument("--data", default=DATA_PATH)
+        p.add_argument("--sample-size", type=int, default=SAMPLE_SIZE)
+        p.add_argument("--seed", type=int, default=RANDOM_SEED)
+        p.add_argument("--out", default="response.jsonl")
+        p.add_argument("--model", default=MODEL)
+        p.add_argument("--concurrency", type=int, default=16)
+        p.add_argument("--rate", type=float, default=8.0, help="초당 최대 요청 수")
+        p.add_argument("--retries", type=int, default=5)
+        p.add_argument("--base-url", default=os.getenv("OPENAI_BASE_URL"))
+        p.add_argument("--api-key", default=None)
+
+    add_generate_args(sub.add_parser("generate"))
+
+    p_csv = sub.add_parser("to-csv")
+    p_csv.add_argument("--jsonl", default="response.jsonl")
+    p_csv.add_argument("--out", default="non_expert_answers.csv")
+
+    p_all = sub.add_parser("all")
+    add_generate_args(p_all)
+    p_all.add_argument("--csv", default="non_expert_answers.csv")
+
+    args = parser.parse_args(argv)
+
+    if args.command in ("generate", "all"):
+        complete = openai_completer(args.model, base_url=args.base_url, api_key=args.api_key)
+        asyncio.run(generate(
+            sample_questions(args.data, args.sample_size, args.seed),
+            args.out,
+            complete,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            retries=args.retries,
+        ))
+
+    if args.command == "to-csv":
+        to_csv(args.jsonl, args.out)
+    elif args.command == "all":
+        to_csv(args.out, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# 요청 단위 admission control
+# - 동시 처리 파이프라인 수 제한 (MAX_INFLIGHT, /chat/batch 는 concurrency 만큼 슬롯 점유)
+# - 우선순위 대기열 (interactive > batch), 대기열 상한 (MAX_QUEUE)
+# - deadline 안에 처리될 가망이 없으면 즉시 거절 (429 + Retry-After)
+# - 대기열이 차오르면 degraded 모드 (judge 생략, fetch_k 축소)
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from config import (
+    MAX_INFLIGHT,
+    MAX_QUEUE,
+    DEGRADE_QUEUE_RATIO,
+)
+from api.cancellation import RequestCancelled
+from observe import metrics
+
+
+PRIORITIES = {
+    "interactive": 0,
+    "batch": 1,
+}
+
+
+def normalize_priority(priority_name: str) -> str:
+    """
+    X-Priority 헤더 값 → PRIORITIES key (모르는 값은 interactive, metric label 폭증 방지)
+    """
+    name = (priority_name or "").strip().lower()
+    return name if name in PRIORITIES else "interactive"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+
+    def __init__(
+        self,
+        max_inflight: int = MAX_INFLIGHT,
+        max_queue: int = MAX_QUEUE,
+        degrade_ratio: float = DEGRADE_QUEUE_RATIO,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.degrade_ratio = degrade_ratio
+
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._waiting: List[Tuple[int, int]] = []   # (priority, seq) heap
+        self._seq = itertools.count()
+
+        # 파이프라인 1회 처리 시간 (EWMA, 초) → 대기 시간 추정용
+        self._service_time = 5.0
+
+    # -------------------------
+    # 내부 상태
+    # -------------------------
+    def _publish(self) -> None:
+        metrics.set_gauge("admission_inflight", self._inflight)
+        metrics.set_gauge("admission_queue_depth", len(self._waiting))
+
+    def _estimated_wait(self, ahead: int) -> float:
+        return self._service_time * (ahead // self.max_inflight + 1)
+
+    def _reject(self, reason: str, wait: float, priority_name: str):
+        metrics.incr("admission", result=reason, priority=priority_name)
+        raise AdmissionRejected(reason, retry_after=max(1, math.ceil(wait)))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    # -------------------------
+    # 진입 / 해제
+    # -------------------------
+    def _leave(self, entry: Tuple[int, int]) -> None:
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        self._publish()
+        self._cond.notify_all()
+
+    def _enter(
+        self,
+        priority_name: str,
+        deadline_s: float,
+        slots: int = 1,
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        priority = PRIORITIES[priority_name]
+        slots = min(slots, self.max_inflight)
+        end = time.monotonic() + deadline_s
+
+        with self._cond:
+            degraded = len(self._waiting) >= self.max_queue * self.degrade_ratio
+
+            if self._inflight + slots <= self.max_inflight and not self._waiting:
+                self._inflight += slots
+                self._publish()
+                metrics.incr("admission", result="admitted", priority=priority_name)
+                return degraded
+
+            if len(self._waiting) >= self.max_queue:
+                self._reject("queue_full", self._estimated_wait(len(self._waiting)), priority_name)
+
+            ahead = sum(1 for p, _ in self._waiting if p <= priority)
+            estimated = self._estimated_wait(ahead)
+            if estimated > deadline_s:
+                self._reject("deadline", estimated, priority_name)
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            self._publish()
+
+            while True:
+                if check_cancel is not None:
+                    try:
+                        check_cancel()
+                    except RequestCancelled:
+                        self._leave(entry)
+                        metrics.incr("admission", result="cancelled", priority=priority_name)
+                        raise
+
+                if self._waiting[0] == entry and self._inflight + slots <= self.max_inflight:
+                    heapq.heappop(self._waiting)
+                    self._inflight += slots
+                    self._publish()
+                    self._cond.notify_all()
+                    metrics.incr("admission", result="admitted", priority=priority_name)
+                    return degraded or len(self._waiting) >= self.max_queue * self.degrade_ratio
+
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    self._leave(entry)
+                    self._reject("timeout", self._estimated_wait(len(self._waiting)), priority_name)
+
+                self._cond.wait(remaining)
+
+    def _release(self, service_time: float = None, slots: int = 1) -> None:
+        with self._cond:
+            self._inflight -= min(slots, self.max_inflight)
+            if service_time is not None:
+                self._service_time = 0.8 * self._service_time + 0.2 * service_time
+            self._publish()
+            self._cond.notify_all()
+
+    def wake(self) -> None:
+        """
+        대기 중인 요청이 취소 여부를 다시 확인하도록 (DELETE /chat/{id} 직후)
+        """
+        with self._cond:
+            self._cond.notify_all()
+
+    def acquire(
+        self,
+        priority_name: str,
+        deadline_s: float,
+        slots: int = 1,
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> Tuple[bool, float]:
+        """
+        슬롯 획득 → (degraded, started_at)
+        slots: 요청 하나가 동시에 돌리는 pipeline 수 (/chat/batch 의 concurrency)
+        check_cancel: 대기 중 취소 확인 (api/cancellation.py) → 취소되면 대기열에서 빠지고 RequestCancelled
+        거절 시 AdmissionRejected. 반드시 같은 slots 로 release(started_at)와 짝을 맞출 것
+        """
+        priority_name = normalize_priority(priority_name)
+        queued_at = time.monotonic()
+        degraded = self._enter(priority_name, deadline_s, slots, check_cancel)
+
+        started = time.monotonic()
+        metrics.observe("admission_queue_wait", started - queued_at, priority=priority_name)
+        if degraded:
+            metrics.incr("admission_degraded", priority=priority_name)
+
+        return degraded, started
+
+    def release(self, started: float, record: bool = True, slots: int = 1) -> None:
+        """
+        record=False: 장시간 점유(batch)는 대기 시간 추정(EWMA)에서 제외
+        """
+        self._release(time.monotonic() - started if record else None, slots)
+
+    @contextmanager
+    def admit(
+        self,
+        priority_name: str,
+        deadline_s: float,
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> Iterator[bool]:
+        """
+        with controller.admit("interactive", 30) as degraded:
+            ...
+        거절 시 AdmissionRejected, 대기 중 취소 시 RequestCancelled
+        """
+        degraded, started = self.acquire(priority_name, deadline_s, check_cancel=check_cancel)
+        try:
+            yield degraded
+        finally:
+            self.release(started)
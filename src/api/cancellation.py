@@ -0,0 +1,58 @@
+# 요청 취소 (클라이언트가 새 메시지 전송 / 대화 초기화 시)
+# - /chat 요청마다 취소 flag 등록 (admission 대기 전), DELETE /chat/{request_id} 로 set
+# - 등록 key 는 (호출자, request_id): 다른 호출자의 요청은 취소할 수 없고, 같은 호출자의 진행 중 id 재사용은 거부
+# - admission 대기 중이면 대기열에서 빠지고, 실행 중이면 그래프 node 경계마다 확인 (실행 중인 LLM 호출은 끝까지 기다림)
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Tuple
+
+from observe import metrics
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class DuplicateRequestId(Exception):
+    pass
+
+
+class CancelRegistry:
+
+    def __init__(self):
+        self._events: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, request_id: str, owner: str = "") -> Iterator[Callable[[], None]]:
+        """
+        with registry.track(request_id, owner) as check:
+            state["_cancel"] = check   # node 경계에서 check() → 취소됐으면 RequestCancelled
+        같은 owner 의 같은 id 가 진행 중이면 DuplicateRequestId
+        """
+        key = (owner, request_id)
+        event = threading.Event()
+        with self._lock:
+            if key in self._events:
+                raise DuplicateRequestId(request_id)
+            self._events[key] = event
+
+        def check() -> None:
+            if event.is_set():
+                raise RequestCancelled(request_id)
+
+        try:
+            yield check
+        finally:
+            with self._lock:
+                self._events.pop(key, None)
+
+    def cancel(self, request_id: str, owner: str = "") -> bool:
+        with self._lock:
+            event = self._events.get((owner, request_id))
+        if event is None:
+            return False
+        event.set()
+        metrics.incr("request_cancelled")
+        return True
@@ -0,0 +1,110 @@
+# 관리자 진단 endpoint (/admin/diag/*)
+# - DIAG_ENABLED=1 + DIAG_TOKEN 설정 시에만 main.py 에서 등록 (기본 꺼짐 → route 자체가 없음)
+# - X-Admin-Token 헤더 인증
+#
+#   curl -X POST -H "X-Admin-Token: $DIAG_TOKEN" "localhost:8000/admin/diag/profile?mode=sample&requests=50"
+#   curl -H "X-Admin-Token: $DIAG_TOKEN" localhost:8000/admin/diag/profile/folded > stacks.folded
+#   flamegraph.pl stacks.folded > flame.svg   (또는 speedscope 에 업로드)
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from config import DIAG_TOKEN
+from observe import profiler
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not DIAG_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, DIAG_TOKEN):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+
+router = APIRouter(prefix="/admin/diag", dependencies=[Depends(require_admin)])
+
+
+# =========================
+# 1️⃣ 프로파일
+# =========================
+
+@router.post("/profile")
+def start_profile(
+    mode: str = "sample",
+    requests: int = 20,
+    seconds: float = 60.0,
+    interval_ms: float = 5.0,
+    all_threads: bool = False,
+):
+    """
+    다음 requests 개 /chat 요청 또는 seconds 동안 프로파일
+    - mode=cprofile: 함수별 누적 시간 (한 번에 1개 요청만 측정)
+    - mode=sample: folded stacks (all_threads=1 이면 worker 스레드 포함 전체 스택)
+    """
+    try:
+        return profiler.start_profile(mode, requests, seconds, interval_ms, all_threads)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _session():
+    session = profiler.current_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="no profile session")
+    return session
+
+
+@router.get("/profile")
+def profile_result(limit: int = 40, sort: str = "cumulative"):
+    """
+    진행 중이거나 마지막으로 끝난 세션 요약 (node별 wall / cpu, GC, 상위 함수 / 스택)
+    """
+    return _session().summary(limit, sort)
+
+
+@router.get("/profile/folded", response_class=PlainTextResponse)
+def profile_folded():
+    session = _session()
+    if session.mode != "sample":
+        raise HTTPException(status_code=400, detail="folded stacks require mode=sample")
+    return session.folded()
+
+
+@router.delete("/profile")
+def stop_profile():
+    session = profiler.stop_profile()
+    if session is None:
+        raise HTTPException(status_code=404, detail="no profile session")
+    return session.summary()
+
+
+# =========================
+# 2️⃣ 메모리
+# =========================
+
+@router.get("/memory")
+def memory():
+    """
+    RSS / 모델별 파라미터 메모리 / GC 상태
+    """
+    return profiler.memory_report()
+
+
+@router.post("/tracemalloc")
+def tracemalloc_start(nframes: int = 10):
+    return profiler.tracemalloc_start(nframes)
+
+
+@router.get("/tracemalloc")
+def tracemalloc_snapshot(top: int = 25, key_type: str = "lineno", diff: bool = False):
+    if key_type not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key_type must be lineno | filename | traceback")
+    try:
+        return profiler.tracemalloc_snapshot(top, key_type, diff)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("/tracemalloc")
+def tracemalloc_stop():
+    return profiler.tracemalloc_stop()
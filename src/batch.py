@@ -0,0 +1,302 @@
+# 대량 질문 오프라인 답변 (bulk 모드)
+# - JSONL / CSV 입력 → JSONL 출력 (완료 즉시 append = checkpoint)
+# - 재실행 시 출력 파일에 이미 성공한 id는 건너뜀
+# - retrieval은 batch (임베딩 / rerank 1회 호출), LLM 단계는 동시성 제한 실행
+#
+# 사용법:
+#   python3 src/batch.py --input questions.jsonl --output answers.jsonl
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+from rag.retriever import retrieve_docs_batch
+from rag.citation import build_citations
+from rag.generator import generate_answer
+from rag.tiering import select_model
+from safety.guardrail import GuardrailStream
+from safety.triage import detect_emergency, emergency_response
+from evaluation.judge import judge_answer
+from postprocess import confidence_level, extract_urls
+from routing import DIRECT_RESPONSES, classify_query
+from config import RERANK_MIN_SCORE, CITATION_POOL
+
+
+# =========================
+# 1️⃣ 입력 / checkpoint
+# =========================
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """
+    JSONL: {"id"?, "question", "history"?} / CSV: id?, question 컬럼
+    id가 없으면 행 번호를 id로 사용
+    """
+    items = []
+
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for i, row in enumerate(rows):
+        question = (row.get("question") or "").strip()
+        if not question:
+            continue
+        items.append({
+            "id": str(row.get("id") or i),
+            "question": question,
+            "history": row.get("history") or [],
+        })
+
+    return items
+
+
+def load_done_ids(path: str) -> Set[str]:
+    """
+    출력 JSONL에서 성공한 id 목록 (error 기록은 재시도 대상)
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # 중단 시 잘린 마지막 줄
+            if "error" not in record:
+                done.add(str(record.get("id")))
+
+    return done
+
+
+# =========================
+# 2️⃣ 항목별 처리
+# =========================
+
+def _answer_with_docs(
+    item: Dict[str, Any],
+    docs: list,
+    judge: bool,
+    signals: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    citations = build_citations(docs, query=item["question"])
+
+    generation = select_model(docs, symptom=(signals or {}).get("symptom"), history=item["history"])
+    guard = GuardrailStream()
+    answer = generate_answer(
+        question=item["question"],
+        history=item["history"],
+        citations=citations,
+        guard=guard,
+        model=generation["model"],
+        tier=generation["tier"],
+    )
+
+    evaluation = {}
+    if judge and citations:
+        evaluation = judge_answer(
+            question=item["question"],
+            answer=answer,
+            citations=citations,
+        )
+
+    urls = extract_urls(citations)
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "route": "rag",
+        "answer": answer,
+        "confidence": confidence_level(
+            medical_score=evaluation.get("medical_score"),
+            evidence_score=evaluation.get("evidence_score"),
+            has_evidence=len(urls) > 0,
+        ),
+        "evidence_urls": urls,
+        "evaluation": evaluation,
+        "guardrail_hits": guard.hits,
+        "generation": {k: generation[k] for k in ("tier", "model", "reason")},
+        # --no-judge 로 돌린 뒤 evaluation.runner 로 묶음 평가할 때 사용
+        "citations": [{"id": c["id"], "content": c["content"]} for c in citations],
+    }
+
+
+def _triage(item: Dict[str, Any]) -> Dict[str, Any]:
+    emergency_type, _ = detect_emergency(item["question"])
+    if emergency_type:
+        return {"route": "emergency", "emergency_type": emergency_type}
+
+    query_type, signals = classify_query(
+        item["question"],
+        has_history=bool(item["history"]),
+    )
+    if query_type in DIRECT_RESPONSES:
+        return {"route": "direct", "query_type": query_type}
+
+    return {"route": "rag", "signals": signals}
+
+
+def _fixed_answer(item: Dict[str, Any], triage: Dict[str, Any]) -> Dict[str, Any]:
+    if triage["route"] == "emergency":
+        answer = emergency_response(triage["emergency_type"])
+        confidence = "상"
+    else:
+        answer = DIRECT_RESPONSES[triage["query_type"]]
+        confidence = ""
+
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "route": triage["route"],
+        "answer": answer,
+        "confidence": confidence,
+        "evidence_urls": [],
+        "evaluation": {},
+    }
+
+
+def _chunks(items: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def iter_answers(
+    items: List[Dict[str, Any]],
+    batch_size: int = 32,
+    concurrency: int = 4,
+    judge: bool = True,
+    fetch_k: int = 50,
+) -> Iterator[Dict[str, Any]]:
+    """
+    batch_size 단위로 retrieval을 묶고, 생성/평가는 concurrency 만큼 동시 실행
+    결과는 완료 순서대로 yield (입력 순서 보장 X)
+    """
+    for chunk in _chunks(items, batch_size):
+        rag_items, rag_signals = [], []
+
+        for item in chunk:
+            triage = _triage(item)
+            if triage["route"] == "rag":
+                rag_items.append(item)
+                rag_signals.append(triage["signals"])
+            else:
+                yield _fixed_answer(item, triage)
+
+        if not rag_items:
+            continue
+
+        try:
+            docs_list = retrieve_docs_batch(
+                [it["question"] for it in rag_items],
+                histories=[it["history"] for it in rag_items],
+                signals=rag_signals,
+                k=CITATION_POOL,
+                fetch_k=fetch_k,
+                min_score=RERANK_MIN_SCORE,
+                max_concurrency=concurrency,
+            )
+        except Exception as e:
+            for item in rag_items:
+                yield {"id": item["id"], "question": item["question"], "error": f"retrieve: {e}"}
+            continue
+
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            futures = {
+                ex.submit(_answer_with_docs, item, docs, judge, signals): item
+                for item, docs, signals in zip(rag_items, docs_list, rag_signals)
+            }
+            try:
+                for fut in as_completed(futures):
+                    item = futures[fut]
+                    try:
+                        yield fut.result()
+                    except Exception as e:
+                        yield {"id": item["id"], "question": item["question"], "error": str(e)}
+            finally:
+                # 소비 중단 (close, /chat/batch 연결 끊김) 시 아직 시작 안 한 pipeline 은 실행하지 않음
+                for fut in futures:
+                    fut.cancel()
+
+
+# =========================
+# 3️⃣ 파일 → 파일 (resume 지원)
+# =========================
+
+def run_bulk(
+    input_path: str,
+    output_path: str,
+    batch_size: int = 32,
+    concurrency: int = 4,
+    judge: bool = True,
+) -> Dict[str, Any]:
+    items = load_questions(input_path)
+    done = load_done_ids(output_path)
+    todo = [it for it in items if it["id"] not in done]
+
+    print(f"Loaded {len(items)} questions, {len(done)} already done, {len(todo)} to go")
+
+    started = time.perf_counter()
+    answered, errors = 0, 0
+
+    with open(output_path, "a", encoding="utf-8") as f:
+        # 중단으로 잘린 마지막 줄 뒤에 이어 쓰지 않도록 줄바꿈 보정
+        if f.tell() > 0:
+            with open(output_path, "rb") as rf:
+                rf.seek(-1, os.SEEK_END)
+                if rf.read(1) != b"\n":
+                    f.write("\n")
+
+        for record in iter_answers(todo, batch_size, concurrency, judge):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+            if "error" in record:
+                errors += 1
+            else:
+                answered += 1
+
+            processed = answered + errors
+            if processed % batch_size == 0:
+                elapsed = time.perf_counter() - started
+                print(f"[{processed}/{len(todo)}] {processed / elapsed:.2f} q/s")
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "total": len(items),
+        "skipped": len(done),
+        "answered": answered,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round((answered + errors) / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+    print(json.dumps(stats, ensure_ascii=False))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetDoctor bulk answering")
+    parser.add_argument("--input", required=True, help="questions .jsonl / .csv")
+    parser.add_argument("--output", required=True, help="answers .jsonl (append, resumable)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-judge", action="store_true")
+    args = parser.parse_args()
+
+    run_bulk(
+        args.input,
+        args.output,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        judge=not args.no_judge,
+    )
+
+
+if __name__ == "__main__":
+    main()
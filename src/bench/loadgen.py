@@ -0,0 +1,184 @@
+# /chat 부하 생성기 (멀티턴 세션, 동시성 단계별 측정)
+# - data/non_expert/response.jsonl 질문으로 세션 구성 (1~N턴, 후속 질문 포함)
+# - 동시성 단계별 throughput, p50/p95/p99 지연, 429/오류율, node별 시간 분해
+#
+# 사용법 (src 에서, API 서버가 mock 설정으로 떠 있는 상태):
+#   python3 -m bench.loadgen --url http://127.0.0.1:8000 --concurrency 1,4,8,16 --sessions 40 --out loadtest.json
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import httpx
+
+from config import BASE_DIR
+from observe.metrics import percentile
+
+
+DEFAULT_QUESTIONS = BASE_DIR / "data" / "non_expert" / "response.jsonl"
+
+FOLLOW_UPS = [
+    "그럼 지금 바로 병원에 가야 할까요?",
+    "집에서 해줄 수 있는 건 없을까요?",
+    "하루 정도 더 지켜봐도 괜찮을까요?",
+    "밥은 계속 줘도 되나요?",
+    "비슷한 증상이 또 나타나면 어떻게 해야 하나요?",
+]
+
+
+# =========================
+# 1️⃣ 세션 생성
+# =========================
+
+def build_sessions(path: str, n: int, max_turns: int = 3, seed: int = 42) -> List[List[str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(n):
+        turns = [rng.choice(questions)]
+        for _ in range(rng.randint(1, max_turns) - 1):
+            turns.append(rng.choice(FOLLOW_UPS))
+        sessions.append(turns)
+    return sessions
+
+
+# =========================
+# 2️⃣ 실행
+# =========================
+
+async def _run_session(
+    client: httpx.AsyncClient,
+    url: str,
+    turns: List[str],
+    records: List[Dict[str, Any]],
+) -> None:
+    history = []
+    for turn, question in enumerate(turns):
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"turn": turn}
+        try:
+            resp = await client.post(
+                f"{url}/chat",
+                json={"question": question, "history": history},
+                headers={"X-Debug-Timings": "1"},
+            )
+            record["status"] = resp.status_code
+            if resp.status_code == 200:
+                data = resp.json()
+                record["timings"] = data.get("timings") or {}
+                history.append({"user": question, "assistant": data.get("answer", "")})
+        except httpx.HTTPError as e:
+            record["status"] = "error"
+            record["error"] = type(e).__name__
+
+        record["latency"] = time.perf_counter() - started
+        records.append(record)
+
+        if record["status"] != 200:
+            break   # 세션 중단 (429 / 오류)
+
+
+async def run_level(url: str, sessions: List[List[str]], concurrency: int, timeout: float) -> Dict[str, Any]:
+    records: List[Dict[str, Any]] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for s in sessions:
+        queue.put_nowait(s)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+
+        async def worker():
+            while not queue.empty():
+                turns = queue.get_nowait()
+                await _run_session(client, url, turns, records)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(records, elapsed, concurrency)
+
+
+def summarize(records: List[Dict[str, Any]], elapsed: float, concurrency: int) -> Dict[str, Any]:
+    ok = [r for r in records if r["status"] == 200]
+    latencies = sorted(r["latency"] for r in ok)
+
+    stages: Dict[str, List[float]] = {}
+    stage_cpu: Dict[str, List[float]] = {}
+    for r in ok:
+        for stage, t in r.get("timings", {}).items():
+            stages.setdefault(stage, []).append(t["wall"])
+            stage_cpu.setdefault(stage, []).append(t["cpu"])
+
+    def ms(v: float) -> float:
+        return round(v * 1000, 1)
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "ok": len(ok),
+        "rejected_429": sum(1 for r in records if r["status"] == 429),
+        "errors": sum(1 for r in records if r["status"] not in (200, 429)),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+        },
+        "stages_ms": {
+            stage: {
+                "calls": len(values),
+                "p50": ms(percentile(sorted(values), 0.50)),
+                "p95": ms(percentile(sorted(values), 0.95)),
+                "cpu_mean": ms(sum(stage_cpu[stage]) / len(stage_cpu[stage])),
+            }
+            for stage, values in stages.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetDoctor /chat load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--questions", default=str(DEFAULT_QUESTIONS))
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    parser.add_argument("--sessions", type=int, default=40, help="동시성 단계별 세션 수")
+    parser.add_argument("--max-turns", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    sessions = build_sessions(args.questions, args.sessions, args.max_turns, args.seed)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "url": args.url,
+        "sessions_per_level": args.sessions,
+        "levels": [],
+    }
+
+    for level in (int(c) for c in args.concurrency.split(",")):
+        result = asyncio.run(run_level(args.url, sessions, level, args.timeout))
+        report["levels"].append(result)
+        print(
+            f"c={level:<3} rps={result['throughput_rps']:<7} "
+            f"p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms "
+            f"p99={result['latency_ms']['p99']}ms 429={result['rejected_429']} err={result['errors']}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved load test report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
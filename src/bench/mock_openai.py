@@ -0,0 +1,236 @@
+# OpenAI 호환 mock 서버 (부하 테스트용, 비용 0)
+# - POST /v1/chat/completions (stream 지원, JSON mode 지원)
+# - POST /v1/embeddings (문자 n-gram hashing → 비슷한 텍스트는 비슷한 벡터)
+# - 모델별 지연 분포 (TTFT + 토큰당 시간), 프롬프트 기준 결정적(deterministic) 출력
+#
+# 사용법 (src 에서 실행):
+#   python3 -m bench.mock_openai --port 9000 --scale 1.0
+#   OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=mock uvicorn main:app --port 8000
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import struct
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+# =========================
+# 1️⃣ 지연 분포
+# =========================
+
+class Latency:
+    """
+    "fixed:200" | "uniform:100:300" | "lognormal:<median_ms>:<sigma>"
+    """
+
+    def __init__(self, spec: str):
+        kind, *args = spec.split(":")
+        self.kind = kind
+        self.args = [float(a) for a in args]
+
+    def sample(self, rng: random.Random, scale: float = 1.0) -> float:
+        if self.kind == "fixed":
+            ms = self.args[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.args[0], self.args[1])
+        elif self.kind == "lognormal":
+            median, sigma = self.args
+            ms = median * math.exp(rng.gauss(0.0, sigma))
+        else:
+            raise ValueError(f"unknown latency spec: {self.kind}")
+        return max(ms, 0.0) * scale / 1000
+
+
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "gpt-4o-mini": {"ttft": "lognormal:350:0.35", "tpot": "fixed:10", "tokens": 90},
+    "gpt-4o": {"ttft": "lognormal:700:0.35", "tpot": "fixed:25", "tokens": 260},
+    "default": {"ttft": "lognormal:400:0.35", "tpot": "fixed:15", "tokens": 120},
+}
+
+EMBEDDING_LATENCY = "lognormal:120:0.3"
+EMBEDDING_DIM = 1536
+
+
+def _profile(model: str) -> Dict[str, Any]:
+    # "gpt-4o-mini"가 "gpt-4o"보다 먼저 매칭되도록 긴 이름부터
+    for name in sorted(DEFAULT_PROFILES, key=len, reverse=True):
+        if name != "default" and model.startswith(name):
+            return DEFAULT_PROFILES[name]
+    return DEFAULT_PROFILES["default"]
+
+
+# =========================
+# 2️⃣ 결정적 출력
+# =========================
+
+_SENTENCES = [
+    "말씀해 주신 증상은 여러 원인으로 나타날 수 있어요.",
+    "우선 식욕과 활력, 배변 상태를 하루 이틀 정도 꼼꼼히 관찰해 주세요.",
+    "물을 충분히 마실 수 있도록 신선한 물을 자주 갈아 주세요.",
+    "증상이 반복되거나 기운이 떨어진다면 동물병원 진료를 받아 보시는 것이 좋아요.",
+    "비슷한 사례에서는 환경 변화나 스트레스가 원인인 경우도 있었어요.",
+    "사료를 갑자기 바꿨다면 이전 사료와 섞어 천천히 바꿔 주세요.",
+    "구토나 설사가 함께 나타나면 탈수가 오지 않도록 주의해야 해요.",
+    "평소와 다른 행동이 있다면 영상으로 기록해 두면 진료에 도움이 돼요.",
+]
+
+
+def _rng(text: str, seed: int) -> random.Random:
+    return random.Random(zlib.crc32(text.encode("utf-8")) ^ seed)
+
+
+def _completion_text(prompt: str, json_mode: bool, n_tokens: int, rng: random.Random) -> str:
+    if json_mode or "STRICT JSON" in prompt:
+        return json.dumps({
+            "medical_score": rng.randint(3, 5),
+            "evidence_score": rng.randint(2, 5),
+            "medical_reason": "신중하게 설명함",
+            "evidence_reason": "근거와 대체로 일치함",
+        }, ensure_ascii=False)
+
+    # 한국어 기준 대략 문장당 15 토큰
+    n_sentences = max(1, n_tokens // 15)
+    return " ".join(rng.choice(_SENTENCES) for _ in range(n_sentences))
+
+
+def _split_tokens(text: str) -> List[str]:
+    # 스트리밍용: 공백 포함 2~3글자 단위
+    return [text[i:i + 3] for i in range(0, len(text), 3)]
+
+
+def hash_embedding(item: Union[str, List[int]], dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    문자 bigram(문자열) / 토큰 bigram(token id 리스트) feature hashing
+    """
+    if isinstance(item, str):
+        feats = [item[i:i + 2] for i in range(max(len(item) - 1, 1))]
+    else:
+        feats = [f"{a}-{b}" for a, b in zip(item, item[1:])] or [str(t) for t in item]
+
+    vec = [0.0] * dim
+    for feat in feats:
+        h = zlib.crc32(feat.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+# =========================
+# 3️⃣ 서버
+# =========================
+
+def create_app(scale: float = 1.0, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "default")
+        messages = body.get("messages", [])
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+
+        profile = _profile(model)
+        rng = _rng(prompt, seed)
+        text = _completion_text(prompt, json_mode, profile["tokens"], rng)
+        tokens = _split_tokens(text)
+
+        ttft = Latency(profile["ttft"]).sample(rng, scale)
+        tpot = Latency(profile["tpot"])
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": len(prompt) // 2,
+            "completion_tokens": len(tokens),
+            "total_tokens": len(prompt) // 2 + len(tokens),
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + sum(tpot.sample(rng, scale) for _ in tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        async def stream():
+            def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+                return "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }, ensure_ascii=False) + "\n\n"
+
+            await asyncio.sleep(ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for tok in tokens:
+                await asyncio.sleep(tpot.sample(rng, scale))
+                yield chunk({"content": tok})
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input")
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+
+        rng = _rng(json.dumps(inputs[:1], ensure_ascii=False), seed)
+        await asyncio.sleep(Latency(EMBEDDING_LATENCY).sample(rng, scale))
+
+        dim = body.get("dimensions") or EMBEDDING_DIM
+        data = []
+        for i, item in enumerate(inputs):
+            vec = hash_embedding(item, dim)
+            if body.get("encoding_format") == "base64":
+                vec = base64.b64encode(struct.pack(f"<{dim}f", *vec)).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vec})
+
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--scale", type=float, default=1.0, help="모든 지연에 곱하는 배율 (0 = 지연 없음)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(scale=args.scale, seed=args.seed), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
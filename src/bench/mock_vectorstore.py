@@ -0,0 +1,106 @@
+# Pinecone 대체 mock 벡터 저장소 (부하 테스트용)
+# - LocalVectorStore + 네트워크 왕복을 흉내 낸 지연 주입
+# - VECTOR_BACKEND=mock 이면 retriever가 이 저장소를 사용
+#   지연 분포: MOCK_VECTOR_LATENCY (기본 "lognormal:40:0.3", bench.mock_openai.Latency 형식)
+#
+# mock 인덱스 생성 (src 에서, mock OpenAI 서버가 떠 있는 상태):
+#   OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=mock \
+#     python3 -m bench.mock_vectorstore --jsonl ../data/non_expert/response.jsonl
+
+import argparse
+import json
+import os
+import random
+import time
+
+from langchain_core.documents import Document
+
+from bench.mock_openai import Latency
+from config import LOCAL_INDEX_DIR
+from rag.local_index import LocalVectorStore
+
+
+class MockVectorStore:
+
+    def __init__(self, store: LocalVectorStore, latency: str = None, seed: int = 0):
+        self.store = store
+        self.latency = Latency(latency or os.getenv("MOCK_VECTOR_LATENCY", "lognormal:40:0.3"))
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def load(cls, index_dir: str, embedding, **kwargs) -> "MockVectorStore":
+        return cls(LocalVectorStore.load(index_dir, embedding), **kwargs)
+
+    def _wait(self) -> None:
+        time.sleep(self.latency.sample(self._rng))
+
+    def similarity_search(self, query, k=4, filter=None):
+        vec = self.store.embedding.embed_query(query)
+        self._wait()
+        return self.store.similarity_search_by_vector(vec, k, filter)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        self._wait()
+        return self.store.similarity_search_by_vector(embedding, k, filter)
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        self._wait()
+        return self.store.similarity_search_by_vector_with_score(embedding, k, filter)
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        vec = self.store.embedding.embed_query(query)
+        self._wait()
+        return self.store.similarity_search_by_vector_with_score(vec, k, filter)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+
+def build_mock_index(jsonl_path: str, index_dir: str = LOCAL_INDEX_DIR, limit: int = None) -> int:
+    """
+    비전문가 응답 데이터(question / answer)로 mock 인덱스 생성
+    """
+    from categorize import categorize_text
+    from ingest import detect_animal
+    from rag.retriever import get_embeddings
+
+    docs = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if limit and i >= limit:
+                break
+            obj = json.loads(line)
+            question, answer = obj["question"], obj["answer"]
+            category, conf = categorize_text(question)
+
+            docs.append(Document(
+                page_content=f"Q: {question}\nA: {answer}",
+                metadata={
+                    "question": question,
+                    "title": "",
+                    "url": f"mock://response/{i}",
+                    "answer_type": "non_expert_llm",
+                    "animal": detect_animal(question=question),
+                    "symptom_category": category,
+                    "symptom_confidence": conf,
+                },
+            ))
+
+    store = LocalVectorStore.from_documents(docs, get_embeddings())
+    store.save(index_dir, meta={"source": jsonl_path, "mock": True})
+    print(f"✅ Mock index saved: {index_dir} ({len(store)} docs)")
+    return len(store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build mock vector index")
+    parser.add_argument("--jsonl", required=True)
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    build_mock_index(args.jsonl, args.index_dir, args.limit)
+
+
+if __name__ == "__main__":
+    main()
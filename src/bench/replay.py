@@ -0,0 +1,217 @@
+# 캡처된 /chat 트래픽 재생 → 설정 변경 전후 stage별 지연 / 결과 비교
+#
+# 1) 서버에서 캡처 (observe/capture.py)
+#      CAPTURE_PATH=../data/capture/traffic.jsonl CAPTURE_SAMPLE_RATE=0.2 uvicorn main:app
+# 2) 다른 설정으로 재생 (설정은 환경변수 → import 전에 --set 으로 주입)
+#      python3 -m bench.replay --traffic ../data/capture/traffic.jsonl \
+#          --set RETRIEVE_FILTER_MODE=multi --set RERANK_MIN_SCORE=-5 --out replay_multi.json
+#    입력이 같은 LLM 호출(rewrite / generate / judge)은 기록된 출력을 재사용 (--no-reuse-llm 으로 끔)
+#    주의: 캡처 파일의 질문 / history 는 마스킹된 텍스트 (이메일 / 전화번호 / URL / 긴 숫자 → <email> 등)
+#    → 마스킹된 요청은 원래와 다른 텍스트로 재실행되어 prompt hash 가 달라지므로 LLM 재사용이 항상 miss
+#      (llm_reuse.hit_rate 가 낮게 나오고, 그 요청의 비교 결과는 LLM 출력 차이까지 포함)
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+# =========================
+# 1️⃣ 로드
+# =========================
+
+def load_traffic(path: str, limit: int = None) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+            if limit and len(records) >= limit:
+                break
+    return records
+
+
+def _nodes_by_name(record: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {n["node"]: n for n in record.get("nodes", [])}
+
+
+# =========================
+# 2️⃣ 비교
+# =========================
+
+def _ids(docs: Optional[List[List[Any]]]) -> List[Any]:
+    return [d[0] for d in docs or []]
+
+
+def diff_outputs(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    node 출력 요약 비교 (문서 목록은 겹침 비율, 나머지는 일치 여부)
+    """
+    diff: Dict[str, Any] = {}
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if key == "docs":
+            ids_a, ids_b = _ids(a), _ids(b)
+            union = set(ids_a) | set(ids_b)
+            diff["docs_jaccard"] = len(set(ids_a) & set(ids_b)) / len(union) if union else 1.0
+            diff["docs_top1_same"] = ids_a[:1] == ids_b[:1]
+        else:
+            diff[f"{key}_same"] = a == b
+    return diff
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    old_nodes, new_nodes = _nodes_by_name(old), _nodes_by_name(new)
+
+    stages = {}
+    for name in list(dict.fromkeys([*old_nodes, *new_nodes])):
+        o, n = old_nodes.get(name), new_nodes.get(name)
+        if o is None or n is None:
+            stages[name] = {"path_changed": True}
+            continue
+        stages[name] = {
+            "wall_old": o["wall"],
+            "wall_new": n["wall"],
+            **diff_outputs(o.get("out", {}), n.get("out", {})),
+        }
+
+    return {
+        "request_id": old.get("request_id"),
+        "path_old": list(old_nodes),
+        "path_new": list(new_nodes),
+        "total_wall_old": old.get("total_wall"),
+        "total_wall_new": new.get("total_wall"),
+        "stages": stages,
+    }
+
+
+def summarize_report(comparisons: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from observe.metrics import percentile
+
+    per_stage: Dict[str, Dict[str, List[float]]] = {}
+    for c in comparisons:
+        for name, st in c["stages"].items():
+            agg = per_stage.setdefault(name, {})
+            for key, value in st.items():
+                if isinstance(value, bool):
+                    agg.setdefault(key, []).append(1.0 if value else 0.0)
+                elif isinstance(value, (int, float)):
+                    agg.setdefault(key, []).append(float(value))
+
+    summary = {}
+    for name, agg in per_stage.items():
+        out: Dict[str, Any] = {"n": max((len(v) for v in agg.values()), default=0)}
+        for key, values in agg.items():
+            if key.startswith("wall_"):
+                s = sorted(values)
+                out[f"{key}_p50"] = round(percentile(s, 0.50), 4)
+                out[f"{key}_p95"] = round(percentile(s, 0.95), 4)
+            else:
+                # *_same / path_changed → 비율, docs_jaccard → 평균
+                out[key] = round(sum(values) / len(values), 4)
+        summary[name] = out
+
+    return {
+        "requests": len(comparisons),
+        "path_changed_rate": round(
+            sum(c["path_old"] != c["path_new"] for c in comparisons) / len(comparisons), 4
+        ) if comparisons else 0.0,
+        "stages": summary,
+    }
+
+
+# =========================
+# 3️⃣ 재생
+# =========================
+
+def replay(records: List[Dict[str, Any]], reuse_llm: bool = True) -> Dict[str, Any]:
+    # 설정(환경변수) 주입 이후에 import
+    from graph import build_graph
+    from observe.capture import capture_request
+
+    graph = build_graph()
+    comparisons, llm_hits, llm_misses, errors = [], 0, 0, 0
+
+    for i, old in enumerate(records):
+        replay_map = {c["key"]: c["output"] for c in old.get("llm", [])} if reuse_llm else None
+        request_id = f"replay-{old.get('request_id') or i}"
+
+        state = {
+            "request_id": request_id,
+            "question": old["question"],
+            "history": old.get("history", []),
+            "degraded": False,
+        }
+
+        try:
+            with capture_request(
+                request_id, old["question"], state["history"],
+                path=None, replay=replay_map or {}, force=True,
+            ) as record:
+                graph.invoke(state)
+        except Exception as e:
+            errors += 1
+            print(f"  ❌ {request_id}: {e}")
+            continue
+
+        llm_hits += record.replay_hits
+        llm_misses += record.replay_misses
+        comparisons.append(compare(old, record.to_dict()))
+
+        if (i + 1) % 20 == 0:
+            print(f"  {i + 1}/{len(records)} replayed")
+
+    report = summarize_report(comparisons)
+    report["errors"] = errors
+    report["llm_reuse"] = {
+        "hits": llm_hits,
+        "misses": llm_misses,
+        "hit_rate": round(llm_hits / (llm_hits + llm_misses), 4) if llm_hits + llm_misses else 0.0,
+    }
+    report["requests_detail"] = comparisons
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /chat traffic")
+    parser.add_argument("--traffic", required=True)
+    parser.add_argument("--out", default="replay_report.json")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="재생에 적용할 설정 (config.py 환경변수)")
+    parser.add_argument("--no-reuse-llm", action="store_true")
+    args = parser.parse_args()
+
+    overrides = dict(kv.split("=", 1) for kv in args.set)
+    os.environ.update(overrides)
+    # 재생 결과가 다시 캡처 파일에 섞이지 않도록
+    os.environ["CAPTURE_PATH"] = ""
+
+    records = load_traffic(args.traffic, args.limit)
+    print(f"▶ replay {len(records)} requests (overrides={overrides}, reuse_llm={not args.no_reuse_llm})")
+
+    started = time.perf_counter()
+    report = replay(records, reuse_llm=not args.no_reuse_llm)
+    report["meta"] = {
+        "traffic": args.traffic,
+        "overrides": overrides,
+        "reuse_llm": not args.no_reuse_llm,
+        "elapsed_s": round(time.perf_counter() - started, 1),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps({k: v for k, v in report.items() if k != "requests_detail"}, ensure_ascii=False, indent=2))
+    print(f"Saved replay report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
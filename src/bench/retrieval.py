@@ -0,0 +1,449 @@
+# 검색 품질 + 지연 벤치마크 (로컬 인덱스 기준, 재현 가능)
+#
+# 사용법 (src 에서 실행):
+#   1) 로컬 인덱스 생성
+#      python3 -c "from ingest import ingest_local; ingest_local('data.csv')"
+#   2) 라벨 질의셋 생성 (질문 → 자기 자신의 URL, 제목 / 패러프레이즈 변형 포함)
+#      python3 -m bench.retrieval build-queries --csv data.csv --out bench_queries.jsonl --n 300 --paraphrases 2
+#   3) 변형별 실행 → JSON 리포트
+#      python3 -m bench.retrieval run --queries bench_queries.jsonl --out bench_baseline.json
+#   4) 두 리포트 비교
+#      python3 -m bench.retrieval compare bench_old.json bench_new.json
+#   5) 임베딩 provider 비교 (provider별 로컬 인덱스 생성 후 품질 + 질의 임베딩 지연)
+#      python3 -m bench.retrieval embeddings --csv data.csv --queries bench_queries.jsonl --out bench_embed.json
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import LOCAL_INDEX_DIR
+from observe.metrics import percentile
+
+
+# =========================
+# 1️⃣ 검색 변형 (retrieve_docs 인자)
+# =========================
+
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    "baseline": {},
+    "no_rewrite": {"rewrite": False},
+    "no_filter": {"use_filter": False},
+    "no_rerank": {"rerank": False},
+    "fetch_k_20": {"fetch_k": 20},
+    "filter_hard": {"filter_mode": "hard"},
+    "filter_multi": {"filter_mode": "multi"},
+    "filter_soft": {"filter_mode": "soft"},
+    "speculative": {"speculative": True},
+}
+
+EVAL_KS = [1, 3, 10]
+
+
+# =========================
+# 2️⃣ 라벨 질의셋 생성
+# =========================
+
+PARAPHRASE_PROMPT = """
+다음은 반려동물 보호자의 질문이다.
+같은 상황과 궁금증을 유지하되, 다른 보호자가 쓴 것처럼 표현을 바꾼 질문을 {n}개 작성하라.
+각 질문은 한두 문장으로 짧게 쓰고, 한 줄에 하나씩만 출력하라. 번호나 기호는 붙이지 말 것.
+
+원문 질문: {question}
+"""
+
+
+def _paraphrase(question: str, n: int) -> List[str]:
+    from langchain_openai import ChatOpenAI
+    from config import OPENAI_API_KEY
+
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, openai_api_key=OPENAI_API_KEY)
+    text = llm.invoke(PARAPHRASE_PROMPT.format(n=n, question=question)).content
+    return [line.strip() for line in text.splitlines() if line.strip()][:n]
+
+
+def build_query_set(
+    csv_path: str,
+    out_path: str,
+    n: int = 300,
+    paraphrases: int = 0,
+    seed: int = 42,
+) -> int:
+    """
+    크롤링 Q&A에서 질의셋 생성 (JSONL)
+    {"qid", "kind": question|title|paraphrase, "query", "target_url"}
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path).fillna("")
+    df = df[(df["url"] != "") & (df["question"] != "")]
+    df = df.drop_duplicates(subset=["url"])
+
+    rows = df.sample(n=min(n, len(df)), random_state=seed)
+
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for i, (_, row) in enumerate(rows.iterrows()):
+            queries = [("question", str(row["question"]))]
+
+            title = str(row.get("title", "")).strip()
+            if title and title != row["question"]:
+                queries.append(("title", title))
+
+            if paraphrases:
+                queries += [("paraphrase", p) for p in _paraphrase(str(row["question"]), paraphrases)]
+
+            for kind, query in queries:
+                f.write(json.dumps({
+                    "qid": f"{i}-{kind}-{count}",
+                    "kind": kind,
+                    "query": query,
+                    "target_url": row["url"],
+                }, ensure_ascii=False) + "\n")
+                count += 1
+
+    print(f"Saved {count} labelled queries to {out_path}")
+    return count
+
+
+def load_query_set(path: str, limit: Optional[int] = None, seed: int = 42) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+
+    if limit and limit < len(queries):
+        queries = random.Random(seed).sample(queries, limit)
+    return queries
+
+
+# =========================
+# 3️⃣ 품질 지표
+# =========================
+
+def rank_of(docs: list, target_url: str) -> Optional[int]:
+    for i, d in enumerate(docs):
+        if d.metadata.get("url") == target_url:
+            return i + 1
+    return None
+
+
+def quality_metrics(ranks: List[Optional[int]], ks: List[int] = EVAL_KS) -> Dict[str, float]:
+    """
+    정답 문서가 1개인 binary relevance 기준
+    - recall@k: 정답이 top-k 안에 있는 비율
+    - MRR: 1 / rank 평균
+    - nDCG@k: 1 / log2(rank + 1) (ideal DCG = 1)
+    """
+    n = len(ranks) or 1
+    result = {}
+
+    for k in ks:
+        hits = [r for r in ranks if r is not None and r <= k]
+        result[f"recall@{k}"] = round(len(hits) / n, 4)
+        result[f"ndcg@{k}"] = round(sum(1 / math.log2(r + 1) for r in hits) / n, 4)
+
+    result["mrr"] = round(sum(1 / r for r in ranks if r is not None) / n, 4)
+    return result
+
+
+def latency_summary(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for name, values in samples.items():
+        v = sorted(values)
+        summary[name] = {
+            "p50_ms": round(percentile(v, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(v, 0.95) * 1000, 2),
+            "mean_ms": round(sum(v) / len(v) * 1000, 2) if v else 0.0,
+        }
+    return summary
+
+
+# =========================
+# 4️⃣ 실행
+# =========================
+
+def _speculation_summary(snap: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    counters = snap["counters"]
+    outcomes = {
+        key.split("outcome=")[1].rstrip("}"): n
+        for key, n in counters.items()
+        if key.startswith("retrieve_speculative")
+    }
+    if not outcomes:
+        return None
+    saved = snap["timings"].get("speculative_saved", {})
+    return {
+        **outcomes,
+        "hit_rate": round(outcomes.get("hit", 0) / sum(outcomes.values()), 4),
+        "saved_p50_ms": round(saved.get("p50", 0.0) * 1000, 2),
+    }
+
+
+def run_variant(
+    queries: List[Dict[str, Any]],
+    vectorstore,
+    params: Dict[str, Any],
+    k: int = max(EVAL_KS),
+) -> Dict[str, Any]:
+    from observe import metrics
+    from rag.retriever import retrieve_docs
+
+    metrics.reset()
+    ranks, ranks_by_kind = [], {}
+    wall: Dict[str, List[float]] = {"total": []}
+    cpu: Dict[str, List[float]] = {"total": []}
+    fallbacks = 0
+
+    for q in queries:
+        timings: Dict[str, Dict[str, float]] = {}
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+
+        docs = retrieve_docs(
+            q["query"],
+            k=k,
+            vectorstore=vectorstore,
+            timings=timings,
+            **params,
+        )
+
+        wall["total"].append(time.perf_counter() - wall0)
+        cpu["total"].append(time.process_time() - cpu0)
+        for stage, t in timings.items():
+            wall.setdefault(stage, []).append(t["wall"])
+            cpu.setdefault(stage, []).append(t["cpu"])
+
+        fallbacks += "recall_fallback" in timings
+
+        r = rank_of(docs, q["target_url"])
+        ranks.append(r)
+        ranks_by_kind.setdefault(q.get("kind", "question"), []).append(r)
+
+    return {
+        "params": params,
+        "quality": quality_metrics(ranks),
+        "quality_by_kind": {kind: quality_metrics(rs) for kind, rs in ranks_by_kind.items()},
+        "recall_fallback_rate": round(fallbacks / len(queries), 4) if queries else 0.0,
+        "speculative": _speculation_summary(metrics.snapshot()),
+        "latency_wall": latency_summary(wall),
+        "latency_cpu": latency_summary(cpu),
+        # 종별 파티션 인덱스인 경우 파티션별 검색 지연
+        "latency_partition": {
+            key: {"count": t["count"], "p50_ms": round(t["p50"] * 1000, 2), "p95_ms": round(t["p95"] * 1000, 2)}
+            for key, t in metrics.snapshot()["timings"].items()
+            if key.startswith("partition_latency")
+        },
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_benchmark(
+    query_path: str,
+    out_path: str,
+    index_dir: str = LOCAL_INDEX_DIR,
+    variants: List[str] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    from rag.embeddings import get_embeddings, read_spec
+    from rag.partitions import load_local
+
+    queries = load_query_set(query_path, limit=limit)
+    # 인덱스를 만든 provider 로 질의 임베딩, 종별 파티션 인덱스면 자동 인식
+    spec = read_spec(os.path.join(index_dir, "meta.json")) or {}
+    vectorstore = load_local(index_dir, get_embeddings(spec.get("provider")), spec)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "index": {"dir": index_dir, "count": len(vectorstore), "partitions": spec.get("partitions")},
+        "n_queries": len(queries),
+        "variants": {},
+    }
+
+    for name in variants or list(VARIANTS):
+        print(f"▶ variant={name} ({len(queries)} queries)")
+        report["variants"][name] = run_variant(queries, vectorstore, VARIANTS[name])
+        print(json.dumps(report["variants"][name]["quality"], ensure_ascii=False))
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"Saved benchmark report to {out_path}")
+    return report
+
+
+def embed_latency(embeddings, texts: List[str]) -> Dict[str, Any]:
+    """
+    질의 1건 임베딩 지연 (요청 경로) + 일괄 임베딩 처리량 (ingest 경로)
+    embed_documents 로 측정해서 질의 캐시 영향 제외
+    """
+    single = []
+    for t in texts:
+        t0 = time.perf_counter()
+        embeddings.embed_documents([t])
+        single.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    embeddings.embed_documents(texts)
+    batch_wall = time.perf_counter() - t0
+
+    return {
+        **latency_summary({"single": single})["single"],
+        "batch_texts_per_s": round(len(texts) / batch_wall, 1) if batch_wall > 0 else None,
+    }
+
+
+def compare_embeddings(
+    csv_path: str,
+    query_path: str,
+    out_path: str,
+    providers: List[str],
+    index_root: str,
+    variants: List[str],
+    limit: Optional[int] = None,
+    rebuild: bool = False,
+) -> Dict[str, Any]:
+    """
+    provider별 로컬 인덱스 ({index_root}/{provider})로 같은 질의셋 실행
+    no_rewrite 변형이 임베딩 품질 차이를 가장 직접적으로 보여줌
+    """
+    from ingest import ingest_local
+    from rag.embeddings import get_embeddings, embedding_spec, read_spec
+    from rag.partitions import load_local
+
+    queries = load_query_set(query_path, limit=limit)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "n_queries": len(queries),
+        "providers": {},
+    }
+
+    for provider in providers:
+        embeddings = get_embeddings(provider)
+        index_dir = os.path.join(index_root, provider)
+        entry: Dict[str, Any] = {"spec": embedding_spec(embeddings), "index_dir": index_dir}
+
+        if rebuild or not os.path.exists(os.path.join(index_dir, "meta.json")):
+            print(f"▶ building {provider} index → {index_dir}")
+            t0 = time.perf_counter()
+            ingest_local(csv_path, index_dir=index_dir, embeddings=embeddings)
+            entry["index_build_s"] = round(time.perf_counter() - t0, 1)
+
+        vectorstore = load_local(index_dir, embeddings, read_spec(os.path.join(index_dir, "meta.json")))
+        entry["query_embed"] = embed_latency(embeddings, [q["query"] for q in queries])
+        entry["variants"] = {}
+        for name in variants:
+            print(f"▶ provider={provider} variant={name} ({len(queries)} queries)")
+            entry["variants"][name] = run_variant(queries, vectorstore, VARIANTS[name])
+
+        report["providers"][provider] = entry
+
+    print()
+    for provider, entry in report["providers"].items():
+        print(f"[{provider}] {entry['spec']['model']} (dim={entry['spec']['dim']})")
+        print(f"  embed single p50/p95 {entry['query_embed']['p50_ms']:.1f}/{entry['query_embed']['p95_ms']:.1f}ms"
+              f", batch {entry['query_embed']['batch_texts_per_s']} texts/s")
+        for name, v in entry["variants"].items():
+            q = v["quality"]
+            print(f"  {name:<12} recall@10 {q['recall@10']:.4f}  mrr {q['mrr']:.4f}"
+                  f"  p95 total {v['latency_wall']['total']['p95_ms']:.1f}ms")
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"Saved embedding comparison to {out_path}")
+    return report
+
+
+def compare_reports(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old.get('git_rev')} → {new.get('git_rev')}")
+    for name, nv in new["variants"].items():
+        ov = old["variants"].get(name)
+        if ov is None:
+            continue
+        print(f"\n[{name}]")
+        for metric, value in nv["quality"].items():
+            prev = ov["quality"].get(metric, 0.0)
+            print(f"  {metric:<10} {prev:.4f} → {value:.4f} ({value - prev:+.4f})")
+        for stage, lat in nv["latency_wall"].items():
+            prev = ov["latency_wall"].get(stage, {}).get("p95_ms", 0.0)
+            print(f"  p95 {stage:<8} {prev:.1f}ms → {lat['p95_ms']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetDoctor retrieval benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_build = sub.add_parser("build-queries")
+    p_build.add_argument("--csv", required=True)
+    p_build.add_argument("--out", required=True)
+    p_build.add_argument("--n", type=int, default=300)
+    p_build.add_argument("--paraphrases", type=int, default=0)
+
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--queries", required=True)
+    p_run.add_argument("--out", required=True)
+    p_run.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    p_run.add_argument("--variants", default=",".join(VARIANTS))
+    p_run.add_argument("--limit", type=int, default=None)
+
+    p_emb = sub.add_parser("embeddings")
+    p_emb.add_argument("--csv", required=True)
+    p_emb.add_argument("--queries", required=True)
+    p_emb.add_argument("--out", required=True)
+    p_emb.add_argument("--providers", default="openai,local")
+    p_emb.add_argument("--index-root", default=os.path.join(os.path.dirname(LOCAL_INDEX_DIR), "embed_bench"))
+    p_emb.add_argument("--variants", default="no_rewrite,baseline")
+    p_emb.add_argument("--limit", type=int, default=None)
+    p_emb.add_argument("--rebuild", action="store_true")
+
+    p_cmp = sub.add_parser("compare")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+
+    args = parser.parse_args()
+
+    if args.cmd == "build-queries":
+        build_query_set(args.csv, args.out, n=args.n, paraphrases=args.paraphrases)
+    elif args.cmd == "run":
+        run_benchmark(
+            args.queries,
+            args.out,
+            index_dir=args.index_dir,
+            variants=args.variants.split(","),
+            limit=args.limit,
+        )
+    elif args.cmd == "embeddings":
+        compare_embeddings(
+            args.csv,
+            args.queries,
+            args.out,
+            providers=args.providers.split(","),
+            index_root=args.index_root,
+            variants=args.variants.split(","),
+            limit=args.limit,
+            rebuild=args.rebuild,
+        )
+    else:
+        compare_reports(args.old, args.new)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# 로컬 trace collector stub (TRACE_BACKEND=collector 테스트용)
+# - POST /v1/traces 로 받은 batch를 메모리에 보관 (최근 N건)
+# - --delay-ms 로 느린 backend를 흉내 내어 drop 정책 확인
+#
+# 사용법 (src 에서 실행):
+#   python3 -m bench.trace_collector --port 4318 --delay-ms 0
+#   TRACE_BACKEND=collector TRACE_SAMPLE_RATE=1.0 uvicorn main:app --port 8000
+
+import argparse
+import asyncio
+from collections import deque
+
+from fastapi import FastAPI, Request
+
+
+def create_app(delay_ms: float = 0.0, keep: int = 1000) -> FastAPI:
+    app = FastAPI()
+    traces = deque(maxlen=keep)
+    stats = {"batches": 0, "traces": 0, "spans": 0}
+
+    @app.post("/v1/traces")
+    async def ingest(request: Request):
+        body = await request.json()
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+
+        batch = body.get("traces", [])
+        stats["batches"] += 1
+        stats["traces"] += len(batch)
+        stats["spans"] += sum(len(t.get("spans", [])) for t in batch)
+        traces.extend(batch)
+        return {"accepted": len(batch)}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.get("/traces")
+    def get_traces(limit: int = 20):
+        return list(traces)[-limit:]
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local trace collector stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(delay_ms=args.delay_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 # Hybrid symptom categorizer (Rule + SBERT)
 # Korean category version (Weighted Rule-based)
 
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from sentence_transformers import SentenceTransformer, util
 
+from config import CATEGORY_SBERT_THRESHOLD, CATEGORY_FALLBACK, CATEGORY_CLF_THRESHOLD
+
 
 # =========================
 # 1️⃣ 증상 상위 카테고리 (한국어)
@@ -43,9 +46,9 @@ KEYWORD_ANCHORS: Dict[str, list] = {
 # 3️⃣ Sentence-BERT 모델 (보조용)
 # =========================
 
-embedder = SentenceTransformer(
-    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-)
+SBERT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+embedder = SentenceTransformer(SBERT_MODEL)
 
 # 카테고리 설명 임베딩 (1회 계산)
 CATEGORY_EMBEDS = {
@@ -54,6 +57,14 @@ CATEGORY_EMBEDS = {
 }
 
 
+@lru_cache(maxsize=1024)
+def encode_text(text: str):
+    """
+    질의 임베딩 (동일 질의 반복 시 재계산 방지)
+    """
+    return embedder.encode(text, convert_to_tensor=True)
+
+
 # =========================
 # 4️⃣ Rule-based (가중치 카운트)
 # =========================
@@ -74,21 +85,14 @@ def rule_based_scores(text: str) -> Dict[str, int]:
 # 5️⃣ Hybrid 분류 함수 (최종)
 # =========================
 
-def categorize_text(
+def rule_label(
     text: str,
     rule_min_hits: int = 1,
     rule_ratio_threshold: float = 0.4,
-    sbert_threshold: float = 0.70
-) -> Tuple[str, float]:
+) -> Optional[Tuple[str, float]]:
     """
-    증상 카테고리 분류
-    - Rule-based: 키워드 가중치 비교
-    - SBERT fallback
+    키워드가 지배적일 때만 (카테고리, 비율), 아니면 None
     """
-
-    # -------------------------
-    # 1️⃣ Rule-based
-    # -------------------------
     rule_scores = rule_based_scores(text)
 
     best_cat = max(rule_scores, key=rule_scores.get)
@@ -102,10 +106,14 @@ def categorize_text(
         if rule_confidence >= rule_ratio_threshold:
             return best_cat, round(rule_confidence, 3)
 
-    # -------------------------
-    # 2️⃣ SBERT fallback
-    # -------------------------
-    text_embed = embedder.encode(text, convert_to_tensor=True)
+    return None
+
+
+def sbert_fallback(text: str, sbert_threshold: float = CATEGORY_SBERT_THRESHOLD) -> Tuple[str, float]:
+    """
+    카테고리 설명문과의 cosine 유사도
+    """
+    text_embed = encode_text(text)
 
     scores = {}
     for cat, cat_embed in CATEGORY_EMBEDS.items():
@@ -121,6 +129,98 @@ def categorize_text(
     return best_cat, round(confidence, 3)
 
 
+def _classifier():
+    """
+    학습된 경량 분류기 (symptom_classifier.py), 사용하지 않으면 None
+    """
+    if CATEGORY_FALLBACK == "sbert":
+        return None
+
+    from symptom_classifier import get_classifier
+    clf = get_classifier()
+    if clf is None and CATEGORY_FALLBACK == "classifier":
+        raise RuntimeError("CATEGORY_FALLBACK=classifier but no trained model (python3 symptom_classifier.py train)")
+    return clf
+
+
+def categorize_text(
+    text: str,
+    rule_min_hits: int = 1,
+    rule_ratio_threshold: float = 0.4,
+    sbert_threshold: float = CATEGORY_SBERT_THRESHOLD
+) -> Tuple[str, float]:
+    """
+    증상 카테고리 분류
+    - Rule-based: 키워드 가중치 비교
+    - fallback: 학습된 경량 분류기 (있으면) → 없으면 SBERT
+    """
+
+    # -------------------------
+    # 1️⃣ Rule-based
+    # -------------------------
+    ruled = rule_label(text, rule_min_hits, rule_ratio_threshold)
+    if ruled is not None:
+        return ruled
+
+    # -------------------------
+    # 2️⃣ fallback
+    # -------------------------
+    clf = _classifier()
+    if clf is not None:
+        return clf.predict([text], CATEGORY_CLF_THRESHOLD)[0]
+
+    return sbert_fallback(text, sbert_threshold)
+
+
+def categorize_texts(texts: List[str]) -> List[Tuple[str, float]]:
+    """
+    여러 질문 일괄 분류 (ingest 용)
+    rule 이 놓친 질문만 모아 분류기 batch 추론 1회
+    """
+    results: List[Optional[Tuple[str, float]]] = [rule_label(t) for t in texts]
+    missed = [i for i, r in enumerate(results) if r is None]
+
+    clf = _classifier() if missed else None
+    if clf is not None:
+        for i, pred in zip(missed, clf.predict([texts[i] for i in missed], CATEGORY_CLF_THRESHOLD)):
+            results[i] = pred
+    else:
+        for i in missed:
+            results[i] = sbert_fallback(texts[i])
+
+    return results
+
+
+def top_categories(
+    text: str,
+    n: int = 2,
+    sbert_min: float = 0.35,
+) -> List[Tuple[str, float]]:
+    """
+    상위 n개 후보 카테고리 (multi-category retrieval 용)
+    - 키워드가 걸리면 rule 매칭 비율 순
+    - 없으면 분류기 확률 순 (분류기가 없으면 SBERT 유사도 순, sbert_min 이상만)
+    """
+    rule_scores = rule_based_scores(text)
+    total = sum(rule_scores.values())
+    clf = _classifier() if total == 0 else None
+
+    if total > 0:
+        ranked = [(cat, hits / total) for cat, hits in rule_scores.items() if hits > 0]
+    elif clf is not None:
+        return clf.top(text, n)
+    else:
+        text_embed = encode_text(text)
+        ranked = [
+            (cat, util.cos_sim(text_embed, cat_embed).item())
+            for cat, cat_embed in CATEGORY_EMBEDS.items()
+        ]
+        ranked = [(cat, sim) for cat, sim in ranked if sim >= sbert_min]
+
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return [(cat, round(score, 3)) for cat, score in ranked[:n]]
+
+
 # =========================
 # 6️⃣ 테스트
 # =========================
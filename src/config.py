@@ -11,3 +11,129 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENV")
 PINECONE_INDEX = os.getenv("PINECONE_INDEX")
+
+# 응급 triage fast path
+EMERGENCY_SBERT_THRESHOLD = float(os.getenv("EMERGENCY_SBERT_THRESHOLD", "0.80"))
+EMERGENCY_ENRICH = os.getenv("EMERGENCY_ENRICH", "0") == "1"
+
+# 그래프 라우팅
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "-10.0"))
+
+# API admission control (동시 처리 / 대기열 / 과부하 시 degrade)
+MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "8"))
+MAX_QUEUE = int(os.getenv("MAX_QUEUE", "32"))
+ADMISSION_DEADLINE_S = float(os.getenv("ADMISSION_DEADLINE_S", "30"))
+DEGRADE_QUEUE_RATIO = float(os.getenv("DEGRADE_QUEUE_RATIO", "0.5"))
+# /chat 는 sync endpoint → 처리 중 + 대기 중 요청이 모두 anyio threadpool thread 를 점유
+# threadpool 크기 = MAX_INFLIGHT + MAX_QUEUE + 여유분 (/metrics, DELETE /chat/{id} 등이 굶지 않도록)
+THREADPOOL_HEADROOM = int(os.getenv("THREADPOOL_HEADROOM", "16"))
+DEGRADED_FETCH_K = int(os.getenv("DEGRADED_FETCH_K", "20"))
+# /chat/batch 는 admission 슬롯 1개만 점유 → 요청 안의 동시 pipeline 수 상한 (MAX_INFLIGHT 우회 방지)
+BATCH_MAX_CONCURRENCY = min(int(os.getenv("BATCH_MAX_CONCURRENCY", "4")), MAX_INFLIGHT)
+
+# 벡터 저장소 backend: "pinecone" | "pinecone_ids" (id만 조회 + rag/corpus.py hydrate)
+#                      | "local" (rag/local_index.py) | "mock" (부하 테스트)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", str(BASE_DIR / "data" / "index" / "local"))
+CORPUS_PATH = os.getenv("CORPUS_PATH", str(BASE_DIR / "data" / "index" / "corpus.arrow"))
+
+# 로깅 (observe/log.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")            # 예: "retrieve=DEBUG,ingest=INFO"
+LOG_SAMPLE_RATE = int(os.getenv("LOG_SAMPLE_RATE", "100"))  # 1/N 요청만 상세 payload 기록 (0 = 끔)
+
+# Tracing (observe/tracing.py)
+# backend: "langfuse" | "collector" (로컬 collector stub 등 HTTP) | "none"
+TRACE_BACKEND = os.getenv("TRACE_BACKEND", "langfuse" if os.getenv("LANGFUSE_PUBLIC_KEY") else "none")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))   # head-based sampling
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "http://127.0.0.1:4318/v1/traces")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))      # 가득 차면 drop
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "50"))
+TRACE_FLUSH_INTERVAL_S = float(os.getenv("TRACE_FLUSH_INTERVAL_S", "2.0"))
+
+# Citation (근접 중복 제거 + MMR + 발췌)
+CITATION_K = int(os.getenv("CITATION_K", "3"))
+CITATION_POOL = int(os.getenv("CITATION_POOL", "10"))          # MMR 후보 수 (retrieve top-k)
+CITATION_MAX_CHARS = int(os.getenv("CITATION_MAX_CHARS", "400"))
+CITATION_MMR_LAMBDA = float(os.getenv("CITATION_MMR_LAMBDA", "0.7"))
+CITATION_DUP_HAMMING = int(os.getenv("CITATION_DUP_HAMMING", "6"))  # simhash 거리 이하면 중복
+
+# Reranker (cross-encoder)
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+
+# 문서별 사전 계산 feature (rag/features.py, ingest 시 생성)
+FEATURE_DIR = os.getenv("FEATURE_DIR", str(BASE_DIR / "data" / "index" / "features"))
+
+# Recall 단계 filter 전략 (rag/retriever.py recall_docs)
+# "hard": 단일 symptom_category 필터 (기존) | "multi": 상위 N개 카테고리 병렬 recall 후 병합
+# "soft": symptom 필터 없이 recall, rerank penalty로만 반영
+RETRIEVE_FILTER_MODE = os.getenv("RETRIEVE_FILTER_MODE", "hard")
+RETRIEVE_TOP_CATEGORIES = int(os.getenv("RETRIEVE_TOP_CATEGORIES", "2"))
+RETRIEVE_MIN_CANDIDATES = int(os.getenv("RETRIEVE_MIN_CANDIDATES", "10"))      # 이보다 적으면 무필터 fallback
+RETRIEVE_MIN_RECALL_SCORE = float(os.getenv("RETRIEVE_MIN_RECALL_SCORE", "0.3"))  # 최고 vector 점수가 낮아도 fallback
+
+# 트래픽 capture (observe/capture.py, bench/replay.py)
+CAPTURE_PATH = os.getenv("CAPTURE_PATH", "")                     # 비어 있으면 capture 끔
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0"))
+
+# 증상 분류 SBERT fallback 임계값 (categorize.py)
+CATEGORY_SBERT_THRESHOLD = float(os.getenv("CATEGORY_SBERT_THRESHOLD", "0.70"))
+
+# 임베딩 provider (rag/embeddings.py)
+# "openai": OpenAI embeddings API | "local": sentence-transformers (CPU, 네트워크 왕복 없음)
+# provider / model 을 바꾸면 재색인 필요 (python3 ingest.py --reindex)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+LOCAL_EMBEDDING_MODEL = os.getenv(
+    "LOCAL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")   # "torch" | "onnx"
+LOCAL_EMBEDDING_BATCH = int(os.getenv("LOCAL_EMBEDDING_BATCH", "64"))
+EMBEDDING_SPEC_PATH = os.getenv("EMBEDDING_SPEC_PATH", str(BASE_DIR / "data" / "index" / "embedding.json"))
+
+# 관리자 진단 endpoint (api/diagnostics.py, observe/profiler.py) — 기본 꺼짐
+# DIAG_ENABLED=1 이고 DIAG_TOKEN 이 설정된 경우에만 /admin/diag/* 등록 (X-Admin-Token 헤더로 인증)
+DIAG_ENABLED = os.getenv("DIAG_ENABLED", "0") == "1"
+DIAG_TOKEN = os.getenv("DIAG_TOKEN", "")
+DIAG_MAX_REQUESTS = int(os.getenv("DIAG_MAX_REQUESTS", "200"))    # 프로파일 세션 1회 최대 요청 수
+DIAG_MAX_WINDOW_S = float(os.getenv("DIAG_MAX_WINDOW_S", "300"))  # 프로파일 세션 최대 시간
+
+# 종별 인덱스 파티션 (rag/partitions.py) — ingest 시점 설정
+# 1 이면 dog / cat / unknown 을 Pinecone namespace (로컬: 하위 디렉터리)로 나눠 저장
+# 서빙은 ingest 가 기록한 spec(embedding.json / meta.json)의 partitions 를 따름
+PARTITION_BY_ANIMAL = os.getenv("PARTITION_BY_ANIMAL", "0") == "1"
+
+# Speculative retrieval (rag/retriever.py) — rewrite LLM 호출 동안 원문 질문으로 먼저 recall
+# 재작성 질의 임베딩과 원문 임베딩의 cosine 이 임계값 이상이면 후보 재사용, 아니면 재검색 후 병합
+RETRIEVE_SPECULATIVE = os.getenv("RETRIEVE_SPECULATIVE", "0") == "1"
+SPECULATIVE_REUSE_SIM = float(os.getenv("SPECULATIVE_REUSE_SIM", "0.85"))
+
+# 경량 증상 분류기 (symptom_classifier.py) — 모델이 있으면 categorize.py 의 SBERT fallback 대신 사용
+# CATEGORY_FALLBACK: "auto" (모델 있으면 분류기) | "classifier" | "sbert"
+SYMPTOM_CLF_DIR = os.getenv("SYMPTOM_CLF_DIR", str(BASE_DIR / "data" / "index" / "symptom_clf"))
+SYMPTOM_CORRECTIONS_PATH = os.getenv(
+    "SYMPTOM_CORRECTIONS_PATH", str(BASE_DIR / "data" / "labels" / "symptom_corrections.jsonl")
+)
+CATEGORY_FALLBACK = os.getenv("CATEGORY_FALLBACK", "auto")
+CATEGORY_CLF_THRESHOLD = float(os.getenv("CATEGORY_CLF_THRESHOLD", "0.5"))
+
+# 답변 생성 모델 tiering (rag/tiering.py) — 쉬운 질의는 fast 모델로 생성
+# GEN_TIER_POLICY: "off" (항상 GEN_MODEL) | "conservative" | "balanced" | "aggressive"
+# GEN_TIER_OVERRIDES: 정책 임계값 덮어쓰기 JSON (예: '{"min_top": 6.0}')
+GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o")
+GEN_FAST_MODEL = os.getenv("GEN_FAST_MODEL", "gpt-4o-mini")
+GEN_TIER_POLICY = os.getenv("GEN_TIER_POLICY", "off")
+GEN_TIER_OVERRIDES = os.getenv("GEN_TIER_OVERRIDES", "")
+
+# 버전별 인덱스 snapshot (rag/versions.py, reindex.py) — 무중단 재색인
+# 버전마다 Pinecone namespace (로컬: 디렉터리) + corpus / feature 를 따로 만들고 검증 후 active.json 을 교체
+# active.json 이 없으면 기존 단일 인덱스 경로 (CORPUS_PATH / FEATURE_DIR / EMBEDDING_SPEC_PATH) 사용
+INDEX_VERSIONS_DIR = os.getenv("INDEX_VERSIONS_DIR", str(BASE_DIR / "data" / "index" / "versions"))
+INDEX_ACTIVE_PATH = os.getenv("INDEX_ACTIVE_PATH", str(BASE_DIR / "data" / "index" / "active.json"))
+INDEX_POINTER_CHECK_S = float(os.getenv("INDEX_POINTER_CHECK_S", "5"))    # 서빙 프로세스의 active.json 확인 주기
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))         # GC 후 남길 버전 수 (active / previous 는 항상 유지)
+INDEX_SMOKE_QUERIES = int(os.getenv("INDEX_SMOKE_QUERIES", "50"))        # 검증: 문서 질문으로 자기 자신 검색
+INDEX_SMOKE_TOP_K = int(os.getenv("INDEX_SMOKE_TOP_K", "5"))
+INDEX_SMOKE_MIN_RECALL = float(os.getenv("INDEX_SMOKE_MIN_RECALL", "0.9"))
+INDEX_VALIDATE_TIMEOUT_S = float(os.getenv("INDEX_VALIDATE_TIMEOUT_S", "120"))  # Pinecone 집계 반영 대기
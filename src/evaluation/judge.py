@@ -1,82 +1,192 @@
 # LLM as Judge (전문성과 근거)
 import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
 from langchain_openai import ChatOpenAI
 from config import OPENAI_API_KEY
+from observe import capture
+from evaluation.prompts import single_judge_prompt, batch_judge_prompt
 
 
-def judge_answer(question: str, answer: str, citations: list) -> dict:
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0,
-        openai_api_key=OPENAI_API_KEY
-    )
-
-    evidence_text = "\n".join(
-        [f"[{c['id']}] {c['content']}" for c in citations]
-    )
+# =========================
+# 1️⃣ 평가 결과 모델
+# =========================
 
-    prompt = f"""
-당신은 수의학적 지식을 가진 신중하고 친절한 평가자입니다.
+class JudgeResult(BaseModel):
+    medical_score: Optional[int] = None
+    evidence_score: Optional[int] = None
+    medical_reason: str = ""
+    evidence_reason: str = ""
+    parse_status: str = "ok"   # "ok" | "repaired" | "parse_error"
 
-아래 질문, 답변, 근거를 바탕으로
-챗봇의 답변이 보호자에게 안전하고 적절한 조언을 했는지 평가하세요.
 
-평가는 반드시 제공된 근거(evidence)를 벗어나지 않아야 합니다.
-외부 지식이나 개인적 판단을 추가하지 마세요.
+# =========================
+# 2️⃣ 관대한(tolerant) JSON 파서
+# =========================
 
----
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SCORE_RE = {
+    "medical_score": re.compile(r'"?medical_score"?\s*[:=]\s*"?([1-5])'),
+    "evidence_score": re.compile(r'"?evidence_score"?\s*[:=]\s*"?([1-5])'),
+}
+_REASON_RE = {
+    "medical_reason": re.compile(r'"?medical_reason"?\s*[:=]\s*"([^"]*)"'),
+    "evidence_reason": re.compile(r'"?evidence_reason"?\s*[:=]\s*"([^"]*)"'),
+}
 
-[질문]
-{question}
 
-[답변]
-{answer}
-
-[근거]
-{evidence_text}
-
----
-
-[평가 기준] (각 1~5점)
+def _clamp_score(value: Any) -> Optional[int]:
+    try:
+        score = int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+    return min(max(score, 1), 5)
+
+
+def _to_result(obj: Dict[str, Any], status: str) -> JudgeResult:
+    return JudgeResult(
+        medical_score=_clamp_score(obj.get("medical_score")),
+        evidence_score=_clamp_score(obj.get("evidence_score")),
+        medical_reason=str(obj.get("medical_reason") or ""),
+        evidence_reason=str(obj.get("evidence_reason") or ""),
+        parse_status=status,
+    )
 
-1. 의료적 적절성 점수 (medical_score)
-- 증상에 대한 해석이 과도하지 않고 신중한가
-- 진단을 단정하지 않았는가
-- 응급 상황과 경과 관찰 판단이 안전한가
 
-2. 근거 활용 점수 (evidence_score)
-- 근거의 범위를 벗어나지 않았는가
-- 근거와 질문 증상을 무리 없이 연결했는가
-- 종(강아지/고양이)에 맞는 조언을 했는가
+def parse_judge_output(text: str) -> JudgeResult:
+    """
+    LLM 출력 → JudgeResult
+    - 1차: 그대로 json.loads
+    - 2차: 코드펜스 제거 / 첫 {...} 추출 / trailing comma 제거
+    - 3차: 정규식으로 점수만 추출
+    어떤 경우에도 예외를 던지지 않는다 (재호출 없음)
+    """
+    text = (text or "").strip()
 
-다음 경우 감점하세요:
-- 근거에 없는 내용을 사실처럼 말한 경우
-- 종이 다른 동물 기준으로 조언한 경우
-- 불필요하게 공포를 조장하거나 지나치게 안일한 경우
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            return _to_result(obj, "ok")
+    except ValueError:
+        pass
+
+    candidate = text
+    fenced = _FENCE_RE.search(candidate)
+    if fenced:
+        candidate = fenced.group(1)
+
+    start, end = candidate.find("{"), candidate.rfind("}")
+    if start != -1 and end > start:
+        candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate[start:end + 1])
+        try:
+            obj = json.loads(candidate)
+            if isinstance(obj, dict):
+                return _to_result(obj, "repaired")
+        except ValueError:
+            pass
+
+    obj = {}
+    for key, pattern in {**_SCORE_RE, **_REASON_RE}.items():
+        m = pattern.search(text)
+        if m:
+            obj[key] = m.group(1)
+
+    if obj.get("medical_score") or obj.get("evidence_score"):
+        return _to_result(obj, "repaired")
+
+    return JudgeResult(
+        medical_reason="parse_error",
+        evidence_reason="parse_error",
+        parse_status="parse_error",
+    )
 
----
 
-아래 형식의 STRICT JSON만 반환하세요:
+# =========================
+# 3️⃣ Judge LLM (JSON mode, 1회 로드)
+# =========================
 
-{{
-  "medical_score": <1~5>,
-  "evidence_score": <1~5>,
-  "medical_reason": "간단한 이유",
-  "evidence_reason": "간단한 이유"
-}}
-"""
+judge_llm = ChatOpenAI(
+    model="gpt-4o-mini",
+    temperature=0,
+    openai_api_key=OPENAI_API_KEY,
+    model_kwargs={"response_format": {"type": "json_object"}},
+)
 
 
+def judge_answer(question: str, answer: str, citations: list) -> dict:
 
+    prompt = single_judge_prompt(question, answer, citations)
+
+    response = capture.llm_call("judge", prompt, lambda: judge_llm.invoke(prompt).content)
+
+    return parse_judge_output(response).model_dump()
+
+
+# =========================
+# 4️⃣ 여러 답변 1회 평가 (오프라인 평가용)
+# =========================
+
+def parse_batch_output(text: str, ids: List[str]) -> Dict[str, JudgeResult]:
+    """
+    {"results": [{"id", ...}, ...]} → id별 JudgeResult
+    - 누락 / 중복 / 모르는 id 항목은 결과에서 제외 (호출 측에서 단건 재평가)
+    """
+    text = (text or "").strip()
+    obj = None
+    for candidate in (text, _TRAILING_COMMA_RE.sub(r"\1", text[text.find("{"):text.rfind("}") + 1])):
+        try:
+            obj = json.loads(candidate)
+            break
+        except ValueError:
+            continue
+
+    entries = obj.get("results") if isinstance(obj, dict) else None
+    if not isinstance(entries, list):
+        return {}
+
+    wanted = set(ids)
+    results: Dict[str, JudgeResult] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        item_id = str(entry.get("id"))
+        if item_id not in wanted or item_id in results:
+            continue
+        result = _to_result(entry, "ok")
+        if result.medical_score is None and result.evidence_score is None:
+            continue
+        results[item_id] = result
+    return results
+
+
+async def ajudge_batch(items: List[Dict[str, Any]]) -> Tuple[Dict[str, JudgeResult], Dict[str, int]]:
+    """
+    items: [{"id", "question", "answer", "citations"}]
+    반환: (id별 결과, token 사용량)
+    """
+    message = await judge_llm.ainvoke(batch_judge_prompt(items))
+    usage = getattr(message, "usage_metadata", None) or {}
+    return (
+        parse_batch_output(message.content, [str(it["id"]) for it in items]),
+        {
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        },
+    )
 
-    response = llm.invoke(prompt).content
 
-    try:
-        return json.loads(response)
-    except Exception:
-        return {
-            "medical_score": None,
-            "evidence_score": None,
-            "medical_reason": "parse_error",
-            "evidence_reason": "parse_error",
-        }
\ No newline at end of file
+async def ajudge_one(item: Dict[str, Any]) -> Tuple[JudgeResult, Dict[str, int]]:
+    message = await judge_llm.ainvoke(
+        single_judge_prompt(item["question"], item["answer"], item["citations"])
+    )
+    usage = getattr(message, "usage_metadata", None) or {}
+    return (
+        parse_judge_output(message.content),
+        {
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        },
+    )
@@ -0,0 +1,288 @@
+# 오프라인 답변 평가 (LLM as Judge, 묶음 호출)
+# - 답변 여러 개를 judge 프롬프트 1회에 묶어 평가 (항목별 STRICT JSON)
+# - 묶음 호출 동시 실행 + 초당 호출 수 제한, 실패 / 누락 항목은 단건으로 재평가
+# - (질문, 답변, 근거, 프롬프트 버전) content hash 기준 캐시 → 재실행 시 바뀐 답변만 평가
+# - 점수 분포 + 비용 / 처리량 리포트
+#
+# 입력: JSONL (id, question, answer, citations[{id, content}]) — batch.py 출력 그대로 사용 가능
+#   python3 -m evaluation.runner --input answers.jsonl --out eval_report.json --group-size 5 --concurrency 4
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import BASE_DIR
+from evaluation.prompts import JUDGE_PROMPT_VERSION, format_evidence
+from observe.metrics import percentile
+
+
+DEFAULT_CACHE = BASE_DIR / "data" / "eval" / "judge_cache.jsonl"
+
+# gpt-4o-mini 기준 USD / 1M tokens (모델 변경 시 --price-in / --price-out)
+PRICE_IN_PER_M = 0.15
+PRICE_OUT_PER_M = 0.60
+
+
+# =========================
+# 1️⃣ 입력 / 캐시
+# =========================
+
+def load_items(path: str) -> List[Dict[str, Any]]:
+    """
+    근거가 없는 항목(응급 템플릿 / 잡담 응답)은 평가 대상에서 제외
+    """
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" in obj or not obj.get("answer") or not obj.get("citations"):
+                continue
+            items.append({
+                "id": str(obj.get("id", i)),
+                "question": obj["question"],
+                "answer": obj["answer"],
+                "citations": obj["citations"],
+            })
+    return items
+
+
+def content_hash(item: Dict[str, Any]) -> str:
+    payload = "\n\x1f".join([
+        JUDGE_PROMPT_VERSION,
+        item["question"],
+        item["answer"],
+        format_evidence(item["citations"]),
+    ])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def load_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    cache: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return cache
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if obj.get("result", {}).get("parse_status") != "parse_error":
+                cache[obj["hash"]] = obj["result"]
+    return cache
+
+
+# =========================
+# 2️⃣ 속도 제한
+# =========================
+
+class RateLimiter:
+    """
+    초당 최대 rate 회 호출 (호출 시작 간격 균등 배분)
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# =========================
+# 3️⃣ 실행
+# =========================
+
+async def evaluate(
+    items: List[Dict[str, Any]],
+    cache_path: str = str(DEFAULT_CACHE),
+    group_size: int = 5,
+    concurrency: int = 4,
+    rate: float = 5.0,
+    price_in: float = PRICE_IN_PER_M,
+    price_out: float = PRICE_OUT_PER_M,
+) -> Dict[str, Any]:
+    from evaluation.judge import ajudge_batch, ajudge_one
+
+    cache = load_cache(cache_path)
+    hashes = {it["id"]: content_hash(it) for it in items}
+    results: Dict[str, Dict[str, Any]] = {
+        it["id"]: cache[hashes[it["id"]]] for it in items if hashes[it["id"]] in cache
+    }
+    todo = [it for it in items if it["id"] not in results]
+    print(f"▶ {len(items)} items: {len(results)} cached, {len(todo)} to judge (group={group_size})")
+
+    stats = Counter()
+    limiter = RateLimiter(rate)
+    sem = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with open(cache_path, "a", encoding="utf-8") as cache_file:
+
+        def _store(item: Dict[str, Any], result: Dict[str, Any]) -> None:
+            results[item["id"]] = result
+            cache_file.write(json.dumps(
+                {"hash": hashes[item["id"]], "id": item["id"], "result": result},
+                ensure_ascii=False,
+            ) + "\n")
+            cache_file.flush()
+
+        def _usage(usage: Dict[str, int]) -> None:
+            stats["calls"] += 1
+            stats["input_tokens"] += usage["input_tokens"]
+            stats["output_tokens"] += usage["output_tokens"]
+
+        async def run_group(group: List[Dict[str, Any]]) -> None:
+            parsed = {}
+            async with sem:
+                await limiter.wait()
+                try:
+                    parsed, usage = await ajudge_batch(group)
+                    _usage(usage)
+                except Exception as e:
+                    stats["batch_errors"] += 1
+                    print(f"  ⚠️ batch failed ({len(group)} items): {e}")
+
+            for item in group:
+                if item["id"] in parsed:
+                    _store(item, parsed[item["id"]].model_dump())
+
+            # 묶음 응답에서 빠진 항목만 단건 재평가
+            missing = [it for it in group if it["id"] not in parsed]
+            stats["fallback_single"] += len(missing)
+            for item in missing:
+                async with sem:
+                    await limiter.wait()
+                    try:
+                        result, usage = await ajudge_one(item)
+                        _usage(usage)
+                    except Exception as e:
+                        stats["single_errors"] += 1
+                        print(f"  ❌ {item['id']}: {e}")
+                        continue
+                _store(item, result.model_dump())
+
+        groups = [todo[i:i + group_size] for i in range(0, len(todo), group_size)]
+        await asyncio.gather(*(run_group(g) for g in groups))
+
+    elapsed = time.perf_counter() - started
+    return build_report(
+        items, results, stats, elapsed,
+        cached=len(items) - len(todo),
+        price_in=price_in,
+        price_out=price_out,
+    )
+
+
+# =========================
+# 4️⃣ 리포트
+# =========================
+
+def _distribution(values: List[Optional[int]]) -> Dict[str, Any]:
+    scored = sorted(v for v in values if v is not None)
+    return {
+        "n": len(scored),
+        "missing": len(values) - len(scored),
+        "mean": round(sum(scored) / len(scored), 3) if scored else None,
+        "p10": percentile(scored, 0.10) if scored else None,
+        "p50": percentile(scored, 0.50) if scored else None,
+        "histogram": {str(s): scored.count(s) for s in range(1, 6)},
+    }
+
+
+def build_report(
+    items: List[Dict[str, Any]],
+    results: Dict[str, Dict[str, Any]],
+    stats: Counter,
+    elapsed: float,
+    cached: int,
+    price_in: float = PRICE_IN_PER_M,
+    price_out: float = PRICE_OUT_PER_M,
+) -> Dict[str, Any]:
+    judged = [results[it["id"]] for it in items if it["id"] in results]
+    fresh = len(items) - cached
+    cost = (stats["input_tokens"] * price_in + stats["output_tokens"] * price_out) / 1_000_000
+
+    return {
+        "items": len(items),
+        "judged": len(judged),
+        "scores": {
+            "medical_score": _distribution([r.get("medical_score") for r in judged]),
+            "evidence_score": _distribution([r.get("evidence_score") for r in judged]),
+        },
+        "parse_status": dict(Counter(r.get("parse_status") for r in judged)),
+        "cost": {
+            "llm_calls": stats["calls"],
+            "input_tokens": stats["input_tokens"],
+            "output_tokens": stats["output_tokens"],
+            "usd": round(cost, 4),
+            "usd_per_item": round(cost / fresh, 6) if fresh else 0.0,
+        },
+        "throughput": {
+            "elapsed_s": round(elapsed, 2),
+            "cached": cached,
+            "fresh": fresh,
+            "items_per_s": round(fresh / elapsed, 2) if elapsed > 0 else None,
+            "items_per_call": round(fresh / stats["calls"], 2) if stats["calls"] else None,
+            "fallback_single": stats["fallback_single"],
+            "batch_errors": stats["batch_errors"],
+            "single_errors": stats["single_errors"],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline LLM-as-judge evaluation")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--out", default="eval_report.json")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE))
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="초당 최대 judge 호출 수")
+    parser.add_argument("--price-in", type=float, default=PRICE_IN_PER_M)
+    parser.add_argument("--price-out", type=float, default=PRICE_OUT_PER_M)
+    args = parser.parse_args()
+
+    items = load_items(args.input)
+    report = asyncio.run(evaluate(
+        items,
+        cache_path=args.cache,
+        group_size=args.group_size,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        price_in=args.price_in,
+        price_out=args.price_out,
+    ))
+    report["meta"] = {
+        "input": args.input,
+        "group_size": args.group_size,
+        "prompt_version": JUDGE_PROMPT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Saved evaluation report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
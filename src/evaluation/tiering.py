@@ -0,0 +1,279 @@
+# 생성 모델 tiering 오프라인 비교 (rag/tiering.py 정책 검증)
+# - 같은 질문 / 같은 근거로 기본 모델 답변과 fast 모델 답변을 모두 생성
+#   (fast 답변은 어느 정책에서든 fast 로 라우팅되는 질문만)
+# - 두 답변을 judge (evaluation.runner, content hash 캐시 공유) 로 채점
+# - 정책별: fast 비율 / 라우팅 이유, fast 로 간 질문의 점수 변화, 전체 평균 점수, 지연 / 비용 추정
+#
+#   python3 -m evaluation.tiering --input questions.jsonl --out tier_report.json
+#   python3 -m evaluation.tiering --input questions.jsonl --policies balanced --overrides '{"min_top": 6.0}'
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from batch import _triage, load_questions
+from config import CITATION_POOL, GEN_FAST_MODEL, GEN_MODEL, RERANK_MIN_SCORE
+from evaluation.runner import DEFAULT_CACHE, content_hash, evaluate, load_cache
+from observe import metrics
+from observe.metrics import percentile
+from rag.citation import build_citations
+from rag.generator import generate_answer
+from rag.retriever import retrieve_docs_batch
+from rag.tiering import TIER_POLICIES, choose_tier, tier_signals, usage_cost
+from safety.guardrail import GuardrailStream
+
+
+SCORES = ("medical_score", "evidence_score")
+
+
+# =========================
+# 1️⃣ 근거 + 두 tier 답변
+# =========================
+
+def prepare(items: List[Dict[str, Any]], batch_size: int = 32, concurrency: int = 4) -> List[Dict[str, Any]]:
+    """
+    RAG 경로 질문만 retrieve → citation / tier signal 계산
+    """
+    rag_items, rag_signals = [], []
+    for item in items:
+        triage = _triage(item)
+        if triage["route"] == "rag":
+            rag_items.append(item)
+            rag_signals.append(triage["signals"])
+
+    prepared = []
+    for start in range(0, len(rag_items), batch_size):
+        chunk = rag_items[start:start + batch_size]
+        signals = rag_signals[start:start + batch_size]
+        docs_list = retrieve_docs_batch(
+            [it["question"] for it in chunk],
+            histories=[it["history"] for it in chunk],
+            signals=signals,
+            k=CITATION_POOL,
+            min_score=RERANK_MIN_SCORE,
+            max_concurrency=concurrency,
+        )
+        for item, sig, docs in zip(chunk, signals, docs_list):
+            prepared.append({
+                **item,
+                "citations": build_citations(docs, query=item["question"]),
+                "signals": tier_signals(docs, sig.get("symptom"), item["history"]),
+            })
+    return prepared
+
+
+def _generate(item: Dict[str, Any], tier: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    answer = generate_answer(
+        question=item["question"],
+        history=item["history"],
+        citations=item["citations"],
+        guard=GuardrailStream(),
+        model=GEN_FAST_MODEL if tier == "fast" else GEN_MODEL,
+        tier=tier,
+    )
+    return {"answer": answer, "latency": time.perf_counter() - started}
+
+
+def generate_pairs(
+    prepared: List[Dict[str, Any]],
+    policies: Dict[str, Dict[str, Any]],
+    concurrency: int = 4,
+) -> None:
+    """
+    item["tiers"][policy] = (tier, reason), item["answers"][tier] = {answer, latency}
+    """
+    jobs = []
+    for item in prepared:
+        item["tiers"] = {name: choose_tier(item["signals"], policy) for name, policy in policies.items()}
+        item["answers"] = {}
+        jobs.append((item, "strong"))
+        if any(tier == "fast" for tier, _ in item["tiers"].values()):
+            jobs.append((item, "fast"))
+
+    print(f"▶ generating {len(jobs)} answers ({len(prepared)} strong / {len(jobs) - len(prepared)} fast)")
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for (item, tier), result in zip(jobs, ex.map(lambda job: _generate(*job), jobs)):
+            item["answers"][tier] = result
+
+
+# =========================
+# 2️⃣ 채점
+# =========================
+
+def judge_pairs(prepared: List[Dict[str, Any]], cache_path: str, **judge_kwargs) -> Dict[str, Any]:
+    """
+    item["answers"][tier]["scores"] 기록, judge 실행 리포트 반환
+    """
+    judge_items = [
+        {
+            "id": f"{item['id']}#{tier}",
+            "question": item["question"],
+            "answer": result["answer"],
+            "citations": [{"id": c["id"], "content": c["content"]} for c in item["citations"]],
+        }
+        for item in prepared if item["citations"]
+        for tier, result in item["answers"].items()
+    ]
+    report = asyncio.run(evaluate(judge_items, cache_path=cache_path, **judge_kwargs))
+
+    cache = load_cache(cache_path)
+    by_id = {it["id"]: cache.get(content_hash(it), {}) for it in judge_items}
+    for item in prepared:
+        for tier, result in item["answers"].items():
+            judged = by_id.get(f"{item['id']}#{tier}", {})
+            result["scores"] = {s: judged.get(s) for s in SCORES}
+    return report
+
+
+# =========================
+# 3️⃣ 정책별 리포트
+# =========================
+
+def _mean(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def _tokens_per_answer() -> Dict[str, Dict[str, float]]:
+    """
+    generate_answer 가 남긴 generate_tokens / generate_latency 메트릭 → tier별 평균 token
+    """
+    snap = metrics.snapshot()
+    calls = {
+        tier: snap["timings"].get(f"generate_latency{{tier={tier}}}", {}).get("count", 0)
+        for tier in ("strong", "fast")
+    }
+    return {
+        tier: {
+            kind: snap["counters"].get(f"generate_tokens{{kind={kind},tier={tier}}}", 0) / calls[tier]
+            for kind in ("input", "output")
+        }
+        for tier in calls if calls[tier]
+    }
+
+
+def policy_report(prepared: List[Dict[str, Any]], name: str, tokens: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    tiers = [item["tiers"][name] for item in prepared]
+    routed = [item for item, (tier, _) in zip(prepared, tiers) if tier == "fast"]
+
+    def chosen(item, score):
+        tier = item["tiers"][name][0]
+        return item["answers"][tier]["scores"].get(score)
+
+    deltas = {
+        s: [
+            item["answers"]["fast"]["scores"][s] - item["answers"]["strong"]["scores"][s]
+            for item in routed
+            if item["answers"]["fast"]["scores"][s] is not None
+            and item["answers"]["strong"]["scores"][s] is not None
+        ]
+        for s in SCORES
+    }
+
+    latencies = sorted(item["answers"][tier]["latency"] for item, (tier, _) in zip(prepared, tiers))
+    baseline = sorted(item["answers"]["strong"]["latency"] for item in prepared)
+
+    def cost(tier_list: List[str]) -> Optional[float]:
+        costs = [
+            usage_cost(GEN_FAST_MODEL if t == "fast" else GEN_MODEL, tokens[t]["input"], tokens[t]["output"])
+            if t in tokens else None
+            for t in tier_list
+        ]
+        if any(c is None for c in costs) or not costs:
+            return None
+        return round(sum(costs) / len(costs) * 1000, 4)
+
+    return {
+        "fast_share": round(len(routed) / len(prepared), 3) if prepared else 0.0,
+        "reasons": dict(Counter(reason for _, reason in tiers)),
+        # fast 로 간 질문: 같은 근거의 기본 모델 답변 대비 점수 변화
+        "routed": {
+            s: {
+                "n": len(deltas[s]),
+                "mean_delta": _mean(deltas[s]),
+                "drop_ge_1": sum(1 for d in deltas[s] if d <= -1),
+                "strong_mean": _mean([item["answers"]["strong"]["scores"][s] for item in routed]),
+                "fast_mean": _mean([item["answers"]["fast"]["scores"][s] for item in routed]),
+            }
+            for s in SCORES
+        },
+        # 전체: 정책 적용 시 평균 점수 vs 항상 기본 모델
+        "overall": {
+            s: {
+                "policy_mean": _mean([chosen(item, s) for item in prepared]),
+                "strong_mean": _mean([item["answers"]["strong"]["scores"][s] for item in prepared]),
+            }
+            for s in SCORES
+        },
+        "latency_s": {
+            "policy_p50": round(percentile(latencies, 0.50), 3),
+            "policy_p95": round(percentile(latencies, 0.95), 3),
+            "strong_p50": round(percentile(baseline, 0.50), 3),
+            "strong_p95": round(percentile(baseline, 0.95), 3),
+        },
+        # token 평균 기반 추정 (USD / 1000 답변)
+        "cost_per_1k_usd": {
+            "policy": cost([t for t, _ in tiers]),
+            "strong": cost(["strong"] * len(tiers)),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline comparison of generation model tiering policies")
+    parser.add_argument("--input", required=True, help="questions .jsonl / .csv (batch.py 입력 형식)")
+    parser.add_argument("--out", default="tier_report.json")
+    parser.add_argument("--policies", default="conservative,balanced,aggressive")
+    parser.add_argument("--overrides", default="", help="모든 정책에 적용할 임계값 JSON")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE))
+    parser.add_argument("--group-size", type=int, default=5)
+    args = parser.parse_args()
+
+    overrides = json.loads(args.overrides) if args.overrides else {}
+    policies = {}
+    for name in args.policies.split(","):
+        if not TIER_POLICIES.get(name):
+            raise SystemExit(f"unknown or disabled policy: {name}")
+        policies[name] = {**TIER_POLICIES[name], **overrides}
+
+    items = load_questions(args.input)
+    if args.limit:
+        items = items[:args.limit]
+
+    metrics.reset()
+    prepared = prepare(items, concurrency=args.concurrency)
+    generate_pairs(prepared, policies, args.concurrency)
+    tokens = _tokens_per_answer()
+    judge_report = judge_pairs(prepared, args.cache, group_size=args.group_size, concurrency=args.concurrency)
+
+    report = {
+        "meta": {
+            "input": args.input,
+            "questions": len(items),
+            "rag_questions": len(prepared),
+            "models": {"strong": GEN_MODEL, "fast": GEN_FAST_MODEL},
+            "overrides": overrides,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "tokens_per_answer": tokens,
+        "policies": {name: policy_report(prepared, name, tokens) for name in policies},
+        "judge": {k: judge_report[k] for k in ("judged", "parse_status", "cost")},
+    }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(report["policies"], ensure_ascii=False, indent=2))
+    print(f"Saved tiering report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import TypedDict, List, Dict, Any
+from typing import TypedDict, List, Dict, Any, Optional
 
 from langgraph.graph import StateGraph, END
 
@@ -7,7 +7,26 @@ from observe.trace_utils import traced_node
 from rag.retriever import retrieve_docs
 from rag.citation import build_citations
 from rag.generator import generate_answer
-from safety.guardrail import apply_guardrail
+from rag.tiering import select_model
+from safety.guardrail import apply_guardrail, GuardrailStream
+from safety.triage import (
+    detect_emergency,
+    emergency_response,
+    submit_enrichment,
+)
+from config import (
+    EMERGENCY_ENRICH,
+    RERANK_MIN_SCORE,
+    DEGRADED_FETCH_K,
+    CITATION_POOL,
+)
+from routing import (
+    DIRECT_RESPONSES,
+    classify_query,
+    route_after_triage,
+    route_after_retrieve,
+    route_after_safety,
+)
 from evaluation.judge import judge_answer
 from postprocess import (
     confidence_level,
@@ -15,24 +34,105 @@ from postprocess import (
 )
 
 class GraphState(TypedDict):
+    request_id: str
+    degraded: bool                 # 과부하 시 judge 생략 / fetch_k 축소
     question: str
     history: List[Dict[str, str]]  # 🔥 추가
 
+    emergency_type: Optional[str]
+    query_type: str                # "pet" | "chitchat" | "offtopic"
+    signals: Dict[str, Any]        # animal / symptom (triage에서 1회 계산)
+
     docs: list
     citations: List[Dict[str, Any]]
 
+    generation: Dict[str, Any]     # 생성 모델 tier / 선택 이유 (rag/tiering.py)
     answer: str
+    guardrail_hits: List[str]
     evaluation: Dict[str, Any]
 
     confidence: str
     evidence_urls: List[str]
 
+    timings: Dict[str, Dict[str, float]]  # node별 wall / cpu (traced_node)
+    _trace: Any                           # RequestTrace (샘플링된 요청만)
+    _cancel: Any                          # 취소 확인 callable (api/cancellation.py)
+
 
 
 def build_graph():
 
     graph = StateGraph(GraphState)
 
+    # -------------------------
+    # Emergency triage (entry)
+    # -------------------------
+    def triage_node(s):
+        emergency_type, _ = detect_emergency(s["question"])
+        if emergency_type:
+            return {**s, "emergency_type": emergency_type}
+
+        query_type, signals = classify_query(
+            s["question"],
+            has_history=bool(s.get("history")),
+        )
+        return {
+            **s,
+            "emergency_type": None,
+            "query_type": query_type,
+            "signals": signals,
+        }
+
+    graph.add_node(
+        "triage",
+        traced_node("triage", triage_node),
+    )
+
+    # -------------------------
+    # Direct response (잡담 / 비관련 질의, LLM 호출 없음)
+    # -------------------------
+    graph.add_node(
+        "direct",
+        traced_node(
+            "direct",
+            lambda s: {
+                **s,
+                "answer": DIRECT_RESPONSES[s["query_type"]],
+                "citations": [],
+                "confidence": "",
+                "evidence_urls": [],
+            },
+        ),
+    )
+
+    # -------------------------
+    # Emergency fast path (템플릿 응답, RAG 우회)
+    # -------------------------
+    def emergency_node(s):
+        if EMERGENCY_ENRICH and s.get("request_id"):
+            submit_enrichment(
+                s["request_id"],
+                lambda: {
+                    "evidence_urls": extract_urls(build_citations(
+                        retrieve_docs(s["question"], history=s.get("history", [])),
+                        query=s["question"],
+                    )),
+                },
+            )
+
+        return {
+            **s,
+            "answer": emergency_response(s["emergency_type"]),
+            "citations": [],
+            "confidence": "상",
+            "evidence_urls": [],
+        }
+
+    graph.add_node(
+        "emergency",
+        traced_node("emergency", emergency_node),
+    )
+
     # -------------------------
     # Retrieve
     # -------------------------
@@ -43,7 +143,12 @@ def build_graph():
             lambda s: {
                 **s,
                 "docs": retrieve_docs(s["question"],
-                                      history=s.get("history", [])),
+                                      history=s.get("history", []),
+                                      k=CITATION_POOL,
+                                      min_score=RERANK_MIN_SCORE,
+                                      fetch_k=DEGRADED_FETCH_K if s.get("degraded") else 50,
+                                      **s.get("signals", {})),
+                "citations": [],
             },
         ),
     )
@@ -57,7 +162,7 @@ def build_graph():
             "cite",
             lambda s: {
                 **s,
-                "citations": build_citations(s["docs"]),
+                "citations": build_citations(s["docs"], query=s["question"]),
             },
         ),
     )
@@ -65,29 +170,38 @@ def build_graph():
     # -------------------------
     # Generate answer (LLM)
     # -------------------------
+    def generate_node(s):
+        generation = select_model(
+            s.get("docs", []),
+            symptom=s.get("signals", {}).get("symptom"),
+            history=s.get("history", []),
+            degraded=bool(s.get("degraded")),
+        )
+        guard = GuardrailStream()
+        answer = generate_answer(
+            question=s["question"],
+            history=s.get("history", []),
+            citations=s["citations"],
+            guard=guard,
+            model=generation["model"],
+            tier=generation["tier"],
+        )
+        return {**s, "answer": answer, "guardrail_hits": guard.hits, "generation": generation}
+
     graph.add_node(
         "generate",
-        traced_node(
-            "generate",
-            lambda s: {
-                **s,
-                "answer": generate_answer(
-                    question=s["question"],
-                    history=s.get("history", []),
-                    citations=s["citations"],
-                ),
-            },
-        ),
+        traced_node("generate", generate_node),
     )
 
     # -------------------------
     # Safety guardrail
+    # (generate 단계에서 스트리밍 검사를 마쳤으면 통과)
     # -------------------------
     graph.add_node(
         "safety",
         traced_node(
             "safety",
-            lambda s: {
+            lambda s: s if "guardrail_hits" in s else {
                 **s,
                 "answer": apply_guardrail(s["answer"]),
             },
@@ -122,8 +236,8 @@ def build_graph():
             lambda s: {
                 **s,
                 "confidence": confidence_level(
-                    medical_score=s["evaluation"].get("medical_score"),
-                    evidence_score=s["evaluation"].get("evidence_score"),
+                    medical_score=s.get("evaluation", {}).get("medical_score"),
+                    evidence_score=s.get("evaluation", {}).get("evidence_score"),
                     has_evidence=len(extract_urls(s["citations"])) > 0,
                 ),
                 "evidence_urls": extract_urls(s["citations"]),
@@ -134,12 +248,32 @@ def build_graph():
     # ----------------------------------------------------------------
     # 3. Edges
     # ----------------------------------------------------------------
-    graph.set_entry_point("retrieve")
+    graph.set_entry_point("triage")
 
-    graph.add_edge("retrieve", "cite")
+    graph.add_conditional_edges(
+        "triage",
+        route_after_triage,
+        {"emergency": "emergency", "direct": "direct", "retrieve": "retrieve"},
+    )
+    graph.add_edge("emergency", END)
+    graph.add_edge("direct", END)
+
+    graph.add_conditional_edges(
+        "retrieve",
+        route_after_retrieve,
+        {"cite": "cite", "generate": "generate"},
+    )
     graph.add_edge("cite", "generate")
     graph.add_edge("generate", "safety")
-    graph.add_edge("safety", "judge")
+    graph.add_conditional_edges(
+        "safety",
+        route_after_safety,
+        {
+            "judge": "judge",
+            "postprocess": "postprocess",
+            "postprocess_degraded": "postprocess",
+        },
+    )
     graph.add_edge("judge", "postprocess")
     graph.add_edge("postprocess", END)
 
@@ -1,18 +1,33 @@
-import pandas as pd
+import argparse
+import csv
+import os
+from datetime import datetime
 
-from pinecone import Pinecone
-from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
 
 from config import (
-    OPENAI_API_KEY,
-    PINECONE_API_KEY,
     PINECONE_INDEX,
+    LOCAL_INDEX_DIR,
+    FEATURE_DIR,
+    CORPUS_PATH,
+    PINECONE_API_KEY,
+    VECTOR_BACKEND,
+    PARTITION_BY_ANIMAL,
 )
 
 # 🔥 증상 분류기 import
-from categorize import categorize_text
+from categorize import categorize_texts
+
+from observe.log import get_logger
+from rag.dedup import simhash_hex
+from rag.features import FeatureStore, doc_id_for
+from rag.corpus import CorpusStore, HydratedIndex
+from rag.embeddings import get_embeddings, embedding_spec, read_spec, write_spec, check_spec
+from rag.partitions import PARTITIONS, split_by_partition
+from rag.versions import active_version, namespace_for
+
+log = get_logger("ingest")
 
 
 # =========================
@@ -69,85 +84,304 @@ def detect_animal(
 
 
 # =========================
-# 2️⃣ CSV → Pinecone Ingest
+# 2️⃣ CSV → Document
 # =========================
 
-def ingest_csv(csv_path="/home/ys0660/happycat/data/data.csv"):
-    # 1️⃣ CSV 로드
-    df = pd.read_csv(csv_path)
+def iter_documents(csv_path="/home/ys0660/happycat/data/data.csv", chunk_size=512):
+    """
+    CSV를 한 행씩 스트리밍 (DataFrame 전체 적재 없음)
+    question / answer 가 비어 있는 행은 제외
+    증상 분류는 chunk_size 행씩 묶어 batch 추론
+    """
+    # utf-8-sig: BOM 이 있는 CSV (data/non_expert 등) 의 첫 컬럼명이 "\ufeffurl" 이 되지 않도록
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+
+        # sanity check
+        missing = {"url", "answer_type"} - set(reader.fieldnames or [])
+        if missing:
+            log.warning("ingest.missing_columns", extra={"fields": {"columns": sorted(missing), "csv": csv_path}})
+
+        chunk = []
+        for row in reader:
+            if not row.get("answer") or not row.get("question"):
+                continue
+            chunk.append({k: v or "" for k, v in row.items()})
+            if len(chunk) >= chunk_size:
+                yield from _to_documents(chunk)
+                chunk = []
+        if chunk:
+            yield from _to_documents(chunk)
+
+
+def _to_documents(rows):
+    symptoms = categorize_texts([str(row.get("question", "")) for row in rows])
+    return [_to_document(row, symptom) for row, symptom in zip(rows, symptoms)]
+
+
+def load_documents(csv_path="/home/ys0660/happycat/data/data.csv"):
+    docs = list(iter_documents(csv_path))
+    log.info("ingest.loaded", extra={"fields": {"count": len(docs), "csv": csv_path}})
+    return docs
+
+
+def _to_document(row, symptom) -> Document:
+    question = str(row.get("question", ""))
+    title = str(row.get("title", ""))
+    answer = str(row.get("answer_clean", ""))
+    url = str(row.get("url", ""))
+    answer_type = str(row.get("answer_type", "unknown"))
+
+    # 🔹 동물 종류 판단 (가중치 기반)
+    animal = detect_animal(
+        question=question,
+        title=title,
+    )
 
-    df = df.dropna(subset=["answer", "question"])
-    df = df.fillna("")
+    # 🔥 증상 카테고리 분류 (_to_documents 에서 batch 계산)
+    symptom_category, symptom_confidence = symptom
 
-    # sanity check
-    for i, row in df.iterrows():
-        if pd.isna(row.get("url")) or pd.isna(row.get("answer_type")):
-            print("BAD ROW:", i, row)
-            break
+    # Q + A 결합 (retrieval 대상)
+    page_content = f"Q: {question}\nA: {answer}"
 
-    # 2️⃣ Pinecone client
-    pc = Pinecone(
-        api_key=PINECONE_API_KEY
-    )
+    return Document(
+        page_content=page_content,
+        metadata={
+            # feature store / corpus 조회 key
+            "doc_id": doc_id_for(url, question),
+
+            # 기존 필드
+            "question": question,
+            "title": title,
+            "url": url,
+            "answer_type": answer_type,
+            "animal": animal,
+
+            # 신규 필드
+            "symptom_category": symptom_category,
+            "symptom_confidence": symptom_confidence,
 
-    # 3️⃣ Embeddings
-    embeddings = OpenAIEmbeddings(
-        openai_api_key=OPENAI_API_KEY
+            # 근접 중복 판별용 (citation 단계)
+            "simhash": simhash_hex(page_content),
+        }
     )
 
-    # 4️⃣ Document 생성
-    docs = []
 
-    for _, row in df.iterrows():
-        question = str(row.get("question", ""))
-        title = str(row.get("title", ""))
-        answer = str(row.get("answer_clean", ""))
-        url = str(row.get("url", ""))
-        answer_type = str(row.get("answer_type", "unknown"))
+def build_corpus(docs, corpus_path=CORPUS_PATH):
+    """
+    본문 / metadata → 로컬 Arrow corpus (rag/corpus.py)
+    """
+    count = CorpusStore.write(docs, corpus_path)
+    log.info("ingest.corpus_done", extra={"fields": {"count": count, "corpus": corpus_path}})
+    return count
+
 
-        # 🔹 동물 종류 판단 (가중치 기반)
-        animal = detect_animal(
-            question=question,
-            title=title,
+def build_features(docs, feature_dir=FEATURE_DIR):
+    """
+    rerank / citation 단계용 문서별 feature 사전 계산 (rag/features.py)
+    """
+    store = FeatureStore.build(docs)
+    store.save(feature_dir)
+
+    log.info("ingest.features_done", extra={"fields": {"count": len(store), "feature_dir": feature_dir}})
+    return store
+
+
+# =========================
+# 3️⃣ CSV → Pinecone Ingest
+# =========================
+
+def check_dimension(index, spec: dict, stats=None) -> None:
+    """
+    Pinecone 인덱스 차원은 생성 시 고정 → 다르면 새 인덱스 필요
+    """
+    stats = stats or index.describe_index_stats()
+    if stats["dimension"] != spec["dim"]:
+        raise RuntimeError(
+            f"index {PINECONE_INDEX} has dimension {stats['dimension']}, "
+            f"but {spec['provider']}:{spec['model']} produces {spec['dim']} "
+            f"(create a new index with dimension={spec['dim']} and set PINECONE_INDEX)"
         )
 
-        # 🔥 증상 카테고리 분류
-        symptom_category, symptom_confidence = categorize_text(question)
-
-        # Q + A 결합 (retrieval 대상)
-        page_content = f"Q: {question}\nA: {answer}"
-
-        docs.append(
-            Document(
-                page_content=page_content,
-                metadata={
-                    # 기존 필드
-                    "question": question,
-                    "title": title,
-                    "url": url,
-                    "answer_type": answer_type,
-                    "animal": animal,
-
-                    # 신규 필드
-                    "symptom_category": symptom_category,
-                    "symptom_confidence": symptom_confidence,
-                }
+
+def _prepare_index(index, embeddings, reindex: bool, partitioned: bool) -> dict:
+    """
+    업로드 전 인덱스 / 임베딩 정합성 확인
+    - 기존 벡터가 다른 임베딩 모델로 만들어졌거나 파티션 방식이 다르면
+      reindex 없이는 중단 (섞이면 검색이 조용히 망가짐)
+    """
+    spec = embedding_spec(embeddings)
+    stats = index.describe_index_stats()
+    check_dimension(index, spec, stats)
+
+    if reindex:
+        # 기본 namespace("") + 종별 파티션 namespace (버전 인덱스 namespace 는 rag/versions.py 관리)
+        for namespace in stats["namespaces"] or {"": None}:
+            if namespace in ("",) + PARTITIONS:
+                index.delete(delete_all=True, namespace=namespace)
+        log.info("ingest.reindex_cleared", extra={"fields": {"index": PINECONE_INDEX, "spec": spec}})
+    elif stats["total_vector_count"]:
+        indexed = read_spec()
+        check_spec(indexed, embeddings, PINECONE_INDEX)
+        if bool((indexed or {}).get("partitions")) != partitioned:
+            raise RuntimeError(
+                f"index {PINECONE_INDEX} partitioning differs from PARTITION_BY_ANIMAL={int(partitioned)} "
+                f"(re-index with: python3 ingest.py --reindex)"
+            )
+
+    return spec
+
+
+def upload_documents(index, embeddings, docs, partitioned: bool, corpus_path=CORPUS_PATH, version=None) -> dict:
+    """
+    Pinecone 업로드 → {파티션 (비파티션은 ""): namespace}
+    version 이 있으면 버전 전용 namespace ({version} / {version}-{partition}),
+    없으면 기본 namespace (None) / 파티션 이름
+    """
+    groups = split_by_partition(docs) if partitioned else {"": docs}
+    corpus = CorpusStore.load(corpus_path) if VECTOR_BACKEND == "pinecone_ids" else None
+
+    namespaces = {}
+    for partition, group in groups.items():
+        if version is not None:
+            namespace = namespace_for(version, partition or None)
+        else:
+            namespace = partition or None
+        namespaces[partition] = namespace
+        if not group:
+            continue
+        if corpus is not None:
+            # id + filter metadata만 업로드 (본문은 corpus에서 hydrate)
+            HydratedIndex(index, embeddings, corpus, namespace=namespace).upsert(group)
+        else:
+            vectorstore = PineconeVectorStore.from_existing_index(
+                index_name=PINECONE_INDEX,
+                embedding=embeddings,
+                namespace=namespace,
             )
-        )
+            vectorstore.add_documents(group)
 
-    print(f"Loaded {len(docs)} documents from CSV")
+    return namespaces
 
-    # 5️⃣ VectorStore 연결 (기존 index 사용)
-    vectorstore = PineconeVectorStore.from_existing_index(
-        index_name=PINECONE_INDEX,
-        embedding=embeddings,
-    )
 
-    # 6️⃣ 업로드
-    vectorstore.add_documents(docs)
+def ingest_csv(
+    csv_path="/home/ys0660/happycat/data/data.csv",
+    feature_dir=FEATURE_DIR,
+    corpus_path=CORPUS_PATH,
+    provider=None,
+    reindex=False,
+    partitioned=PARTITION_BY_ANIMAL,
+):
+    """
+    provider: 임베딩 provider (기본 EMBEDDING_PROVIDER, rag/embeddings.py)
+    reindex: 기존 벡터를 모두 지우고 현재 임베딩으로 다시 색인 (provider / model 변경 시)
+    partitioned: dog / cat / unknown 을 namespace 로 나눠 업로드 (rag/partitions.py)
+    """
+    from pinecone import Pinecone
+
+    if active_version() is not None:
+        # 서빙은 active.json 의 버전을 읽으므로 이 경로로 색인해도 반영되지 않음
+        log.warning("ingest.versioned_index_active", extra={"fields": {
+            "active": active_version(), "hint": "python3 reindex.py build",
+        }})
+
+    docs = load_documents(csv_path)
+    build_features(docs, feature_dir)
+    build_corpus(docs, corpus_path)
 
-    print("✅ Pinecone ingestion completed.")
+    # Embeddings
+    embeddings = get_embeddings(provider)
+
+    index = Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+    spec = _prepare_index(index, embeddings, reindex, partitioned)
+
+    # 5️⃣ 업로드
+    upload_documents(index, embeddings, docs, partitioned, corpus_path)
+
+    partitions = {name: len(group) for name, group in split_by_partition(docs).items()} if partitioned else None
+
+    # 서빙 시 get_vectorstore 가 이 spec 과 현재 설정을 비교
+    write_spec({
+        **spec,
+        "index": PINECONE_INDEX,
+        "count": len(docs),
+        "partitions": partitions,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    log.info("ingest.pinecone_done", extra={"fields": {
+        "count": len(docs), "index": PINECONE_INDEX, "mode": VECTOR_BACKEND,
+        "embedding": spec, "partitions": partitions,
+    }})
+
+
+# =========================
+# 4️⃣ CSV → 로컬 인덱스 (벤치마크 / 오프라인용)
+# =========================
+
+def ingest_local(
+    csv_path="/home/ys0660/happycat/data/data.csv",
+    index_dir=LOCAL_INDEX_DIR,
+    embeddings=None,
+    feature_dir=FEATURE_DIR,
+    corpus_path=CORPUS_PATH,
+    provider=None,
+    partitioned=PARTITION_BY_ANIMAL,
+    docs=None,
+):
+    """
+    partitioned: index_dir/{dog,cat,unknown} 에 종별 인덱스를 따로 저장
+    (index_dir/meta.json 의 partitions 로 서빙 / 벤치마크가 자동 인식)
+    docs: 이미 로드 / corpus·feature 생성까지 끝난 문서 (reindex.py), 없으면 csv_path 에서 로드
+    """
+    from rag.local_index import LocalVectorStore
+    from rag.partitions import load_local
+
+    if docs is None:
+        docs = load_documents(csv_path)
+        build_features(docs, feature_dir)
+        build_corpus(docs, corpus_path)
+
+    embeddings = embeddings or get_embeddings(provider)
+    spec = embedding_spec(embeddings)
+
+    if not partitioned:
+        store = LocalVectorStore.from_documents(docs, embeddings)
+        store.save(index_dir, meta=spec)
+        log.info("ingest.local_done", extra={"fields": {"count": len(store), "index_dir": index_dir}})
+        return store
+
+    sizes = {}
+    for name, group in split_by_partition(docs).items():
+        sizes[name] = len(group)
+        if group:
+            LocalVectorStore.from_documents(group, embeddings).save(os.path.join(index_dir, name), meta=spec)
+
+    meta = {**spec, "count": len(docs), "partitions": sizes}
+    write_spec(meta, os.path.join(index_dir, "meta.json"))
+
+    log.info("ingest.local_done", extra={"fields": {"count": len(docs), "index_dir": index_dir, "partitions": sizes}})
+    return load_local(index_dir, embeddings, meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetDoctor ingest")
+    parser.add_argument("--csv", default="/home/ys0660/happycat/data/data.csv")
+    parser.add_argument("--provider", choices=["openai", "local"], default=None,
+                        help="임베딩 provider (기본 EMBEDDING_PROVIDER)")
+    parser.add_argument("--reindex", action="store_true",
+                        help="기존 벡터 삭제 후 현재 임베딩으로 다시 색인")
+    parser.add_argument("--partitioned", action="store_true", default=PARTITION_BY_ANIMAL,
+                        help="dog / cat / unknown 파티션으로 나눠 색인 (기본 PARTITION_BY_ANIMAL)")
+    parser.add_argument("--local", metavar="INDEX_DIR", nargs="?", const=LOCAL_INDEX_DIR, default=None,
+                        help="Pinecone 대신 로컬 인덱스 생성")
+    args = parser.parse_args()
+
+    if args.local:
+        ingest_local(args.csv, index_dir=args.local, provider=args.provider, partitioned=args.partitioned)
+    else:
+        ingest_csv(args.csv, provider=args.provider, reindex=args.reindex, partitioned=args.partitioned)
 
 
 if __name__ == "__main__":
-    ingest_csv()
+    main()
@@ -1,15 +1,69 @@
 # api.py or main.py (FastAPI 부분)
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import List, Dict, Any
+import json
+import threading
+import uuid
 
+import anyio.to_thread
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+from api.admission import AdmissionController, AdmissionRejected
+from api.cancellation import CancelRegistry, DuplicateRequestId, RequestCancelled
+from config import (
+    ADMISSION_DEADLINE_S,
+    BATCH_MAX_CONCURRENCY,
+    DIAG_ENABLED,
+    DIAG_TOKEN,
+    MAX_INFLIGHT,
+    MAX_QUEUE,
+    THREADPOOL_HEADROOM,
+)
+from batch import iter_answers
 from graph import build_graph
+from observe import metrics
+from observe.capture import capture_request
+from observe.log import get_logger, request_context
+from observe.profiler import profile_request
+from observe.tracing import start_trace
+from safety.triage import get_enrichment
 
 app = FastAPI()
 
 graph = build_graph()
 
+admission = AdmissionController()
+
+cancellations = CancelRegistry()
+
+log = get_logger("api")
+
+# 관리자 진단 endpoint (기본 꺼짐, api/diagnostics.py)
+if DIAG_ENABLED:
+    if DIAG_TOKEN:
+        from api.diagnostics import router as diag_router
+        app.include_router(diag_router)
+    else:
+        log.warning("diag.disabled_no_token")
+
+
+@app.on_event("startup")
+def size_threadpool():
+    """
+    admission 대기도 threadpool thread 안에서 일어남 (기본 40 = 8 + 32 이면 다른 endpoint 가 굶음)
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, MAX_INFLIGHT + MAX_QUEUE + THREADPOOL_HEADROOM)
+    log.info("threadpool.sized", extra={"fields": {"threads": limiter.total_tokens}})
+
+
+def _caller(request: Request) -> str:
+    # 취소 권한 단위 (인증이 없으므로 호출자 주소)
+    return request.client.host if request.client else ""
+
 
 # =========================
 # Request / Response Schema
@@ -29,6 +83,21 @@ class ChatResponse(BaseModel):
     answer: str
     confidence: str
     evidence_urls: List[str]
+    request_id: Optional[str] = None
+    emergency: bool = False
+    timings: Optional[Dict[str, Dict[str, float]]] = None
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    question: str
+    history: List[HistoryTurn] = []
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: int = Field(min(4, BATCH_MAX_CONCURRENCY), ge=1, le=BATCH_MAX_CONCURRENCY)
+    judge: bool = True
 
 
 # =========================
@@ -36,25 +105,196 @@ class ChatResponse(BaseModel):
 # =========================
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
+def chat(
+    req: ChatRequest,
+    request: Request,
+    x_priority: str = Header("interactive"),
+    x_deadline_ms: Optional[int] = Header(None),
+    x_debug_timings: Optional[str] = Header(None),
+    x_debug_log: Optional[str] = Header(None),
+    x_request_id: Optional[str] = Header(None),
+):
     """
     멀티턴 RAG chat endpoint
+    - X-Priority: interactive(기본) | batch
+    - X-Deadline-Ms: 이 시간 안에 처리 시작이 어려우면 429
+    - X-Debug-Timings: 1 이면 node별 wall / cpu 시간 포함
+    - X-Debug-Log: 1 이면 이 요청의 상세 debug payload 로그 기록 (샘플링 무시)
+    - X-Request-Id: 클라이언트 지정 id (DELETE /chat/{id} 로 취소할 때 사용, 추측 불가능한 값 권장)
+      같은 호출자 주소의 요청만 취소 가능, 진행 중인 id 재사용은 409
     """
 
-    # 🔹 LangGraph 초기 state
-    state = {
-        "question": req.question,
-        "history": [
-            {"user": h.user, "assistant": h.assistant}
-            for h in req.history
-        ],
-    }
+    request_id = x_request_id or uuid.uuid4().hex
+    deadline_s = x_deadline_ms / 1000 if x_deadline_ms else ADMISSION_DEADLINE_S
 
-    # 🔹 Graph 실행
-    result = graph.invoke(state)
+    trace = start_trace(
+        request_id,
+        "chat",
+        input=req.question,
+        priority=x_priority,
+        turns=len(req.history),
+    )
+
+    try:
+        # 취소 flag 는 admission 대기 전에 등록 → 대기열에 있는 요청도 DELETE 로 빠짐
+        with cancellations.track(request_id, _caller(request)) as check_cancel, \
+                admission.admit(x_priority, deadline_s, check_cancel) as degraded:
+            # 🔹 LangGraph 초기 state
+            state = {
+                "request_id": request_id,
+                "question": req.question,
+                "history": [
+                    {"user": h.user, "assistant": h.assistant}
+                    for h in req.history
+                ],
+                "degraded": degraded,
+                "_trace": trace,
+            }
+
+            # 🔹 Graph 실행
+            with request_context(request_id, force_debug=x_debug_log == "1"), \
+                    capture_request(request_id, req.question, state["history"]), \
+                    profile_request(request_id):
+                state["_cancel"] = check_cancel
+                result = graph.invoke(state)
+
+    except DuplicateRequestId:
+        if trace is not None:
+            trace.finish(metadata={"rejected": "duplicate_request_id"})
+        raise HTTPException(status_code=409, detail="request id already in progress")
+    except RequestCancelled:
+        if trace is not None:
+            trace.finish(metadata={"cancelled": True})
+        raise HTTPException(status_code=499, detail="request cancelled")
+    except AdmissionRejected as e:
+        if trace is not None:
+            trace.finish(metadata={"rejected": e.reason})
+        raise HTTPException(
+            status_code=429,
+            detail=f"server busy ({e.reason})",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        if trace is not None:
+            trace.finish(metadata={"error": str(e)})
+        raise
+
+    if trace is not None:
+        trace.finish(
+            output=result.get("answer", ""),
+            metadata={
+                "confidence": result.get("confidence", ""),
+                "emergency_type": result.get("emergency_type"),
+                "query_type": result.get("query_type"),
+                "gen_tier": (result.get("generation") or {}).get("tier"),
+                "degraded": degraded,
+            },
+        )
 
     return {
         "answer": result.get("answer", ""),
         "confidence": result.get("confidence", ""),
         "evidence_urls": result.get("evidence_urls", []),
+        "request_id": request_id,
+        "emergency": bool(result.get("emergency_type")),
+        "timings": result.get("timings") if x_debug_timings == "1" else None,
     }
+
+
+@app.post("/chat/batch")
+def chat_batch(
+    req: BatchRequest,
+    x_deadline_ms: Optional[int] = Header(None),
+):
+    """
+    대량 질문 처리 (throughput 우선)
+    - batch 우선순위로 슬롯 1개를 점유
+    - 결과는 완료되는 대로 JSONL(NDJSON) 스트리밍
+    """
+    items = [
+        {
+            "id": it.id or str(i),
+            "question": it.question,
+            "history": [
+                {"user": h.user, "assistant": h.assistant}
+                for h in it.history
+            ],
+        }
+        for i, it in enumerate(req.items)
+    ]
+
+    deadline_s = x_deadline_ms / 1000 if x_deadline_ms else ADMISSION_DEADLINE_S
+    try:
+        # 동시에 도는 pipeline 수만큼 슬롯 점유 (MAX_INFLIGHT 전역 상한 유지)
+        degraded, started = admission.acquire("batch", deadline_s, slots=req.concurrency)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"server busy ({e.reason})",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    records = iter_answers(
+        items,
+        concurrency=req.concurrency,
+        judge=req.judge and not degraded,
+    )
+    released = threading.Lock()
+
+    def finish():
+        # 스트림 종료 / 연결 끊김 / 응답 미전송 어느 경우든 1회만: 남은 pipeline 취소 → 슬롯 반환
+        if not released.acquire(blocking=False):
+            return
+        try:
+            records.close()
+        finally:
+            admission.release(started, record=False, slots=req.concurrency)
+
+    def stream():
+        try:
+            for record in records:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            finish()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(finish),
+    )
+
+
+@app.delete("/chat/{request_id}")
+def cancel_chat(request_id: str, request: Request):
+    """
+    진행 중인 /chat 요청 취소 (admission 대기 중이면 즉시, 실행 중이면 다음 node 경계에서 중단)
+    같은 호출자가 보낸 요청만 취소
+    """
+    cancelled = cancellations.cancel(request_id, _caller(request))
+    if cancelled:
+        admission.wake()
+    return {"request_id": request_id, "cancelled": cancelled}
+
+
+@app.get("/chat/{request_id}/evidence")
+def chat_evidence(request_id: str):
+    """
+    응급 fast path 응답 이후 백그라운드로 보강된 근거 조회
+    (EMERGENCY_ENRICH=1 인 경우에만 생성됨)
+    """
+    enrichment = get_enrichment(request_id)
+    if enrichment is None:
+        raise HTTPException(status_code=404, detail="unknown request_id")
+    return enrichment
+
+
+# =========================
+# Metrics Endpoint
+# =========================
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    프로세스 내 counter / gauge / latency 스냅샷
+    """
+    return metrics.snapshot()
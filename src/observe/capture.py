@@ -0,0 +1,231 @@
+# 트래픽 capture / replay 지원
+# - /chat 경계에서 요청 1건 = JSONL 1줄 (민감정보 마스킹된 입력 + node별 중간 결과 요약 + LLM 출력)
+# - LLM 호출 지점은 llm_call()로 감싸서 capture 중이면 출력 기록,
+#   replay 중이면 같은 입력(prompt hash)에 대해 기록된 출력 재사용
+# - 캡처 / 재생이 모두 꺼져 있으면 contextvar 조회 1회 비용만 발생
+
+import contextvars
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import CAPTURE_PATH, CAPTURE_SAMPLE_RATE
+from observe import metrics
+
+
+# =========================
+# 1️⃣ 마스킹 / 요약
+# =========================
+
+_PII_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}"), "<phone>"),
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"\d{6,}"), "<num>"),
+]
+
+
+def sanitize(text: str) -> str:
+    for pattern, repl in _PII_PATTERNS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+# corpus 에서 온 값 (문서 id / 출처 URL) → 마스킹하지 않음 (사용자 입력이 아니고, 가리면 replay 비교 불가)
+_CORPUS_REF_KEYS = {"docs", "citations", "evidence_urls"}
+
+
+def _sanitize_value(value: Any) -> Any:
+    """
+    node 출력 요약 안의 모든 문자열 마스킹 (answer, evaluation reason, guardrail hit 등)
+    """
+    if isinstance(value, str):
+        return sanitize(value)
+    if isinstance(value, (list, tuple)):
+        return [_sanitize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _sanitize_value(v) for k, v in value.items()}
+    return value
+
+
+def _doc_ref(doc) -> List[Any]:
+    meta = doc.metadata
+    score = meta.get("rerank_score")
+    return [meta.get("doc_id") or meta.get("url"), round(score, 4) if score is not None else None]
+
+
+# node 결과 중 replay 비교에 쓰는 key (문서 본문 등은 id로 축약)
+SUMMARIZERS: Dict[str, Callable[[Any], Any]] = {
+    "emergency_type": lambda v: v,
+    "query_type": lambda v: v,
+    "signals": lambda v: {k: list(x) if isinstance(x, tuple) else x for k, x in (v or {}).items()},
+    "docs": lambda v: [_doc_ref(d) for d in v or []],
+    "citations": lambda v: [c.get("source_url") for c in v or []],
+    "generation": lambda v: {k: v.get(k) for k in ("tier", "model", "reason")} if v else v,
+    "answer": lambda v: v,
+    "guardrail_hits": lambda v: v,
+    "evaluation": lambda v: v,
+    "confidence": lambda v: v,
+    "evidence_urls": lambda v: v,
+}
+
+
+def summarize(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    node가 바꾼 key만 요약
+    """
+    return {
+        key: fn(after[key])
+        for key, fn in SUMMARIZERS.items()
+        if key in after and after[key] is not before.get(key)
+    }
+
+
+def prompt_key(kind: str, prompt: str) -> str:
+    return hashlib.sha1(f"{kind}\n{prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+# =========================
+# 2️⃣ 요청 단위 기록
+# =========================
+
+class CaptureRecord:
+
+    def __init__(self, request_id: str, question: str, history: List[Dict[str, str]], replay: Dict[str, str] = None):
+        self.request_id = request_id
+        self.question = sanitize(question)
+        self.history = [
+            {"user": sanitize(h["user"]), "assistant": sanitize(h["assistant"])}
+            for h in history or []
+        ]
+        self.started_at = time.time()
+        self.nodes: List[Dict[str, Any]] = []
+        self.llm: List[Dict[str, Any]] = []
+        self.replay = replay
+        self.replay_hits = 0
+        self.replay_misses = 0
+
+    def record_node(self, name: str, before: Dict[str, Any], after: Dict[str, Any], wall: float) -> None:
+        self.nodes.append({"node": name, "wall": round(wall, 4), "out": summarize(before, after)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "ts": round(self.started_at, 3),
+            "question": self.question,
+            "history": self.history,
+            "nodes": [
+                {**n, "out": {
+                    k: v if k in _CORPUS_REF_KEYS else _sanitize_value(v)
+                    for k, v in n["out"].items()
+                }}
+                for n in self.nodes
+            ],
+            "llm": [{**c, "output": sanitize(c["output"])} for c in self.llm],
+            "total_wall": round(time.time() - self.started_at, 4),
+        }
+
+
+_current: contextvars.ContextVar[Optional[CaptureRecord]] = contextvars.ContextVar("capture", default=None)
+
+
+def current() -> Optional[CaptureRecord]:
+    return _current.get()
+
+
+def llm_call(
+    kind: str,
+    prompt: str,
+    call: Callable[[], str],
+    on_reuse: Callable[[str], str] = None,
+) -> str:
+    """
+    LLM 호출 hook
+    - replay 중이고 같은 (kind, prompt) 출력이 기록돼 있으면 재사용 (on_reuse로 후처리)
+    - capture 중이면 출력 기록
+    """
+    record = _current.get()
+    if record is None:
+        return call()
+
+    key = prompt_key(kind, prompt)
+    started = time.perf_counter()
+
+    if record.replay is not None and key in record.replay:
+        output = record.replay[key]
+        if on_reuse is not None:
+            output = on_reuse(output)
+        record.replay_hits += 1
+        reused = True
+    else:
+        output = call()
+        if record.replay is not None:
+            record.replay_misses += 1
+        reused = False
+
+    record.llm.append({
+        "kind": kind,
+        "key": key,
+        "output": output,
+        "wall": round(time.perf_counter() - started, 4),
+        **({"reused": True} if reused else {}),
+    })
+    return output
+
+
+def record_node(name: str, before: Dict[str, Any], after: Dict[str, Any], wall: float) -> None:
+    record = _current.get()
+    if record is not None:
+        record.record_node(name, before, after, wall)
+
+
+# =========================
+# 3️⃣ 파일 기록
+# =========================
+
+_write_lock = threading.Lock()
+
+
+def _append(path: str, record: CaptureRecord) -> None:
+    line = json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def capture_request(
+    request_id: str,
+    question: str,
+    history: List[Dict[str, str]] = None,
+    path: Optional[str] = CAPTURE_PATH,
+    sample_rate: float = CAPTURE_SAMPLE_RATE,
+    replay: Dict[str, str] = None,
+    force: bool = False,
+) -> Iterator[Optional[CaptureRecord]]:
+    """
+    with capture_request(request_id, question, history) as record:
+        result = graph.invoke(state)
+    path가 없으면 메모리 기록만 (replay 도구용), 예외로 끝난 요청은 기록하지 않음
+    """
+    if not force and (not path or random.random() >= sample_rate):
+        yield None
+        return
+
+    record = CaptureRecord(request_id, question, history, replay=replay)
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+    if path:
+        _append(path, record)
+        metrics.incr("capture_written")
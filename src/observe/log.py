@@ -0,0 +1,171 @@
+# 구조화(JSON) 로깅 + 요청 단위 샘플링
+# - 로그 호출 스레드는 queue에 넣기만 하고, 실제 출력은 QueueListener 스레드가 담당 (non-blocking)
+# - 단계별 로그 레벨: LOG_LEVEL (기본) + LOG_LEVELS="retrieve=DEBUG,ingest=INFO"
+# - 상세 debug payload는 1/LOG_SAMPLE_RATE 요청 또는 X-Debug-Log: 1 요청에서만 생성 (lazy)
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config import LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE_RATE
+
+
+ROOT_LOGGER = "petdoctor"
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("log_sampled", default=False)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# =========================
+# 1️⃣ Formatter / Filter
+# =========================
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+
+        payload.update(getattr(record, "fields", None) or {})
+
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """
+    호출 스레드에서 request_id를 record에 고정 (listener 스레드는 contextvar를 모름)
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler.prepare는 호출 스레드에서 msg를 포맷하므로,
+    포맷은 listener 스레드로 미루고 exc_info만 문자열로 고정
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# =========================
+# 2️⃣ Setup
+# =========================
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            stage, level = part.split("=", 1)
+            levels[stage.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None) -> None:
+    """
+    1회만 설정 (중복 호출 무시)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL.upper())
+    root.propagate = False
+
+    for stage, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(f"{ROOT_LOGGER}.{stage}").setLevel(level)
+
+
+def get_logger(stage: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{stage}")
+
+
+# =========================
+# 3️⃣ 요청 컨텍스트 / 샘플링
+# =========================
+
+@contextmanager
+def request_context(request_id: str, force_debug: bool = False) -> Iterator[bool]:
+    """
+    with request_context(request_id, force_debug=header == "1") as sampled:
+        ...
+    """
+    sampled = force_debug or (LOG_SAMPLE_RATE > 0 and random.random() < 1 / LOG_SAMPLE_RATE)
+
+    rid_token = _request_id.set(request_id)
+    sampled_token = _sampled.set(sampled)
+    try:
+        yield sampled
+    finally:
+        _request_id.reset(rid_token)
+        _sampled.reset(sampled_token)
+
+
+def is_sampled() -> bool:
+    return _sampled.get()
+
+
+def log_fields(logger: logging.Logger, level: int, event: str, **fields) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+def debug_payload(logger: logging.Logger, event: str, build: Callable[[], Dict[str, Any]]) -> None:
+    """
+    상세 payload (문서 본문 등) 기록
+    - 샘플링된 요청이거나 해당 stage가 DEBUG 레벨일 때만 build() 호출 (lazy)
+    - 샘플링된 요청은 logger 레벨과 무관하게 기록
+    """
+    enabled = logger.isEnabledFor(logging.DEBUG)
+    if not (enabled or is_sampled()):
+        return
+
+    record = logger.makeRecord(
+        logger.name, logging.DEBUG, "(payload)", 0, event, None, None,
+        extra={"fields": {**build(), "sampled": not enabled}},
+    )
+    logger.handle(record)
@@ -0,0 +1,105 @@
+# 프로세스 내 경량 메트릭 (counter / gauge / latency)
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+_lock = threading.Lock()
+
+_counters: Dict[str, int] = defaultdict(int)
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, List[float]] = defaultdict(list)
+
+# 타이밍은 최근 N개만 유지 (메모리 상한)
+MAX_SAMPLES = 2048
+
+
+def _key(name: str, labels: Dict[str, str] = None) -> str:
+    if not labels:
+        return name
+    label_text = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{label_text}}}"
+
+
+def incr(name: str, value: int = 1, **labels) -> None:
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """
+    latency 등 분포형 값 기록 (초 단위 권장)
+    """
+    with _lock:
+        samples = _timings[_key(name, labels)]
+        samples.append(value)
+        if len(samples) > MAX_SAMPLES:
+            del samples[: len(samples) - MAX_SAMPLES]
+
+
+@contextmanager
+def stage_timer(
+    stage: str,
+    timings: Dict[str, Dict[str, float]] = None,
+    metric: str = "stage_latency",
+) -> Iterator[None]:
+    """
+    단계별 wall / cpu 시간 측정
+    - 전역 metric(기본 stage_latency) 분포에 기록
+    - timings dict가 주어지면 {stage: {"wall": s, "cpu": s}} 로도 기록
+    cpu는 process_time 기준 (torch 내부 스레드 포함, 동시 요청이 있으면 합산됨)
+    """
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        observe(metric, wall, stage=stage)
+        if timings is not None:
+            timings[stage] = {"wall": wall, "cpu": cpu}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[idx]
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    현재 메트릭 전체를 dict로 반환 (/metrics 응답용)
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {k: sorted(v) for k, v in _timings.items()}
+
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "timings": {
+            k: {
+                "count": len(v),
+                "p50": percentile(v, 0.50),
+                "p95": percentile(v, 0.95),
+                "max": v[-1] if v else 0.0,
+            }
+            for k, v in timings.items()
+        },
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
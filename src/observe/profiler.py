@@ -0,0 +1,505 @@
+# 요청 단위 프로파일링 / 메모리 진단 (관리자용, api/diagnostics.py)
+# - 세션을 시작하면 다음 N개 요청 또는 일정 시간 동안만 프로파일
+#   "cprofile": 요청 스레드 결정적 프로파일 (한 번에 1개 요청만, 나머지는 건너뜀) → 함수별 누적 시간
+#   "sample": 백그라운드 스레드가 주기적으로 스택 수집 → flamegraph용 folded stacks ("a;b;c count")
+# - 세션 동안 node별 wall / cpu 합계, GC 세대별 횟수 / 정지 시간 집계
+# - 메모리: RSS, 로드된 모델별 파라미터 메모리, tracemalloc snapshot (명시적으로 켠 경우만)
+# - 세션이 없으면 profile_request / record_node 는 전역 변수 1회 조회만 함
+
+import contextvars
+import cProfile
+import gc
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import DIAG_MAX_REQUESTS, DIAG_MAX_WINDOW_S
+from observe.log import get_logger
+
+log = get_logger("diag")
+
+
+MODES = ("cprofile", "sample")
+MAX_STACK_DEPTH = 128
+
+# 프로파일 중인 요청 (graph node 가 다른 스레드에서 실행돼도 contextvar 로 전파됨)
+_profiled: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profiled_request", default=None)
+
+
+# =========================
+# 1️⃣ 프로파일 세션
+# =========================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """
+    frame → "root;...;leaf" (flamegraph.pl / speedscope folded 형식)
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+
+    def __init__(
+        self,
+        mode: str,
+        max_requests: int,
+        window_s: float,
+        interval_s: float = 0.005,
+        all_threads: bool = False,
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.max_requests = max_requests
+        self.window_s = window_s
+        self.interval_s = interval_s
+        self.all_threads = all_threads
+
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + window_s
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+        self._lock = threading.Lock()
+        self._claimed = 0
+        self._active: Dict[int, str] = {}        # thread id → request_id
+        self._cprofile_lock = threading.Lock()
+        self._gc_started = 0.0
+
+        self.requests: List[Dict[str, Any]] = []
+        self.skipped = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self.gc: Dict[int, Dict[str, float]] = {}
+
+        self._sampler: Optional[threading.Thread] = None
+
+    # -------------------------
+    # 시작 / 종료
+    # -------------------------
+    def start(self) -> None:
+        gc.callbacks.append(self._on_gc)
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name="diag-sampler", daemon=True)
+            self._sampler.start()
+
+    def finish(self) -> None:
+        if self.done.is_set():
+            return
+        self.done.set()
+        self.finished_at = time.time()
+        try:
+            gc.callbacks.remove(self._on_gc)
+        except ValueError:
+            pass
+        log.info("diag.profile_finished", extra={"fields": {
+            "session": self.id, "mode": self.mode, "requests": len(self.requests),
+        }})
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    # -------------------------
+    # 요청 단위
+    # -------------------------
+    def claim(self) -> bool:
+        with self._lock:
+            if self.done.is_set():
+                return False
+            if self.expired() or self._claimed >= self.max_requests:
+                if not self._active:
+                    self.finish()
+                return False
+            self._claimed += 1
+            return True
+
+    def release(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append(entry)
+            if len(self.requests) >= self.max_requests or (self.expired() and not self._active):
+                self.finish()
+
+    @contextmanager
+    def profile(self, request_id: str) -> Iterator[None]:
+        if self.mode == "cprofile" and not self._cprofile_lock.acquire(blocking=False):
+            # 결정적 프로파일러는 동시에 하나만 (3.12+ 에서는 프로세스 전체에 1개)
+            with self._lock:
+                self.skipped += 1
+            yield
+            return
+
+        try:
+            if not self.claim():
+                yield
+                return
+
+            tid = threading.get_ident()
+            profiler = cProfile.Profile() if self.mode == "cprofile" else None
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            with self._lock:
+                self._active[tid] = request_id
+            token = _profiled.set(request_id)
+
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                yield
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                _profiled.reset(token)
+                with self._lock:
+                    self._active.pop(tid, None)
+                    if profiler is not None:
+                        if self.stats is None:
+                            self.stats = pstats.Stats(profiler)
+                        else:
+                            self.stats.add(profiler)
+                self.release({
+                    "request_id": request_id,
+                    "wall": round(time.perf_counter() - wall0, 4),
+                    "thread_cpu": round(time.thread_time() - cpu0, 4),
+                })
+        finally:
+            if self.mode == "cprofile":
+                self._cprofile_lock.release()
+
+    def record_node(self, name: str, wall: float, cpu: float) -> None:
+        if _profiled.get() is None:
+            return
+        with self._lock:
+            agg = self.nodes.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0})
+            agg["count"] += 1
+            agg["wall"] += wall
+            agg["cpu"] += cpu
+
+    # -------------------------
+    # 샘플러 / GC
+    # -------------------------
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        while not self.done.wait(self.interval_s):
+            if self.expired():
+                with self._lock:
+                    if not self._active:
+                        self.finish()
+                        return
+
+            with self._lock:
+                targets = None if self.all_threads else set(self._active)
+            if targets is not None and not targets:
+                continue
+
+            frames = sys._current_frames()
+            stacks = [
+                fold_stack(frame)
+                for tid, frame in frames.items()
+                if tid != me and (targets is None or tid in targets)
+            ]
+            with self._lock:
+                self.samples += 1
+                self.stacks.update(stacks)
+
+    def _on_gc(self, phase: str, info: Dict[str, Any]) -> None:
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            return
+        pause = time.perf_counter() - self._gc_started
+        agg = self.gc.setdefault(info.get("generation", -1), {"count": 0, "pause_s": 0.0, "max_pause_s": 0.0})
+        agg["count"] += 1
+        agg["pause_s"] += pause
+        agg["max_pause_s"] = max(agg["max_pause_s"], pause)
+
+    # -------------------------
+    # 결과
+    # -------------------------
+    def top_functions(self, limit: int = 40, sort: str = "cumulative") -> List[Dict[str, Any]]:
+        if self.stats is None:
+            return []
+        key = 3 if sort == "cumulative" else 2      # pstats 항목: (cc, nc, tt, ct, callers)
+        rows = sorted(self.stats.stats.items(), key=lambda kv: kv[1][key], reverse=True)[:limit]
+        return [
+            {
+                "func": f"{func} ({os.path.basename(file)}:{line})",
+                "calls": nc,
+                "tottime": round(tt, 4),
+                "cumtime": round(ct, 4),
+            }
+            for (file, line, func), (cc, nc, tt, ct, _) in rows
+        ]
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit: int = 40, sort: str = "cumulative") -> Dict[str, Any]:
+        with self._lock:
+            nodes = {
+                name: {
+                    "count": agg["count"],
+                    "wall_s": round(agg["wall"], 4),
+                    "cpu_s": round(agg["cpu"], 4),
+                    "wait_s": round(max(agg["wall"] - agg["cpu"], 0.0), 4),
+                    "cpu_ratio": round(agg["cpu"] / agg["wall"], 3) if agg["wall"] else None,
+                }
+                for name, agg in self.nodes.items()
+            }
+            result = {
+                "session": self.id,
+                "mode": self.mode,
+                "status": "finished" if self.done.is_set() else "active",
+                "started_at": round(self.started_at, 3),
+                "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 2),
+                "max_requests": self.max_requests,
+                "window_s": self.window_s,
+                "requests": list(self.requests),
+                "skipped": self.skipped,
+                "nodes": nodes,
+                "gc": {str(gen): {k: round(v, 4) for k, v in agg.items()} for gen, agg in self.gc.items()},
+            }
+
+        if self.mode == "cprofile":
+            result["top"] = self.top_functions(limit, sort)
+        else:
+            result["samples"] = self.samples
+            result["interval_ms"] = round(self.interval_s * 1000, 2)
+            result["top_stacks"] = [
+                {"stack": stack, "count": count} for stack, count in self.stacks.most_common(limit)
+            ]
+        return result
+
+
+_session: Optional[ProfileSession] = None
+_session_lock = threading.Lock()
+
+
+def start_profile(
+    mode: str = "sample",
+    requests: int = 20,
+    seconds: float = 60.0,
+    interval_ms: float = 5.0,
+    all_threads: bool = False,
+) -> Dict[str, Any]:
+    """
+    진행 중인 세션이 있으면 ValueError
+    requests / seconds 는 DIAG_MAX_REQUESTS / DIAG_MAX_WINDOW_S 로 상한
+    """
+    global _session
+
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+
+    with _session_lock:
+        if _session is not None and not _session.done.is_set():
+            raise ValueError(f"profile session {_session.id} is still active")
+
+        session = ProfileSession(
+            mode,
+            max_requests=max(1, min(requests, DIAG_MAX_REQUESTS)),
+            window_s=max(1.0, min(seconds, DIAG_MAX_WINDOW_S)),
+            interval_s=max(interval_ms, 1.0) / 1000,
+            all_threads=all_threads,
+        )
+        session.start()
+        _session = session
+
+    log.info("diag.profile_started", extra={"fields": {
+        "session": session.id, "mode": mode,
+        "requests": session.max_requests, "window_s": session.window_s,
+    }})
+    return session.summary()
+
+
+def stop_profile() -> Optional[ProfileSession]:
+    session = _session
+    if session is not None:
+        session.finish()
+    return session
+
+
+def current_session() -> Optional[ProfileSession]:
+    """
+    진행 중이거나 마지막으로 끝난 세션 (시간 초과 확인 포함)
+    """
+    session = _session
+    if session is not None and session.expired() and not session._active:
+        session.finish()
+    return session
+
+
+@contextmanager
+def profile_request(request_id: str) -> Iterator[None]:
+    session = _session
+    if session is None or session.done.is_set():
+        yield
+        return
+    with session.profile(request_id):
+        yield
+
+
+def record_node(name: str, wall: float, cpu: float) -> None:
+    session = _session
+    if session is not None and not session.done.is_set():
+        session.record_node(name, wall, cpu)
+
+
+# =========================
+# 2️⃣ 메모리
+# =========================
+
+# (이름, 모듈, 속성) — import 된 모듈만 확인 (진단 때문에 모델을 새로 로드하지 않음)
+MODEL_SOURCES = [
+    ("sbert", "categorize", "embedder"),
+    ("cross_encoder", "rag.retriever", "cross_encoder"),
+]
+
+
+def _rss() -> Dict[str, Optional[float]]:
+    values = {}
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        values["VmHWM"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        "rss_mb": round(values["VmRSS"], 1) if "VmRSS" in values else None,
+        "peak_rss_mb": round(values["VmHWM"], 1) if "VmHWM" in values else None,
+    }
+
+
+def _torch_module(obj):
+    if hasattr(obj, "parameters"):
+        return obj
+    return getattr(obj, "model", None)
+
+
+def model_memory() -> Dict[str, Dict[str, Any]]:
+    report, seen = {}, set()
+    for name, module_name, attr in MODEL_SOURCES:
+        module = sys.modules.get(module_name)
+        obj = getattr(module, attr, None) if module is not None else None
+        model = _torch_module(obj) if obj is not None else None
+        if model is None or not hasattr(model, "parameters"):
+            report[name] = {"loaded": False}
+            continue
+
+        if id(model) in seen:
+            report[name] = {"loaded": True, "shared": True}
+            continue
+        seen.add(id(model))
+
+        params = sum(p.numel() * p.element_size() for p in model.parameters())
+        buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+        first = next(model.parameters(), None)
+        report[name] = {
+            "loaded": True,
+            "params_mb": round(params / 2**20, 1),
+            "buffers_mb": round(buffers / 2**20, 1),
+            "dtype": str(first.dtype) if first is not None else None,
+            "device": str(first.device) if first is not None else None,
+        }
+    return report
+
+
+def memory_report() -> Dict[str, Any]:
+    return {
+        **_rss(),
+        "models": model_memory(),
+        "gc": {
+            "counts": gc.get_count(),
+            "thresholds": gc.get_threshold(),
+            "stats": gc.get_stats(),
+        },
+        "threads": threading.active_count(),
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+
+
+# =========================
+# 3️⃣ tracemalloc (켠 동안만 할당 추적 비용 발생)
+# =========================
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+def tracemalloc_start(nframes: int = 10) -> Dict[str, Any]:
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+    _baseline = tracemalloc.take_snapshot()
+    log.info("diag.tracemalloc_started", extra={"fields": {"nframes": nframes}})
+    return tracemalloc_status()
+
+
+def tracemalloc_status() -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": True,
+        "traced_mb": round(current / 2**20, 2),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 2**20, 2),
+    }
+
+
+def tracemalloc_snapshot(top: int = 25, key_type: str = "lineno", diff: bool = False) -> Dict[str, Any]:
+    """
+    diff=True 면 tracemalloc_start 시점 대비 증가분 기준
+    """
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not running")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+
+    if diff and _baseline is not None:
+        stats = snapshot.compare_to(_baseline, key_type)[:top]
+        rows = [
+            {
+                "where": str(s.traceback),
+                "size_kb": round(s.size / 1024, 1),
+                "size_diff_kb": round(s.size_diff / 1024, 1),
+                "count_diff": s.count_diff,
+            }
+            for s in stats
+        ]
+    else:
+        stats = snapshot.statistics(key_type)[:top]
+        rows = [
+            {"where": str(s.traceback), "size_kb": round(s.size / 1024, 1), "count": s.count}
+            for s in stats
+        ]
+
+    return {**tracemalloc_status(), "key_type": key_type, "diff": diff, "top": rows}
+
+
+def tracemalloc_stop() -> Dict[str, Any]:
+    global _baseline
+    status = tracemalloc_status()
+    tracemalloc.stop()
+    _baseline = None
+    return status
@@ -1,37 +1,55 @@
+import time
 from typing import Callable, Dict, Any
 
+from observe import capture, profiler
+from observe.metrics import stage_timer
+
 
 def traced_node(name: str, fn: Callable):
     """
-    Wrap a LangGraph node with Langfuse span.
+    Wrap a LangGraph node with a trace span.
+    Node wall / cpu time is always recorded in state["timings"].
+    Spans are only buffered on the request trace (state["_trace"]);
+    export happens in the background (observe/tracing.py).
+    Node output summaries go to the active traffic capture (observe/capture.py),
+    and node wall / cpu to the active profile session (observe/profiler.py).
+    If state["_cancel"] is set, it is called before the node runs
+    and raises when the client has cancelled the request.
     """
 
     def wrapper(state: Dict[str, Any]):
+        cancel = state.get("_cancel")
+        if cancel is not None:
+            cancel()
+
+        timings: Dict[str, Dict[str, float]] = {}
         trace = state.get("_trace")
-        if trace is None:
-            return fn(state)
+        start = time.time()
 
-        span = trace.span(name=name)
         try:
-            result = fn(state)
+            with stage_timer(name, timings, metric="node_latency"):
+                result = fn(state)
+
+        except Exception as e:
+            if trace is not None:
+                trace.record_span(name, start, time.time(), status="error", error=str(e))
+            raise
 
-            # span metadata (optional)
-            span.update(
+        if trace is not None:
+            trace.record_span(
+                name,
+                start,
+                time.time(),
                 metadata={
                     "input_keys": list(state.keys()),
                     "output_keys": list(result.keys()),
-                }
+                    "cpu_s": round(timings[name]["cpu"], 4),
+                },
             )
-            return result
 
-        except Exception as e:
-            span.update(
-                status="error",
-                error=str(e),
-            )
-            raise
+        capture.record_node(name, state, result, timings[name]["wall"])
+        profiler.record_node(name, timings[name]["wall"], timings[name]["cpu"])
 
-        finally:
-            span.end()
+        return {**result, "timings": {**state.get("timings", {}), **timings}}
 
     return wrapper
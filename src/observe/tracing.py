@@ -0,0 +1,233 @@
+# 요청 단위 trace + 비동기 batch export
+# - API 경계에서 trace 생성 (head-based sampling, 미샘플 요청은 None → 비용 0)
+# - node span은 요청 객체 안 메모리 버퍼에만 기록 (네트워크 호출 없음)
+# - 요청 종료 시 trace 1건을 bounded queue에 put_nowait (가득 차면 drop)
+# - 백그라운드 exporter 스레드가 batch 단위로 backend(Langfuse / HTTP collector)에 전송
+
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from config import (
+    TRACE_BACKEND,
+    TRACE_SAMPLE_RATE,
+    TRACE_COLLECTOR_URL,
+    TRACE_QUEUE_SIZE,
+    TRACE_BATCH_SIZE,
+    TRACE_FLUSH_INTERVAL_S,
+)
+from observe import metrics
+
+
+# =========================
+# 1️⃣ 요청 trace (메모리 버퍼)
+# =========================
+
+class RequestTrace:
+
+    def __init__(self, trace_id: str, name: str, input: Any = None, metadata: Dict[str, Any] = None):
+        self.trace_id = trace_id
+        self.name = name
+        self.input = input
+        self.metadata = metadata or {}
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+
+    def record_span(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        status: str = "ok",
+        error: str = None,
+        metadata: Dict[str, Any] = None,
+    ) -> None:
+        self.spans.append({
+            "name": name,
+            "start": start,
+            "end": end,
+            "status": status,
+            "error": error,
+            "metadata": metadata or {},
+        })
+
+    def finish(self, output: Any = None, metadata: Dict[str, Any] = None) -> None:
+        get_exporter().submit({
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.started_at,
+            "end": time.time(),
+            "input": self.input,
+            "output": output,
+            "metadata": {**self.metadata, **(metadata or {})},
+            "spans": self.spans,
+        })
+
+
+def start_trace(trace_id: str, name: str, input: Any = None, **metadata) -> Optional[RequestTrace]:
+    """
+    head-based sampling: 여기서 버려진 요청은 이후 tracing 비용 없음
+    """
+    if TRACE_BACKEND == "none" or random.random() >= TRACE_SAMPLE_RATE:
+        return None
+    metrics.incr("trace_sampled")
+    return RequestTrace(trace_id, name, input=input, metadata=metadata)
+
+
+# =========================
+# 2️⃣ Sinks
+# =========================
+
+def _ts(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def langfuse_sink(batch: List[Dict[str, Any]]) -> None:
+    from observe.langfuse_client import langfuse
+
+    for t in batch:
+        trace = langfuse.trace(
+            id=t["trace_id"],
+            name=t["name"],
+            input=t["input"],
+            output=t["output"],
+            metadata=t["metadata"],
+            timestamp=_ts(t["start"]),
+        )
+        for sp in t["spans"]:
+            trace.span(
+                name=sp["name"],
+                start_time=_ts(sp["start"]),
+                end_time=_ts(sp["end"]),
+                metadata=sp["metadata"],
+                level="ERROR" if sp["status"] == "error" else "DEFAULT",
+                status_message=sp["error"],
+            )
+    langfuse.flush()
+
+
+def collector_sink(batch: List[Dict[str, Any]], url: str = TRACE_COLLECTOR_URL, timeout: float = 2.0) -> None:
+    body = json.dumps({"traces": batch}, ensure_ascii=False, default=str).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        resp.read()
+
+
+SINKS: Dict[str, Callable[[List[Dict[str, Any]]], None]] = {
+    "langfuse": langfuse_sink,
+    "collector": collector_sink,
+}
+
+
+# =========================
+# 3️⃣ Background exporter
+# =========================
+
+class TraceExporter:
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], None],
+        max_queue: int = TRACE_QUEUE_SIZE,
+        batch_size: int = TRACE_BATCH_SIZE,
+        flush_interval: float = TRACE_FLUSH_INTERVAL_S,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """
+        요청 스레드에서 호출 — 절대 block 하지 않음
+        """
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            metrics.incr("trace_dropped", reason="queue_full")
+            return False
+        metrics.set_gauge("trace_queue_depth", self._queue.qsize())
+        return True
+
+    def _drain(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _collect(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        batch_size 개가 모이거나 첫 trace 이후 flush_interval 이 지날 때까지 모음
+        (_drain 만 쓰면 저부하에서 trace 1건마다 export → backend 호출 폭증)
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            self.sink(batch)
+            metrics.incr("trace_exported", value=len(batch))
+        except Exception:
+            # backend 장애 시 재시도하지 않고 버림 (요청 경로 보호)
+            metrics.incr("trace_dropped", value=len(batch), reason="export_error")
+        metrics.observe("trace_export_latency", time.perf_counter() - started)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._export(self._collect(first))
+            metrics.set_gauge("trace_queue_depth", self._queue.qsize())
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        종료 시 남은 trace 전송 (best-effort, timeout 내)
+        """
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                first = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._export(self._drain(first))
+
+
+_exporter: Optional[TraceExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> TraceExporter:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = TraceExporter(SINKS[TRACE_BACKEND])
+                atexit.register(_exporter.flush)
+    return _exporter
@@ -3,13 +3,17 @@
 from typing import Optional
 
 def confidence_level(
-    medical_score,
-    evidence_score,
+    medical_score: Optional[int],
+    evidence_score: Optional[int],
     has_evidence: bool,
 ):
     if not has_evidence:
         return "중"   # 또는 "하"
 
+    # judge 파싱 실패 (점수 없음) → 보수적으로 "하"
+    if medical_score is None or evidence_score is None:
+        return "하"
+
     if medical_score >= 4 and evidence_score >= 4:
         return "상"
     elif medical_score >= 3 and evidence_score >= 3:
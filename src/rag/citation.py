@@ -1,10 +1,170 @@
 # 근거 문서 인용정리
-def build_citations(docs):
+# - 근접 중복 문서 제거 (ingest 시 저장한 simhash)
+# - MMR로 관련성 + 다양성 균형 잡힌 근거 선택
+# - 답변 중 질문과 가장 관련 있는 구간만 발췌 (프롬프트 절약)
+# - feature store(rag/features.py)가 있으면 답변 본문 / simhash / cluster id는 조회만
+import re
+from typing import List, Tuple
+
+from config import (
+    CITATION_K,
+    CITATION_MAX_CHARS,
+    CITATION_MMR_LAMBDA,
+    CITATION_DUP_HAMMING,
+)
+from rag.dedup import doc_simhash, hamming, similarity
+from rag.features import feature_store_for, get_feature_store
+
+QUESTION_MAX_CHARS = 150
+
+_SENT_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+# =========================
+# 1️⃣ 발췌 (answer span)
+# =========================
+
+def _bigrams(text: str) -> set:
+    text = re.sub(r"\s+", "", text)
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def split_qa(doc) -> Tuple[str, str]:
+    content = doc.page_content
+    if "\nA: " in content:
+        q, a = content.split("\nA: ", 1)
+        return q[3:] if q.startswith("Q: ") else q, a
+    return doc.metadata.get("question", ""), content
+
+
+def extract_excerpt(answer: str, query: str, max_chars: int = CITATION_MAX_CHARS) -> str:
+    """
+    질문과 bigram이 가장 많이 겹치는 문장을 중심으로
+    max_chars 안에서 앞뒤 문장을 붙여 연속 구간을 만든다
+    """
+    if len(answer) <= max_chars:
+        return answer
+
+    sentences = [s.strip() for s in _SENT_RE.split(answer) if s.strip()]
+    if not sentences:
+        return answer[:max_chars]
+
+    query_grams = _bigrams(query)
+    scores = [
+        len(query_grams & _bigrams(s)) / (len(s) ** 0.5 or 1)
+        for s in sentences
+    ]
+    best = max(range(len(sentences)), key=scores.__getitem__)
+
+    lo, hi = best, best
+    length = len(sentences[best])
+    while True:
+        grew = False
+        for idx in (hi + 1, lo - 1):
+            if 0 <= idx < len(sentences) and length + len(sentences[idx]) + 1 <= max_chars:
+                if idx > hi:
+                    hi = idx
+                else:
+                    lo = idx
+                length += len(sentences[idx]) + 1
+                grew = True
+        if not grew:
+            break
+
+    excerpt = " ".join(sentences[lo:hi + 1])
+    return excerpt[:max_chars]
+
+
+# =========================
+# 2️⃣ 중복 제거 + MMR
+# =========================
+
+def _store_for(docs: list):
+    """
+    검색 (retrieve_docs) 이 기록한 index_version 의 feature store
+    기록이 없으면 현재 서빙 버전 — 검색 후 버전이 전환돼도 row 조회가 다른 버전을 보지 않도록
+    """
+    if docs and "index_version" in docs[0].metadata:
+        return feature_store_for(docs[0].metadata["index_version"])
+    return get_feature_store()
+
+
+def select_diverse(
+    docs: list,
+    k: int = CITATION_K,
+    mmr_lambda: float = CITATION_MMR_LAMBDA,
+    dup_hamming: int = CITATION_DUP_HAMMING,
+    store=None,
+) -> list:
+    """
+    docs: rerank 순으로 정렬된 후보 (metadata["rerank_score"] 사용)
+    store: feature store (없으면 docs 의 index_version 기준)
+    """
+    if len(docs) <= 1:
+        return docs[:k]
+
+    store = store or _store_for(docs)
+    rows = store.rows(docs) if store is not None else [None] * len(docs)
+    hashes = [
+        store.simhash(r) if r is not None else doc_simhash(d)
+        for d, r in zip(docs, rows)
+    ]
+    # ingest 시 묶인 cluster (없으면 문서마다 고유값 → hamming 비교만 적용)
+    clusters = [
+        ("c", store.cluster(r)) if r is not None else ("d", i)
+        for i, r in enumerate(rows)
+    ]
+
+    # 관련성: rerank 점수 min-max 정규화 (없으면 순위 기반)
+    raw = [d.metadata.get("rerank_score") for d in docs]
+    if all(r is not None for r in raw):
+        lo, hi = min(raw), max(raw)
+        relevance = [(r - lo) / (hi - lo) if hi > lo else 1.0 for r in raw]
+    else:
+        relevance = [1.0 - i / len(docs) for i in range(len(docs))]
+
+    selected: List[int] = []
+    candidates = list(range(len(docs)))
+
+    while candidates and len(selected) < k:
+        best, best_score = None, None
+        for i in candidates:
+            if any(
+                clusters[i] == clusters[j] or hamming(hashes[i], hashes[j]) <= dup_hamming
+                for j in selected
+            ):
+                continue
+            redundancy = max((similarity(hashes[i], hashes[j]) for j in selected), default=0.0)
+            score = mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+
+        if best is None:
+            break   # 남은 후보가 모두 중복
+        selected.append(best)
+        candidates.remove(best)
+
+    return [docs[i] for i in selected]
+
+
+# =========================
+# 3️⃣ Citation 구성
+# =========================
+
+def build_citations(docs, query: str = "", k: int = CITATION_K):
+    store = _store_for(docs)
     citations = []
-    for i, doc in enumerate(docs):
+    for i, doc in enumerate(select_diverse(docs, k=k, store=store)):
+        row = store.row(doc) if store is not None else None
+        if row is not None:
+            question, answer = doc.metadata.get("question", ""), store.answer(row)
+        else:
+            question, answer = split_qa(doc)
+        excerpt = extract_excerpt(answer, query) if query else answer[:CITATION_MAX_CHARS]
+
         citations.append({
             "id": i,
-            "content": doc.page_content,
+            "content": f"Q: {question[:QUESTION_MAX_CHARS]}\nA: {excerpt}",
 
             "source_question": doc.metadata.get("question", "unknown"),
 
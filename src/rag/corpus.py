@@ -0,0 +1,190 @@
+# 로컬 columnar 문서 저장소 (Arrow IPC, memory-mapped)
+# - 문서 본문 / metadata는 doc_id 기준으로 여기에만 저장
+# - 벡터 인덱스(Pinecone)는 id + filter용 metadata만 보관 → 검색 결과는 id / score만 수신
+# - 검색 후 필요한 행만 mmap에서 읽어 Document로 hydrate
+# ingest / retriever / batch 공용
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+from langchain_core.documents import Document
+
+from config import CORPUS_PATH
+from rag.versions import serving_version, version_paths
+
+
+CORPUS_SCHEMA = pa.schema([
+    ("doc_id", pa.string()),
+    ("question", pa.string()),
+    ("title", pa.string()),
+    ("answer", pa.string()),
+    ("url", pa.string()),
+    ("answer_type", pa.string()),
+    ("animal", pa.string()),
+    ("symptom_category", pa.string()),
+    ("symptom_confidence", pa.float32()),
+    ("simhash", pa.string()),
+])
+
+# Pinecone에 남기는 metadata (filter 용도만)
+FILTER_FIELDS = ("animal", "symptom_category", "symptom_confidence", "answer_type")
+
+
+def record_from_document(doc: Document) -> Dict[str, Any]:
+    answer = doc.page_content.split("\nA: ", 1)[1] if "\nA: " in doc.page_content else doc.page_content
+    return {
+        **{name: doc.metadata.get(name) for name in CORPUS_SCHEMA.names},
+        "answer": answer,
+    }
+
+
+def document_from_record(record: Dict[str, Any]) -> Document:
+    metadata = {k: v for k, v in record.items() if k != "answer"}
+    return Document(
+        page_content=f"Q: {record['question']}\nA: {record['answer']}",
+        metadata=metadata,
+    )
+
+
+# =========================
+# 1️⃣ 저장소
+# =========================
+
+class CorpusStore:
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self._rows = {doc_id: i for i, doc_id in enumerate(table.column("doc_id").to_pylist())}
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @staticmethod
+    def write(docs: Iterable[Document], path: str = CORPUS_PATH, batch_size: int = 1024) -> int:
+        """
+        record batch 단위로 스트리밍 기록 (전체 DataFrame을 만들지 않음)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+
+        count, buffer = 0, []
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, CORPUS_SCHEMA) as writer:
+            for doc in docs:
+                buffer.append(record_from_document(doc))
+                if len(buffer) >= batch_size:
+                    writer.write_batch(pa.RecordBatch.from_pylist(buffer, schema=CORPUS_SCHEMA))
+                    count += len(buffer)
+                    buffer = []
+            if buffer:
+                writer.write_batch(pa.RecordBatch.from_pylist(buffer, schema=CORPUS_SCHEMA))
+                count += len(buffer)
+
+        # 서빙 중인 프로세스가 읽는 파일을 덮어쓰지 않도록 rename으로 교체
+        os.replace(tmp_path, path)
+        return count
+
+    @classmethod
+    def load(cls, path: str = CORPUS_PATH) -> "CorpusStore":
+        # memory_map + IPC file → 버퍼 복사 없이 table 구성
+        source = pa.memory_map(path, "r")
+        return cls(pa.ipc.open_file(source).read_all())
+
+    # -------------------------
+    # 조회
+    # -------------------------
+    def rows(self, ids: Iterable[str]) -> List[Optional[int]]:
+        return [self._rows.get(doc_id) for doc_id in ids]
+
+    def documents(self, ids: List[str]) -> List[Optional[Document]]:
+        """
+        요청된 id 행만 읽어 Document 생성 (없는 id는 None)
+        """
+        rows = self.rows(ids)
+        found = [r for r in rows if r is not None]
+        if not found:
+            return [None] * len(rows)
+
+        records = iter(self.table.take(found).to_pylist())
+        return [document_from_record(next(records)) if r is not None else None for r in rows]
+
+
+def get_corpus() -> Optional[CorpusStore]:
+    """
+    현재 서빙 중인 인덱스 버전 (rag/versions.py) 의 corpus
+    """
+    return corpus_for(serving_version())
+
+
+@lru_cache(maxsize=2)
+def corpus_for(version: Optional[str]) -> Optional[CorpusStore]:
+    # 전환 직후에도 이전 버전을 처리 중인 요청이 있으므로 2개 유지
+    path = version_paths(version)["corpus"]
+    if not os.path.exists(path):
+        return None
+    return CorpusStore.load(path)
+
+
+# =========================
+# 2️⃣ id-only 벡터 인덱스 + hydrate
+# =========================
+
+def filter_metadata(doc: Document) -> Dict[str, Any]:
+    return {name: doc.metadata[name] for name in FILTER_FIELDS if doc.metadata.get(name) is not None}
+
+
+class HydratedIndex:
+    """
+    Pinecone index.query(include_metadata=False) → id / score
+    → CorpusStore에서 본문 hydrate
+    PineconeVectorStore와 같은 similarity_search 인터페이스
+    """
+
+    def __init__(self, index, embedding, corpus: CorpusStore, namespace: str = None):
+        self.index = index
+        self.embedding = embedding
+        self.corpus = corpus
+        self.namespace = namespace      # 종별 파티션 (rag/partitions.py)
+
+    def upsert(self, docs: List[Document], batch_size: int = 100) -> int:
+        for i in range(0, len(docs), batch_size):
+            batch = docs[i:i + batch_size]
+            vectors = self.embedding.embed_documents([d.page_content for d in batch])
+            self.index.upsert(
+                vectors=[
+                    {"id": d.metadata["doc_id"], "values": v, "metadata": filter_metadata(d)}
+                    for d, v in zip(batch, vectors)
+                ],
+                namespace=self.namespace,
+            )
+        return len(docs)
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        res = self.index.query(
+            vector=embedding,
+            top_k=k,
+            filter=filter,
+            namespace=self.namespace,
+            include_metadata=False,
+            include_values=False,
+        )
+        matches = res["matches"]
+        docs = self.corpus.documents([m["id"] for m in matches])
+        return [(d, float(m["score"])) for d, m in zip(docs, matches) if d is not None]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search(self, query: str, k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, filter)]
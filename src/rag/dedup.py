@@ -0,0 +1,57 @@
+# 근접 중복(near-duplicate) 판별용 SimHash
+# - ingest 시 문서별로 계산해 metadata["simhash"] (16자리 hex)로 저장
+# - 런타임에는 hamming distance 비교만 수행
+
+import re
+import zlib
+from typing import Optional
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE):
+    text = _WS_RE.sub(" ", text).strip()
+    if len(text) <= size:
+        return [text] if text else []
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+def simhash(text: str, bits: int = SIMHASH_BITS) -> int:
+    weights = [0] * bits
+    for sh in _shingles(text):
+        # crc32 2개를 이어 64bit 해시 (Python hash()는 프로세스마다 달라 사용 불가)
+        data = sh.encode("utf-8")
+        h = (zlib.crc32(data) << 32) | zlib.crc32(data[::-1])
+        for b in range(bits):
+            weights[b] += 1 if (h >> b) & 1 else -1
+
+    value = 0
+    for b in range(bits):
+        if weights[b] > 0:
+            value |= 1 << b
+    return value
+
+
+def simhash_hex(text: str) -> str:
+    return f"{simhash(text):016x}"
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def doc_simhash(doc) -> int:
+    """
+    metadata에 저장된 값 우선, 없으면 (구 인덱스) 즉석 계산
+    """
+    stored: Optional[str] = doc.metadata.get("simhash")
+    if stored:
+        return int(stored, 16)
+    return simhash(doc.page_content)
+
+
+def similarity(a: int, b: int, bits: int = SIMHASH_BITS) -> float:
+    return 1.0 - hamming(a, b) / bits
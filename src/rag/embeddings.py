@@ -0,0 +1,176 @@
+# 임베딩 provider
+# - "openai": OpenAI embeddings API (요청마다 네트워크 왕복)
+# - "local": sentence-transformers CPU 모델 (batch encode, 선택적으로 ONNX backend)
+#   기본 모델은 categorize.py 의 SBERT 와 같아서 프로세스 안에서 모델을 공유
+# - 인덱스를 만든 임베딩 spec(provider / model / dim)을 함께 저장하고
+#   서빙 시 현재 설정과 다르면 바로 실패 (차원이 같아도 모델이 다르면 검색이 조용히 망가짐)
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    OPENAI_API_KEY,
+    EMBEDDING_PROVIDER,
+    OPENAI_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BACKEND,
+    LOCAL_EMBEDDING_BATCH,
+    EMBEDDING_SPEC_PATH,
+)
+from observe.log import get_logger
+
+log = get_logger("embeddings")
+
+
+OPENAI_DIMS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+# =========================
+# 1️⃣ 로컬 모델
+# =========================
+
+@lru_cache(maxsize=2)
+def _load_model(model_name: str, backend: str):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name, device="cpu", backend="onnx")
+        except (TypeError, ImportError, ValueError) as e:
+            # sentence-transformers < 3.2 또는 optimum / onnxruntime 미설치
+            log.warning("embeddings.onnx_unavailable", extra={"fields": {"model": model_name, "error": str(e)}})
+
+    from categorize import SBERT_MODEL, embedder
+    if model_name == SBERT_MODEL:
+        return embedder
+
+    return SentenceTransformer(model_name, device="cpu")
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    OpenAIEmbeddings 와 같은 embed_documents / embed_query 인터페이스
+    벡터는 L2 정규화 (cosine = 내적)
+    """
+
+    provider = "local"
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_EMBEDDING_MODEL,
+        backend: str = LOCAL_EMBEDDING_BACKEND,
+        batch_size: int = LOCAL_EMBEDDING_BATCH,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.model = _load_model(model_name, backend)
+        # 같은 (재작성된) 질의 반복 시 재계산 방지
+        self._embed_one = lru_cache(maxsize=1024)(self._encode_one)
+
+    def _encode(self, texts: List[str]):
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
+    def _encode_one(self, text: str) -> tuple:
+        return tuple(self._encode([text])[0].tolist())
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return list(self._embed_one(text))
+
+    @property
+    def dim(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+
+# =========================
+# 2️⃣ Provider 선택
+# =========================
+
+@lru_cache(maxsize=2)
+def get_embeddings(provider: str = None) -> Embeddings:
+    provider = provider or EMBEDDING_PROVIDER
+
+    if provider == "local":
+        return LocalEmbeddings()
+
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(
+            model=OPENAI_EMBEDDING_MODEL,
+            openai_api_key=OPENAI_API_KEY,
+        )
+
+    raise ValueError(f"unknown EMBEDDING_PROVIDER: {provider}")
+
+
+def embedding_spec(embeddings: Embeddings) -> Dict[str, Any]:
+    """
+    인덱스와 함께 저장할 임베딩 식별 정보
+    """
+    if isinstance(embeddings, LocalEmbeddings):
+        return {"provider": "local", "model": embeddings.model_name, "dim": embeddings.dim}
+
+    model = getattr(embeddings, "model", None) or OPENAI_EMBEDDING_MODEL
+    dim = getattr(embeddings, "dimensions", None) or OPENAI_DIMS.get(model)
+    if dim is None:
+        dim = len(embeddings.embed_query("dim"))
+    return {"provider": "openai", "model": model, "dim": int(dim)}
+
+
+# =========================
+# 3️⃣ Spec 저장 / 검증
+# =========================
+
+def write_spec(spec: Dict[str, Any], path: str = EMBEDDING_SPEC_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def read_spec(path: str = EMBEDDING_SPEC_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_spec(indexed: Optional[Dict[str, Any]], embeddings: Embeddings, where: str) -> None:
+    """
+    인덱스를 만든 임베딩과 질의 임베딩이 다르면 RuntimeError
+    spec 기록이 없거나 일부만 있으면 (예전 로컬 인덱스 meta.json 은 dim 만) 경고 후 기록된 항목만 비교
+    — 어떤 provider 로 만든 인덱스인지 추측하지 않음 (EMBEDDING_PROVIDER=local 인덱스를 OpenAI 로 오판하지 않도록)
+    버전 인덱스 (reindex.py) 는 versions/{version}/spec.json 에 spec 이 함께 저장됨
+    """
+    current = embedding_spec(embeddings)
+    indexed = indexed or {}
+    if "provider" not in indexed:
+        log.warning("embeddings.spec_missing", extra={"fields": {"where": where, "current": current}})
+
+    keys = [k for k in ("provider", "model", "dim") if indexed.get(k) is not None]
+    if any(indexed[k] != current[k] for k in keys):
+        raise RuntimeError(
+            f"embedding spec mismatch for {where}: "
+            f"index={ {k: indexed[k] for k in keys} } current={ {k: current[k] for k in keys} } "
+            f"(re-index with: python3 ingest.py --reindex)"
+        )
@@ -0,0 +1,235 @@
+# 문서별 사전 계산 feature (ingest 시 1회 계산 → 런타임은 조회만)
+# - cross-encoder 입력: 문서 쪽 token id (special token 제외, max_length로 truncate)
+# - 답변 본문 (Q/A 분리 완료)
+# - 정적 prior: 답변 유형(expert / non_expert) + 답변 길이 + animal unknown penalty
+# - simhash / 근접 중복 cluster id
+# 저장: doc_id 기준 columnar (.npy 열 + utf-8 blob), load 시 mmap
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import FEATURE_DIR, RERANK_MODEL, RERANK_MAX_LENGTH, CITATION_DUP_HAMMING
+from rag.versions import serving_version, version_paths
+from rag.dedup import SIMHASH_BITS, doc_simhash, hamming
+
+
+# =========================
+# 1️⃣ 정적 feature 계산
+# =========================
+
+ANSWER_TYPE_PRIOR = {
+    "expert": 0.2,
+    "non_expert": 0.0,
+}
+UNKNOWN_ANIMAL_PENALTY = 0.3
+SHORT_ANSWER_CHARS = 80
+SHORT_ANSWER_PENALTY = 0.2
+
+
+def doc_id_for(url: str, question: str) -> str:
+    return hashlib.sha1(f"{url}\n{question}".encode("utf-8")).hexdigest()[:16]
+
+
+def split_answer(page_content: str) -> str:
+    if "\nA: " in page_content:
+        return page_content.split("\nA: ", 1)[1]
+    return page_content
+
+
+def static_prior(metadata: Dict, answer: str) -> float:
+    """
+    query와 무관한 rerank 보정값 (apply_penalties에서 점수에 더함)
+    """
+    prior = ANSWER_TYPE_PRIOR.get(metadata.get("answer_type"), 0.0)
+
+    if len(answer) < SHORT_ANSWER_CHARS:
+        prior -= SHORT_ANSWER_PENALTY
+
+    if metadata.get("animal") == "unknown":
+        prior -= UNKNOWN_ANIMAL_PENALTY
+
+    return prior
+
+
+def cluster_ids(hashes: Sequence[int], max_distance: int = CITATION_DUP_HAMMING) -> List[int]:
+    """
+    simhash 근접 중복 cluster (union-find)
+    64bit를 max_distance + 2개 band로 나누면, 거리 max_distance 이하인 쌍은
+    최소 한 band가 완전히 같음 (비둘기집) → band가 같은 쌍만 비교
+    """
+    n = len(hashes)
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    bands = max_distance + 2
+    width = -(-SIMHASH_BITS // bands)
+    mask = (1 << width) - 1
+
+    for b in range(bands):
+        buckets: Dict[int, List[int]] = {}
+        for i, h in enumerate(hashes):
+            buckets.setdefault((h >> (b * width)) & mask, []).append(i)
+
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    i, j = members[x], members[y]
+                    if find(i) != find(j) and hamming(hashes[i], hashes[j]) <= max_distance:
+                        parent[find(j)] = find(i)
+
+    # root → 0부터 연속 번호
+    roots: Dict[int, int] = {}
+    return [roots.setdefault(find(i), len(roots)) for i in range(n)]
+
+
+# =========================
+# 2️⃣ Columnar store
+# =========================
+
+class FeatureStore:
+
+    def __init__(
+        self,
+        ids: List[str],
+        columns: Dict[str, np.ndarray],
+        tokenizer: str = RERANK_MODEL,
+        max_length: int = RERANK_MAX_LENGTH,
+    ):
+        self.ids = ids
+        self.columns = columns
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self._rows = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # -------------------------
+    # 조회
+    # -------------------------
+    def row(self, doc) -> Optional[int]:
+        return self._rows.get(doc.metadata.get("doc_id"))
+
+    def rows(self, docs) -> List[Optional[int]]:
+        return [self.row(d) for d in docs]
+
+    def prior(self, row: int) -> float:
+        return float(self.columns["prior"][row])
+
+    def cluster(self, row: int) -> int:
+        return int(self.columns["cluster"][row])
+
+    def simhash(self, row: int) -> int:
+        return int(self.columns["simhash"][row])
+
+    def tokens(self, row: int) -> List[int]:
+        offsets = self.columns["tok_offsets"]
+        return self.columns["tokens"][offsets[row]:offsets[row + 1]].tolist()
+
+    def answer(self, row: int) -> str:
+        offsets = self.columns["text_offsets"]
+        return bytes(self.columns["text"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    # -------------------------
+    # 생성 / 저장
+    # -------------------------
+    @classmethod
+    def build(
+        cls,
+        docs,
+        tokenizer=None,
+        tokenizer_name: str = RERANK_MODEL,
+        max_length: int = RERANK_MAX_LENGTH,
+    ) -> "FeatureStore":
+        """
+        docs: ingest.load_documents() 결과 (metadata["doc_id"] 필요)
+        tokenizer: 없으면 RERANK_MODEL tokenizer 로드
+        """
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+        # query 최소 자리는 남기고 문서 쪽 token만 저장 (pair 조립은 런타임)
+        doc_budget = max_length - tokenizer.num_special_tokens_to_add(pair=True)
+
+        answers = [split_answer(d.page_content) for d in docs]
+        encoded = tokenizer(
+            [d.page_content for d in docs],
+            add_special_tokens=False,
+            truncation=True,
+            max_length=doc_budget,
+        )["input_ids"]
+
+        hashes = [doc_simhash(d) for d in docs]
+
+        tok_offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+        tok_offsets[1:] = np.cumsum([len(t) for t in encoded])
+
+        blobs = [a.encode("utf-8") for a in answers]
+        text_offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+        text_offsets[1:] = np.cumsum([len(b) for b in blobs])
+
+        columns = {
+            "prior": np.asarray(
+                [static_prior(d.metadata, a) for d, a in zip(docs, answers)], dtype=np.float32
+            ),
+            "cluster": np.asarray(cluster_ids(hashes), dtype=np.int32),
+            "simhash": np.asarray(hashes, dtype=np.uint64),
+            "tok_offsets": tok_offsets,
+            "tokens": np.fromiter((t for ids in encoded for t in ids), dtype=np.int32, count=int(tok_offsets[-1])),
+            "text_offsets": text_offsets,
+            "text": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        }
+
+        return cls([d.metadata["doc_id"] for d in docs], columns, tokenizer_name, max_length)
+
+    def save(self, feature_dir: str = FEATURE_DIR) -> None:
+        os.makedirs(feature_dir, exist_ok=True)
+        for name, values in self.columns.items():
+            np.save(os.path.join(feature_dir, f"{name}.npy"), values)
+
+        with open(os.path.join(feature_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(self.ids),
+                "tokenizer": self.tokenizer,
+                "max_length": self.max_length,
+                "columns": list(self.columns),
+                "ids": self.ids,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, feature_dir: str = FEATURE_DIR) -> "FeatureStore":
+        with open(os.path.join(feature_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        columns = {
+            name: np.load(os.path.join(feature_dir, f"{name}.npy"), mmap_mode="r")
+            for name in meta["columns"]
+        }
+        return cls(meta["ids"], columns, meta["tokenizer"], meta["max_length"])
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """
+    현재 서빙 중인 인덱스 버전 (rag/versions.py) 의 feature store
+    store가 없으면 None (런타임은 기존 계산 경로로 fallback)
+    """
+    return feature_store_for(serving_version())
+
+
+@lru_cache(maxsize=2)
+def feature_store_for(version: Optional[str]) -> Optional[FeatureStore]:
+    feature_dir = version_paths(version)["features"]
+    if not os.path.exists(os.path.join(feature_dir, "meta.json")):
+        return None
+    return FeatureStore.load(feature_dir)
@@ -1,23 +1,35 @@
 # 답변 생성, LLM 연결
+import time
 from typing import List, Dict
 from langchain_openai import ChatOpenAI
-from config import OPENAI_API_KEY
+from config import OPENAI_API_KEY, GEN_MODEL
+from safety.guardrail import GuardrailStream, SAFE_FALLBACK
+from observe import capture
+from rag.tiering import record_generation
 
 
 def generate_answer(
     question: str,
     citations: list,
     history: List[Dict[str, str]] = None,  # 🔥 추가
+    guard: GuardrailStream = None,
+    model: str = None,
+    tier: str = "strong",
 ) -> str:
     """
     Generate an answer grounded only on retrieved evidence.
     Supports multi-turn conversation via history.
+    If a guard is given, the answer is streamed through it and
+    generation stops as soon as a blocking rule fires.
+    model / tier: rag/tiering.py select_model 결과 (기본 GEN_MODEL)
     """
 
+    model = model or GEN_MODEL
     llm = ChatOpenAI(
-        model="gpt-4o",
+        model=model,
         temperature=0.2,   # 의료 도메인 → 낮게
-        openai_api_key=OPENAI_API_KEY
+        openai_api_key=OPENAI_API_KEY,
+        stream_usage=True,  # 스트리밍 시에도 token 사용량 수신 (tier별 비용)
     )
 
     # =========================
@@ -72,5 +84,35 @@ def generate_answer(
 답변:
 """
 
-    response = llm.invoke(prompt)
-    return response.content.strip()
+    def _generate() -> str:
+        started = time.perf_counter()
+        if guard is None:
+            response = llm.invoke(prompt)
+            record_generation(tier, model, time.perf_counter() - started, response.usage_metadata)
+            return response.content.strip()
+
+        # 스트리밍 + 점진 가드레일 (block 시 즉시 중단 → 토큰 절약)
+        parts, usage, ttft = [], None, None
+        try:
+            for chunk in llm.stream(prompt):
+                if ttft is None and chunk.content:
+                    ttft = time.perf_counter() - started
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+                parts.append(chunk.content)
+                if guard.feed(chunk.content):
+                    return SAFE_FALLBACK
+        finally:
+            record_generation(tier, model, time.perf_counter() - started, usage, ttft)
+
+        return "".join(parts).strip()
+
+    def _replayed(text: str) -> str:
+        # replay로 재사용된 답변도 가드레일은 다시 통과 (규칙 변경 비교용)
+        if guard is not None and guard.feed(text):
+            return SAFE_FALLBACK
+        return text
+
+    # 기본 모델은 기존 capture 와 같은 key 유지, 다른 모델 출력은 별도 key
+    kind = "generate" if model == GEN_MODEL else f"generate:{model}"
+    return capture.llm_call(kind, prompt, _generate, on_reuse=_replayed)
@@ -0,0 +1,161 @@
+# 로컬 벡터 인덱스 (numpy, brute-force cosine)
+# - Pinecone 없이 벤치마크 / 테스트 / 소규모 서빙용
+# - PineconeVectorStore와 같은 similarity_search 인터페이스
+# - Pinecone 스타일 metadata filter 지원: {"field": v}, {"field": {"$in": [...]}}, $eq / $ne / $nin
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class LocalVectorStore:
+
+    def __init__(self, embedding, vectors: np.ndarray = None, docs: List[Document] = None):
+        self.embedding = embedding
+        self.vectors = vectors
+        self.docs: List[Document] = docs or []
+        self._columns: Dict[str, np.ndarray] = {}
+
+    # -------------------------
+    # 생성 / 저장
+    # -------------------------
+    @staticmethod
+    def _normalize(mat: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (mat / norms).astype(np.float32)
+
+    def add_documents(self, docs: List[Document], batch_size: int = 256) -> None:
+        chunks = []
+        for i in range(0, len(docs), batch_size):
+            batch = docs[i:i + batch_size]
+            chunks.append(np.asarray(
+                self.embedding.embed_documents([d.page_content for d in batch]),
+                dtype=np.float32,
+            ))
+
+        if not chunks:
+            return
+
+        new_vectors = self._normalize(np.vstack(chunks))
+        self.vectors = new_vectors if self.vectors is None else np.vstack([self.vectors, new_vectors])
+        self.docs.extend(docs)
+        self._columns.clear()
+
+    @classmethod
+    def from_documents(cls, docs: List[Document], embedding, batch_size: int = 256) -> "LocalVectorStore":
+        store = cls(embedding)
+        store.add_documents(docs, batch_size=batch_size)
+        return store
+
+    def save(self, index_dir: str, meta: Dict[str, Any] = None) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "vectors.npy"), self.vectors)
+
+        with open(os.path.join(index_dir, "docs.jsonl"), "w", encoding="utf-8") as f:
+            for d in self.docs:
+                f.write(json.dumps(
+                    {"page_content": d.page_content, "metadata": d.metadata},
+                    ensure_ascii=False,
+                ) + "\n")
+
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(self.docs),
+                "dim": int(self.vectors.shape[1]) if self.vectors is not None else 0,
+                **(meta or {}),
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, embedding) -> "LocalVectorStore":
+        vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+
+        docs = []
+        with open(os.path.join(index_dir, "docs.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                obj = json.loads(line)
+                docs.append(Document(page_content=obj["page_content"], metadata=obj["metadata"]))
+
+        return cls(embedding, vectors=vectors, docs=docs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # -------------------------
+    # Filter
+    # -------------------------
+    def _column(self, field: str) -> np.ndarray:
+        col = self._columns.get(field)
+        if col is None:
+            col = np.array([d.metadata.get(field) for d in self.docs], dtype=object)
+            self._columns[field] = col
+        return col
+
+    def _mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+
+        mask = np.ones(len(self.docs), dtype=bool)
+        for field, cond in filter.items():
+            col = self._column(field)
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            for op, value in cond.items():
+                if op == "$eq":
+                    mask &= col == value
+                elif op == "$ne":
+                    mask &= col != value
+                elif op == "$in":
+                    mask &= np.isin(col, list(value))
+                elif op == "$nin":
+                    mask &= ~np.isin(col, list(value))
+                else:
+                    raise ValueError(f"unsupported filter operator: {op}")
+        return mask
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        if self.vectors is None or not self.docs:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self.vectors @ query
+
+        mask = self._mask(filter)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (self.docs[i], float(scores[i]))
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search(self, query: str, k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, filter)]
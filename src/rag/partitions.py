@@ -0,0 +1,158 @@
+# 종(species)별 인덱스 파티션
+# - ingest 시 문서를 animal 값으로 나눠 저장: dog / cat / unknown
+#   Pinecone: 같은 인덱스의 namespace, 로컬: index_dir/{partition} 별도 인덱스
+# - 검색 시 animal filter ({"animal": {"$in": [...]}})를 파티션 선택으로 바꾸고
+#   해당 파티션만 병렬 검색 → 점수 기준 병합 (나머지 filter는 파티션 안에서 그대로 적용)
+# - 파티션 크기는 gauge(partition_size), 파티션별 지연은 partition_latency 로 기록
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from observe import metrics
+
+
+PARTITIONS = ("dog", "cat", "unknown")
+
+# recall_docs 의 _recall_pool 안에서 호출되므로 별도 pool (중첩 대기로 인한 고갈 방지)
+_partition_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="partition")
+
+
+def partition_of(doc: Document) -> str:
+    animal = doc.metadata.get("animal")
+    return animal if animal in PARTITIONS else "unknown"
+
+
+def split_by_partition(docs: List[Document]) -> Dict[str, List[Document]]:
+    parts: Dict[str, List[Document]] = {p: [] for p in PARTITIONS}
+    for doc in docs:
+        parts[partition_of(doc)].append(doc)
+    return parts
+
+
+def route_filter(filter: Optional[Dict[str, Any]]) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """
+    Pinecone 스타일 filter → (검색할 파티션, animal 조건을 뺀 나머지 filter)
+    animal 조건이 없으면 전체 파티션
+    """
+    if not filter or "animal" not in filter:
+        return list(PARTITIONS), filter or None
+
+    rest = {k: v for k, v in filter.items() if k != "animal"}
+    cond = filter["animal"]
+    if not isinstance(cond, dict):
+        cond = {"$eq": cond}
+
+    selected = list(PARTITIONS)
+    for op, value in cond.items():
+        if op == "$eq":
+            selected = [p for p in selected if p == value]
+        elif op == "$in":
+            selected = [p for p in selected if p in value]
+        elif op == "$ne":
+            selected = [p for p in selected if p != value]
+        elif op == "$nin":
+            selected = [p for p in selected if p not in value]
+        else:
+            raise ValueError(f"unsupported animal filter operator: {op}")
+
+    return selected, rest or None
+
+
+class PartitionedVectorStore:
+    """
+    파티션별 vector store 묶음
+    PineconeVectorStore / LocalVectorStore 와 같은 similarity_search 인터페이스
+    """
+
+    def __init__(self, stores: Dict[str, Any], embedding, sizes: Dict[str, int] = None):
+        self.stores = stores
+        self.embedding = embedding
+        self.sizes = sizes or {p: len(s) for p, s in stores.items() if hasattr(s, "__len__")}
+
+        for name, size in self.sizes.items():
+            metrics.set_gauge("partition_size", size, partition=name)
+
+    def __len__(self) -> int:
+        return sum(self.sizes.values())
+
+    def _search_one(self, name: str, embedding: List[float], k: int, filter) -> List[Tuple[Document, float]]:
+        started = time.perf_counter()
+        try:
+            return self.stores[name].similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        finally:
+            metrics.observe("partition_latency", time.perf_counter() - started, partition=name)
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        names, rest = route_filter(filter)
+        names = [n for n in names if n in self.stores and self.sizes.get(n, 1) > 0]
+        if not names:
+            return []
+
+        if len(names) == 1:
+            results = [self._search_one(names[0], embedding, k, rest)]
+        else:
+            results = list(_partition_pool.map(lambda n: self._search_one(n, embedding, k, rest), names))
+
+        # 같은 임베딩 공간의 cosine 점수 → 파티션 간 직접 비교 가능
+        merged = [pair for pairs in results for pair in pairs]
+        merged.sort(key=lambda x: x[1], reverse=True)
+        return merged[:k]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search(self, query: str, k: int = 4, filter=None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, filter)]
+
+
+# =========================
+# 로드
+# =========================
+
+def load_local(index_dir: str, embedding, meta: Dict[str, Any] = None):
+    """
+    meta.json 에 partitions 가 있으면 index_dir/{partition} 묶음, 아니면 단일 인덱스
+    """
+    from rag.local_index import LocalVectorStore
+
+    if not meta or not meta.get("partitions"):
+        return LocalVectorStore.load(index_dir, embedding)
+
+    stores = {
+        name: LocalVectorStore.load(os.path.join(index_dir, name), embedding)
+        for name, size in meta["partitions"].items()
+        if size > 0
+    }
+    return PartitionedVectorStore(stores, embedding, sizes=dict(meta["partitions"]))
+
+
+def load_namespaces(
+    index,
+    embedding,
+    make_store: Callable[[str], Any],
+    namespaces: Dict[str, str] = None,
+) -> PartitionedVectorStore:
+    """
+    Pinecone namespace 별 store (make_store(namespace))
+    namespaces: 파티션 → namespace 이름 (버전 인덱스는 {version}-{partition}, 기본은 파티션 이름)
+    파티션 크기는 describe_index_stats 기준
+    """
+    names = {**{p: p for p in PARTITIONS}, **(namespaces or {})}
+    stats = index.describe_index_stats()["namespaces"]
+    sizes = {p: int(stats[names[p]]["vector_count"]) if names[p] in stats else 0 for p in PARTITIONS}
+    stores = {p: make_store(names[p]) for p in PARTITIONS if sizes[p] > 0}
+    return PartitionedVectorStore(stores, embedding, sizes=sizes)
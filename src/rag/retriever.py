@@ -1,7 +1,12 @@
-from typing import List, Dict
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, List, Dict, Tuple
 
+from langchain_core.documents import Document
 from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from sentence_transformers import CrossEncoder
 
 from config import *
@@ -10,7 +15,17 @@ from config import *
 from ingest import detect_animal
 
 # 🔥 증상 분류기 import
-from categorize import categorize_text
+from categorize import categorize_text, top_categories
+
+from rag.features import feature_store_for, static_prior, split_answer
+from rag import versions
+from rag.versions import serving_version, version_paths
+
+from observe import capture, metrics
+from observe.metrics import stage_timer
+from observe.log import get_logger, debug_payload
+
+log = get_logger("retrieve")
 
 
 # =========================
@@ -18,7 +33,8 @@ from categorize import categorize_text
 # =========================
 
 cross_encoder = CrossEncoder(
-    "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_MODEL,
+    max_length=RERANK_MAX_LENGTH,
 )
 
 rewrite_llm = ChatOpenAI(
@@ -31,11 +47,7 @@ rewrite_llm = ChatOpenAI(
 # Query rewriting (history-aware)
 # =========================
 
-def rewrite_query(query: str, history: List[Dict[str, str]] = None) -> str:
-    """
-    history가 있으면 최근 대화 맥락을 포함해 query를 재작성
-    """
-
+def _rewrite_prompt(query: str, history: List[Dict[str, str]] = None) -> str:
     history_text = ""
     if history:
         recent = history[-2:]  # 🔑 최근 2턴만 사용
@@ -63,66 +75,143 @@ def rewrite_query(query: str, history: List[Dict[str, str]] = None) -> str:
 원문 질문: {query}
 변환:
 """
-    return rewrite_llm.invoke(prompt).content.strip()
+    return prompt
+
+
+def rewrite_query(query: str, history: List[Dict[str, str]] = None) -> str:
+    """
+    history가 있으면 최근 대화 맥락을 포함해 query를 재작성
+    """
+    prompt = _rewrite_prompt(query, history)
+    return capture.llm_call(
+        "rewrite",
+        prompt,
+        lambda: rewrite_llm.invoke(prompt).content.strip(),
+    )
+
+
+def rewrite_queries(
+    queries: List[str],
+    histories: List[List[Dict[str, str]]],
+    max_concurrency: int = 8,
+) -> List[str]:
+    """
+    여러 query를 동시 재작성 (bulk 모드)
+    """
+    prompts = [_rewrite_prompt(q, h) for q, h in zip(queries, histories)]
+    responses = rewrite_llm.batch(prompts, config={"max_concurrency": max_concurrency})
+    return [r.content.strip() for r in responses]
 
 
 # =========================
-# Retrieval (멀티턴 대응)
+# 공용 단계 (single / batch 공유)
 # =========================
 
-def retrieve_docs(
-    query: str,
-    history: List[Dict[str, str]] = None,
-    k: int = 3,
-    fetch_k: int = 50,
-):
+def get_embeddings(provider: str = None):
     """
-    query + history
-    → animal 판단 (query only)
-    → symptom category 판단 (query only)
-    → history-aware query rewriting
-    → Pinecone retrieval (filter)
-    → cross-encoder rerank
+    EMBEDDING_PROVIDER 기준 임베딩 (rag/embeddings.py)
     """
+    from rag.embeddings import get_embeddings as _get
+    return _get(provider)
 
-    # ===============================
-    # 0️⃣ animal 판단 (현재 질문 기준)
-    # ===============================
-    animal = detect_animal(question=query)
-    print(f"[DEBUG] detected animal: {animal}")
 
-    # ===============================
-    # 0️⃣-2 symptom category 판단
-    # ===============================
-    symptom_category, symptom_conf = categorize_text(query)
-    print(f"[DEBUG] symptom_category={symptom_category}, conf={symptom_conf:.3f}")
+def query_embedder(vectorstore):
+    """
+    질의 임베딩은 인덱스를 만든 임베딩과 같아야 함 (벤치마크에서 provider별 인덱스 비교 시)
+    """
+    return getattr(vectorstore, "embedding", None) or get_embeddings()
 
-    embeddings = OpenAIEmbeddings(
-        openai_api_key=OPENAI_API_KEY
-    )
 
-    vectorstore = PineconeVectorStore.from_existing_index(
+def get_vectorstore():
+    """
+    현재 서빙 중인 인덱스 버전 (rag/versions.py) 의 vector store
+    """
+    return load_vectorstore(serving_version())
+
+
+@lru_cache(maxsize=2)
+def load_vectorstore(version: str = None):
+    """
+    version: rag/versions.py 의 인덱스 버전 (None = 버전 없는 기존 단일 인덱스)
+    전환 직후 이전 버전을 쓰는 요청이 남아 있으므로 2개까지 유지
+    ingest 가 기록한 spec 에 partitions 가 있으면 종별 파티션 묶음 (rag/partitions.py)
+    """
+    from rag.embeddings import check_spec, read_spec
+    from rag import partitions
+    from rag.corpus import corpus_for
+
+    paths = version_paths(version)
+
+    if VECTOR_BACKEND == "local":
+        index_dir = paths["local"]
+        meta = read_spec(os.path.join(index_dir, "meta.json"))
+        check_spec(meta, get_embeddings(), index_dir)
+        return partitions.load_local(index_dir, get_embeddings(), meta)
+
+    if VECTOR_BACKEND == "mock":
+        from bench.mock_vectorstore import MockVectorStore
+        return MockVectorStore.load(LOCAL_INDEX_DIR, get_embeddings())
+
+    spec = read_spec(paths["spec"])
+    check_spec(spec, get_embeddings(), PINECONE_INDEX if version is None else f"{PINECONE_INDEX}@{version}")
+    partitioned = bool(spec and spec.get("partitions"))
+    # 버전 인덱스: {파티션 (비파티션은 ""): namespace}, 기존 인덱스: 기본 namespace / 파티션 이름 그대로
+    namespaces = (spec or {}).get("namespaces") or {}
+
+    if VECTOR_BACKEND == "pinecone_ids":
+        from pinecone import Pinecone
+        from rag.corpus import HydratedIndex
+
+        corpus = corpus_for(version)
+        if corpus is None:
+            raise RuntimeError(f"corpus store not found: {paths['corpus']} (run ingest first)")
+        index = Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+        if partitioned:
+            return partitions.load_namespaces(
+                index, get_embeddings(),
+                lambda ns: HydratedIndex(index, get_embeddings(), corpus, namespace=ns),
+                namespaces,
+            )
+        return HydratedIndex(index, get_embeddings(), corpus, namespace=namespaces.get(""))
+
+    if partitioned:
+        from pinecone import Pinecone
+
+        index = Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+        return partitions.load_namespaces(
+            index, get_embeddings(),
+            lambda ns: PineconeVectorStore.from_existing_index(
+                index_name=PINECONE_INDEX,
+                embedding=get_embeddings(),
+                namespace=ns,
+            ),
+            namespaces,
+        )
+
+    return PineconeVectorStore.from_existing_index(
         index_name=PINECONE_INDEX,
-        embedding=embeddings,
+        embedding=get_embeddings(),
+        namespace=namespaces.get(""),
     )
 
-    # ===============================
-    # 1️⃣ Query rewriting (🔥 history 반영)
-    # ===============================
-    rewritten_query = rewrite_query(query, history)
 
-    print("\n=== QUERY REWRITE DEBUG ===")
-    print("ORIGINAL :", query)
-    print("HISTORY  :", history[-2:] if history else "None")
-    print("REWRITTEN:", rewritten_query)
-    print("==========================\n")
+def _warm_version(version: str) -> None:
+    """
+    서빙 버전 전환 전 (versions.ServingPointer): store / feature 로드 + 실제 검색 1회
+    실패하면 전환하지 않고 기존 버전 유지
+    """
+    store = load_vectorstore(version)
+    feature_store_for(version)
+    store.similarity_search("강아지가 밥을 안 먹어요", k=1)
 
-    # ===============================
-    # 2️⃣ Pinecone filter 구성
-    # ===============================
+
+versions.serving.add_warmer(_warm_version)
+
+
+def build_filter(animal: str, symptom_category: str, symptom_conf: float) -> Dict:
     pinecone_filter = {}
 
-    # animal filter
+    # animal filter (파티션 인덱스에서는 검색할 파티션 선택으로 변환됨)
     if animal in ("cat", "dog"):
         pinecone_filter["animal"] = {"$in": [animal, "unknown"]}
 
@@ -130,63 +219,510 @@ def retrieve_docs(
     if symptom_conf >= 0.5 and symptom_category != "미분류":
         pinecone_filter["symptom_category"] = symptom_category
 
-    print(f"[DEBUG] pinecone_filter = {pinecone_filter}")
+    return pinecone_filter
 
-    # ===============================
-    # 3️⃣ Pinecone recall
-    # ===============================
-    docs = vectorstore.similarity_search(
-        rewritten_query,
-        k=fetch_k,
-        filter=pinecone_filter if pinecone_filter else None
-    )
 
-    if not docs:
-        print("[WARN] Pinecone returned 0 documents.")
-        return []
+def _activation():
+    # sentence-transformers 버전별 속성명 차이
+    return (
+        getattr(cross_encoder, "activation_fn", None)
+        or getattr(cross_encoder, "default_activation_function", None)
+        or (lambda x: x)
+    )
 
-    # ===============================
-    # 4️⃣ Cross-Encoder reranking
-    # ===============================
-    pairs = [
-        (rewritten_query, d.page_content)
-        for d in docs
-    ]
 
-    scores = cross_encoder.predict(pairs)
+def _predict_pretokenized(pairs: List[Tuple[List[int], List[int]]], batch_size: int = 32) -> List[float]:
+    """
+    (query token ids, 문서 token ids) pair를 직접 조립해 cross-encoder 실행
+    문서 쪽 tokenize는 ingest 시 완료 (rag/features.py)
+    """
+    import torch
+
+    tokenizer = cross_encoder.tokenizer
+    model = cross_encoder.model
+    device = next(model.parameters()).device
+    activation = _activation()
+    special = tokenizer.num_special_tokens_to_add(pair=True)
+
+    scores: List[float] = []
+    model.eval()
+    for i in range(0, len(pairs), batch_size):
+        batch = []
+        for q_ids, d_ids in pairs[i:i + batch_size]:
+            d_ids = d_ids[:max(RERANK_MAX_LENGTH - special - len(q_ids), 0)]
+            feature = {"input_ids": tokenizer.build_inputs_with_special_tokens(q_ids, d_ids)}
+            if "token_type_ids" in tokenizer.model_input_names:
+                feature["token_type_ids"] = tokenizer.create_token_type_ids_from_sequences(q_ids, d_ids)
+            batch.append(feature)
+
+        features = tokenizer.pad(batch, return_tensors="pt")
+        features = {k: v.to(device) for k, v in features.items()}
+        with torch.no_grad():
+            logits = activation(model(**features, return_dict=True).logits)
+        scores.extend(logits[:, 0].float().cpu().tolist())
+
+    return scores
+
+
+def rerank_scores(queries: List[str], candidates: List[list], batch_size: int = 32, store=None) -> List[float]:
+    """
+    queries[i] × candidates[i] 전체 pair 점수 (평탄화 순서)
+    store: 검색한 인덱스 버전의 feature store, 모든 문서가 있으면 사전 tokenize 경로, 아니면 CrossEncoder.predict
+    """
+    rows = [store.rows(docs) for docs in candidates] if store is not None else None
+
+    if rows is not None and store.tokenizer == RERANK_MODEL and all(
+        r is not None for doc_rows in rows for r in doc_rows
+    ):
+        metrics.incr("rerank_path", path="pretokenized")
+        # query 길이 상한: 문서 자리를 최소 절반은 남김
+        q_max = RERANK_MAX_LENGTH // 2
+        pairs = []
+        for q, doc_rows in zip(queries, rows):
+            q_ids = cross_encoder.tokenizer(q, add_special_tokens=False)["input_ids"][:q_max]
+            pairs.extend((q_ids, store.tokens(r)) for r in doc_rows)
+        return _predict_pretokenized(pairs, batch_size) if pairs else []
+
+    metrics.incr("rerank_path", path="raw")
+    pairs = [(q, d.page_content) for q, docs in zip(queries, candidates) for d in docs]
+    return list(cross_encoder.predict(pairs, batch_size=batch_size)) if pairs else []
+
+
+def doc_priors(docs: list, store=None) -> List[float]:
+    """
+    query 무관 보정값: feature store 조회, 없는 문서만 즉석 계산
+    """
+    priors = []
+    for doc in docs:
+        row = store.row(doc) if store is not None else None
+        if row is not None:
+            priors.append(store.prior(row))
+        else:
+            priors.append(static_prior(doc.metadata, split_answer(doc.page_content)))
+    return priors
+
+
+def apply_penalties(
+    docs: list,
+    scores,
+    symptom_category: str,
+    symptom_conf: float,
+    categories: List[str] = None,
+    store=None,
+) -> List[Tuple[Any, float]]:
+    """
+    cross-encoder 점수 + 정적 prior (문서 품질 / animal unknown)
+    + query 의존 penalty (symptom 불일치) → 내림차순 정렬
+    categories: multi-category recall 시 불일치로 보지 않을 후보 카테고리
+    store: prior 를 조회할 feature store (검색한 인덱스 버전)
+    """
+    allowed = set(categories or []) | {symptom_category}
 
     reranked = []
-    for doc, score in zip(docs, scores):
+    for doc, score, prior in zip(docs, scores, doc_priors(docs, store)):
         penalty = 0.0
 
-        if doc.metadata.get("animal") == "unknown":
-            penalty += 0.3
-
         if symptom_conf >= 0.5:
-            if doc.metadata.get("symptom_category") != symptom_category:
+            if doc.metadata.get("symptom_category") not in allowed:
                 penalty += 0.5
 
-        reranked.append((doc, score - penalty))
+        reranked.append((doc, score + prior - penalty))
 
-    reranked = sorted(
+    return sorted(
         reranked,
         key=lambda x: x[1],
         reverse=True
     )
 
+
+_recall_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="recall")
+
+
+def _doc_key(doc) -> str:
+    return doc.metadata.get("doc_id") or doc.page_content
+
+
+def _merge(results: List[List[Tuple[Any, float]]]) -> List[Tuple[Any, float]]:
+    """
+    여러 recall 결과 병합 (같은 문서는 최고 점수 1건) → vector 점수 내림차순
+    """
+    best: Dict[str, Tuple[Any, float]] = {}
+    for pairs in results:
+        for doc, score in pairs:
+            key = _doc_key(doc)
+            if key not in best or score > best[key][1]:
+                best[key] = (doc, score)
+    return sorted(best.values(), key=lambda x: x[1], reverse=True)
+
+
+def recall_docs(
+    vectorstore,
+    vector: List[float],
+    animal: str,
+    symptom: Tuple[str, float],
+    fetch_k: int = 50,
+    mode: str = RETRIEVE_FILTER_MODE,
+    categories: List[str] = None,
+    timings: Dict[str, Dict[str, float]] = None,
+) -> Tuple[list, Dict[str, Any]]:
+    """
+    filter 전략별 recall
+    - hard : 단일 symptom_category 필터
+    - multi: categories (상위 N개) 필터별 병렬 recall → 병합 / 중복 제거
+    - soft : animal 필터만 (symptom은 rerank penalty로 반영)
+    - none : 필터 없음 (벤치마크용)
+    symptom 필터 결과가 적거나 (RETRIEVE_MIN_CANDIDATES) 점수가 낮으면
+    (RETRIEVE_MIN_RECALL_SCORE) animal 필터만으로 재검색해 병합
+    """
+    symptom_category, symptom_conf = symptom
+
+    if mode == "none":
+        filters = [{}]
+    elif mode == "soft":
+        filters = [build_filter(animal, "미분류", 0.0)]
+    elif mode == "multi" and symptom_conf >= 0.5 and categories:
+        filters = [build_filter(animal, cat, 1.0) for cat in categories]
+    else:
+        filters = [build_filter(animal, symptom_category, symptom_conf)]
+
+    def _search(f: Dict, k: int) -> List[Tuple[Any, float]]:
+        return vectorstore.similarity_search_by_vector_with_score(vector, k=k, filter=f or None)
+
+    with stage_timer("recall", timings):
+        if len(filters) == 1:
+            merged = _search(filters[0], fetch_k)
+        else:
+            per_filter_k = max(fetch_k // len(filters), 1)
+            merged = _merge(list(_recall_pool.map(lambda f: _search(f, per_filter_k), filters)))
+
+    info: Dict[str, Any] = {"mode": mode, "filters": filters, "fallback": None}
+
+    # fallback: symptom 필터를 썼는데 결과가 부실한 경우만
+    if any("symptom_category" in f for f in filters):
+        if len(merged) < min(RETRIEVE_MIN_CANDIDATES, fetch_k):
+            info["fallback"] = "few"
+        elif not merged or merged[0][1] < RETRIEVE_MIN_RECALL_SCORE:
+            info["fallback"] = "low_score"
+
+    if info["fallback"]:
+        with stage_timer("recall_fallback", timings):
+            merged = _merge([merged, _search(build_filter(animal, "미분류", 0.0), fetch_k)])
+
+    metrics.incr("retrieve_recall", mode=mode, fallback=info["fallback"] or "none")
+    metrics.observe("recall_candidates", len(merged), mode=mode)
+
+    return [doc for doc, _ in merged], info
+
+
+# =========================
+# Speculative recall (rewrite 와 병렬)
+# =========================
+
+# recall_docs 가 내부에서 _recall_pool 을 쓰므로 별도 pool
+_speculative_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculate")
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = (sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5)
+    return dot / norm if norm else 0.0
+
+
+def _speculate(vectorstore, query: str, recall_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    원문 질문 임베딩 → recall (worker 스레드에서 실행, 소요 시간 함께 반환)
+    """
+    started = time.perf_counter()
+    vector = query_embedder(vectorstore).embed_query(query)
+    docs, info = recall_docs(vectorstore, vector, **recall_kwargs)
+    return {"vector": vector, "docs": docs, "info": info, "wall": time.perf_counter() - started}
+
+
+def speculative_recall(
+    vectorstore,
+    query: str,
+    rewrite_fn,
+    recall_kwargs: Dict[str, Any],
+    threshold: float = SPECULATIVE_REUSE_SIM,
+    timings: Dict[str, Dict[str, float]] = None,
+) -> Tuple[str, list, Dict[str, Any]]:
+    """
+    rewrite_fn() (LLM 재작성)이 도는 동안 원문 질문으로 recall 을 먼저 시작
+    - 재작성 질의 임베딩과 원문 임베딩 cosine >= threshold → 원문 후보 재사용 (hit)
+    - 아니면 재작성 질의로 다시 recall → 재작성 결과 우선 병합 (miss)
+    반환: (재작성 질의, 후보 문서, recall info)
+    """
+    future = _speculative_pool.submit(_speculate, vectorstore, query, recall_kwargs)
+
+    with stage_timer("rewrite", timings):
+        rewritten_query = rewrite_fn()
+
+    with stage_timer("embed", timings):
+        vector = query_embedder(vectorstore).embed_query(rewritten_query)
+
+    try:
+        with stage_timer("speculative_wait", timings):
+            waited = time.perf_counter()
+            spec = future.result()
+            waited = time.perf_counter() - waited
+    except Exception as e:
+        # 추측 실패는 일반 경로로
+        log.warning("retrieve.speculative_error", extra={"fields": {"error": str(e)}})
+        metrics.incr("retrieve_speculative", outcome="error")
+        docs, info = recall_docs(vectorstore, vector, timings=timings, **recall_kwargs)
+        return rewritten_query, docs, info
+
+    similarity = _cosine(spec["vector"], vector)
+    metrics.observe("speculative_similarity", similarity)
+
+    if similarity >= threshold:
+        # recall 이 rewrite 와 겹쳐서 끝남 → 절약된 시간 = 추측 recall 시간 - 추가 대기
+        metrics.incr("retrieve_speculative", outcome="hit")
+        metrics.observe("speculative_saved", max(spec["wall"] - waited, 0.0))
+        return rewritten_query, spec["docs"], {**spec["info"], "speculative": "hit", "similarity": similarity}
+
+    metrics.incr("retrieve_speculative", outcome="miss")
+    docs, info = recall_docs(vectorstore, vector, timings=timings, **recall_kwargs)
+
+    fetch_k = recall_kwargs.get("fetch_k", 50)
+    seen = {_doc_key(d) for d in docs}
+    extra = [d for d in spec["docs"] if _doc_key(d) not in seen]
+    merged = docs + extra[:max(fetch_k - len(docs), 0)]
+
+    return rewritten_query, merged, {**info, "speculative": "miss", "similarity": similarity}
+
+
+def select_top(reranked, k: int, min_score: float = None, version: str = None) -> list:
+    """
+    rerank_score / index_version 을 기록한 사본 반환
+    (recall 결과 문서는 corpus / 로컬 인덱스 / speculative 결과와 공유될 수 있으므로 원본 metadata 는 건드리지 않음)
+    index_version: citation 이 검색과 같은 버전의 feature store 를 쓰도록 (rag/citation.py)
+    """
+    top = []
+    for doc, score in reranked[:k]:
+        if min_score is not None and score < min_score:
+            continue
+        top.append(Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "rerank_score": float(score), "index_version": version},
+        ))
+    return top
+
+
+# =========================
+# Retrieval (멀티턴 대응)
+# =========================
+
+def retrieve_docs(
+    query: str,
+    history: List[Dict[str, str]] = None,
+    k: int = 3,
+    fetch_k: int = 50,
+    animal: str = None,
+    symptom: Tuple[str, float] = None,
+    min_score: float = None,
+    vectorstore=None,
+    rewrite: bool = True,
+    use_filter: bool = True,
+    rerank: bool = True,
+    timings: Dict[str, Dict[str, float]] = None,
+    filter_mode: str = None,
+    speculative: bool = None,
+):
+    """
+    query + history
+    → animal 판단 (query only)
+    → symptom category 판단 (query only)
+    → history-aware query rewriting
+    → Pinecone retrieval (filter)
+    → cross-encoder rerank
+    animal / symptom 이 이미 계산되어 있으면 (graph triage) 재사용
+    반환 문서의 metadata["rerank_score"]에 최종 점수 기록
+    filter_mode: recall 필터 전략 (기본 RETRIEVE_FILTER_MODE, recall_docs 참고)
+    speculative: rewrite 동안 원문 질문으로 먼저 recall (기본 RETRIEVE_SPECULATIVE, speculative_recall 참고)
+    rewrite / use_filter / rerank / vectorstore 는 벤치마크 변형용,
+    timings dict가 주어지면 단계별 wall / cpu 시간 기록
+    """
+
+    with stage_timer("classify", timings):
+        # ===============================
+        # 0️⃣ animal 판단 (현재 질문 기준)
+        # ===============================
+        if animal is None:
+            animal = detect_animal(question=query)
+
+        # ===============================
+        # 0️⃣-2 symptom category 판단
+        # ===============================
+        if symptom is None:
+            symptom = categorize_text(query)
+        symptom_category, symptom_conf = symptom
+
+    debug_payload(log, "retrieve.classified", lambda: {
+        "animal": animal,
+        "symptom_category": symptom_category,
+        "symptom_conf": symptom_conf,
+    })
+
+    # 요청 하나는 처음 본 서빙 버전으로 끝까지 (중간에 전환돼도 store / feature 가 섞이지 않도록)
+    version = serving_version()
+    vectorstore = vectorstore or load_vectorstore(version)
+    features = feature_store_for(version)
+
+    mode = (filter_mode or RETRIEVE_FILTER_MODE) if use_filter else "none"
+    categories = [c for c, _ in top_categories(query, RETRIEVE_TOP_CATEGORIES)] if mode == "multi" else None
+
+    recall_kwargs = {
+        "animal": animal,
+        "symptom": (symptom_category, symptom_conf),
+        "fetch_k": fetch_k,
+        "mode": mode,
+        "categories": categories,
+    }
+
+    if speculative is None:
+        speculative = RETRIEVE_SPECULATIVE
+
+    if rewrite and speculative:
+        # ===============================
+        # 1️⃣+2️⃣ rewrite 와 원문 recall 동시 진행
+        # ===============================
+        rewritten_query, docs, recall_info = speculative_recall(
+            vectorstore,
+            query,
+            lambda: rewrite_query(query, history),
+            recall_kwargs,
+            timings=timings,
+        )
+    else:
+        # ===============================
+        # 1️⃣ Query rewriting (🔥 history 반영)
+        # ===============================
+        with stage_timer("rewrite", timings):
+            rewritten_query = rewrite_query(query, history) if rewrite else query
+
+        # ===============================
+        # 2️⃣ Pinecone recall (filter 전략 + fallback)
+        # ===============================
+        with stage_timer("embed", timings):
+            vector = query_embedder(vectorstore).embed_query(rewritten_query)
+
+        docs, recall_info = recall_docs(vectorstore, vector, timings=timings, **recall_kwargs)
+
+    debug_payload(log, "retrieve.rewrite", lambda: {
+        "original": query,
+        "history": history[-2:] if history else None,
+        "rewritten": rewritten_query,
+    })
+
+    debug_payload(log, "retrieve.recall", lambda: {**recall_info, "candidates": len(docs)})
+
+    if not docs:
+        log.warning("retrieve.empty_recall", extra={"fields": {"filters": recall_info["filters"]}})
+        return []
+
     # ===============================
-    # 5️⃣ Debug 출력
+    # 4️⃣ Cross-Encoder reranking
     # ===============================
-    print("\n================ RERANK DEBUG ====================")
-    for i, (doc, score) in enumerate(reranked[:k]):
-        print(f"[RERANK {i}] score={score:.4f}")
-        print("ANIMAL:", doc.metadata.get("animal"))
-        print("SYMPTOM:", doc.metadata.get("symptom_category"))
-        print("URL:", doc.metadata.get("url"))
-        print("QUESTION:", doc.metadata.get("question"))
-        print("CONTENT (HEAD):")
-        print(doc.page_content[:300])
-        print("------------------------------------------------")
-    print("=================================================\n")
-
-    return [doc for doc, _ in reranked[:k]]
+    with stage_timer("rerank", timings):
+        if rerank:
+            scores = rerank_scores([rewritten_query], [docs], store=features)
+        else:
+            # vector 검색 순위 유지 (penalty 비교용 가짜 점수)
+            scores = [float(len(docs) - i) for i in range(len(docs))]
+
+        reranked = apply_penalties(docs, scores, symptom_category, symptom_conf, categories, store=features)
+
+    # ===============================
+    # 5️⃣ Debug payload (샘플링된 요청만)
+    # ===============================
+    debug_payload(log, "retrieve.rerank_top", lambda: {
+        "candidates": len(docs),
+        "top": [
+            {
+                "score": round(float(score), 4),
+                "animal": doc.metadata.get("animal"),
+                "symptom": doc.metadata.get("symptom_category"),
+                "url": doc.metadata.get("url"),
+                "question": doc.metadata.get("question"),
+                "head": doc.page_content[:300],
+            }
+            for doc, score in reranked[:k]
+        ],
+    })
+
+    return select_top(reranked, k, min_score, version)
+
+
+# =========================
+# Batch retrieval (bulk 모드)
+# =========================
+
+def retrieve_docs_batch(
+    queries: List[str],
+    histories: List[List[Dict[str, str]]] = None,
+    signals: List[Dict[str, Any]] = None,
+    k: int = 3,
+    fetch_k: int = 50,
+    min_score: float = None,
+    max_concurrency: int = 8,
+    rerank_batch_size: int = 64,
+) -> List[list]:
+    """
+    여러 query를 한 번에 검색 (throughput 우선)
+    → query rewriting 동시 실행
+    → 임베딩 1회 batch 호출
+    → Pinecone recall 동시 실행
+    → cross-encoder 전체 pair 1회 batch predict
+    """
+    n = len(queries)
+    histories = histories or [None] * n
+    signals = signals or [{} for _ in range(n)]
+
+    animals, symptoms = [], []
+    for q, sig in zip(queries, signals):
+        animals.append(sig.get("animal") or detect_animal(question=q))
+        symptoms.append(sig.get("symptom") or categorize_text(q))
+
+    # 1️⃣ rewrite (동시)
+    rewritten = rewrite_queries(queries, histories, max_concurrency)
+
+    # 2️⃣ 임베딩 (batch)
+    version = serving_version()
+    vectorstore = load_vectorstore(version)
+    features = feature_store_for(version)
+    vectors = query_embedder(vectorstore).embed_documents(rewritten)
+
+    # 3️⃣ recall (동시)
+    categories = [
+        [c for c, _ in top_categories(q, RETRIEVE_TOP_CATEGORIES)] if RETRIEVE_FILTER_MODE == "multi" else None
+        for q in queries
+    ]
+
+    def _recall(i: int) -> list:
+        docs, _ = recall_docs(
+            vectorstore,
+            vectors[i],
+            animals[i],
+            symptoms[i],
+            fetch_k=fetch_k,
+            categories=categories[i],
+        )
+        return docs
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as ex:
+        candidates = list(ex.map(_recall, range(n)))
+
+    # 4️⃣ rerank (전체 pair 1회 predict)
+    scores = rerank_scores(rewritten, candidates, batch_size=rerank_batch_size, store=features)
+
+    results, offset = [], 0
+    for i in range(n):
+        docs = candidates[i]
+        doc_scores = scores[offset:offset + len(docs)]
+        offset += len(docs)
+
+        reranked = apply_penalties(docs, doc_scores, *symptoms[i], categories[i], store=features)
+        results.append(select_top(reranked, k, min_score, version))
+
+    return results
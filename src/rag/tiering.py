@@ -0,0 +1,178 @@
+# 답변 생성 모델 tiering
+# - 이미 계산된 signal만 사용: rerank 상위 점수 / 1·2위 점수 차 (retrieve_docs),
+#   증상 분류 confidence (triage), 대화 길이
+# - 근거가 확실한 쉬운 질의 → fast 모델 (GEN_FAST_MODEL), 나머지 → 기본 모델 (GEN_MODEL)
+# - 정책은 GEN_TIER_POLICY 로 선택, GEN_TIER_OVERRIDES (JSON) 로 개별 임계값 덮어쓰기
+# - tier별 지연 / 토큰 / 비용은 generate_* 메트릭 (/metrics)
+#
+# 정책을 바꾸기 전에 오프라인 비교로 judge 점수 확인: python3 -m evaluation.tiering (src에서)
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import GEN_FAST_MODEL, GEN_MODEL, GEN_TIER_OVERRIDES, GEN_TIER_POLICY
+from observe import metrics
+
+
+# =========================
+# 1️⃣ 정책
+# =========================
+
+# min_top: 최고 rerank 점수 (cross-encoder logit)
+# min_gap: 1·2위 rerank 점수 차 (작으면 비슷한 근거끼리 경합)
+# min_docs: rerank 후 남은 근거 수
+# min_category_conf: 증상 분류 confidence (미분류는 항상 기본 모델)
+# max_turns: 이전 대화 턴 수 (길어질수록 맥락 의존 → 기본 모델)
+# degraded_fast: 과부하 (admission degraded) 시 signal과 무관하게 fast 모델
+TIER_POLICIES: Dict[str, Optional[Dict[str, Any]]] = {
+    "off": None,
+    "conservative": {
+        "min_top": 7.0, "min_gap": 1.0, "min_docs": 3,
+        "min_category_conf": 0.8, "max_turns": 0, "degraded_fast": False,
+    },
+    "balanced": {
+        "min_top": 5.0, "min_gap": 0.5, "min_docs": 2,
+        "min_category_conf": 0.6, "max_turns": 1, "degraded_fast": True,
+    },
+    "aggressive": {
+        "min_top": 3.0, "min_gap": 0.0, "min_docs": 1,
+        "min_category_conf": 0.4, "max_turns": 2, "degraded_fast": True,
+    },
+}
+
+# USD / 1M tokens (input, output) — 비용 메트릭 / 오프라인 비교용
+MODEL_PRICES_PER_M: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+def get_policy(name: str = None) -> Optional[Dict[str, Any]]:
+    """
+    정책 이름 → 임계값 dict ("off" 이면 None = 항상 기본 모델)
+    """
+    name = name or GEN_TIER_POLICY
+    if name not in TIER_POLICIES:
+        raise ValueError(f"unknown GEN_TIER_POLICY: {name} (choose from {', '.join(TIER_POLICIES)})")
+
+    policy = TIER_POLICIES[name]
+    if policy is None:
+        return None
+    overrides = json.loads(GEN_TIER_OVERRIDES) if GEN_TIER_OVERRIDES else {}
+    return {**policy, **overrides}
+
+
+# =========================
+# 2️⃣ Signal → tier
+# =========================
+
+def tier_signals(
+    docs: list,
+    symptom: Tuple[str, float] = None,
+    history: List[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    scores = sorted(
+        (d.metadata["rerank_score"] for d in docs or [] if d.metadata.get("rerank_score") is not None),
+        reverse=True,
+    )
+    category, category_conf = symptom or ("미분류", 0.0)
+    return {
+        "top_score": round(scores[0], 3) if scores else None,
+        "gap": round(scores[0] - scores[1], 3) if len(scores) > 1 else None,
+        "n_docs": len(scores),
+        "category": category,
+        "category_conf": category_conf,
+        "turns": len(history or []),
+    }
+
+
+def choose_tier(signals: Dict[str, Any], policy: Optional[Dict[str, Any]], degraded: bool = False) -> Tuple[str, str]:
+    """
+    (tier, reason): 조건을 모두 통과하면 ("fast", "easy"),
+    아니면 처음 걸린 조건을 reason 으로 ("strong", ...)
+    """
+    if policy is None:
+        return "strong", "policy_off"
+    if degraded and policy.get("degraded_fast"):
+        return "fast", "degraded"
+
+    if signals["n_docs"] == 0:
+        return "strong", "no_evidence"
+    if signals["n_docs"] < policy["min_docs"]:
+        return "strong", "few_docs"
+    if signals["top_score"] < policy["min_top"]:
+        return "strong", "low_top"
+    # 근거가 1건뿐이면 gap 판단 불가 → min_docs 로만 제한
+    if signals["gap"] is not None and signals["gap"] < policy["min_gap"]:
+        return "strong", "small_gap"
+    if signals["category"] == "미분류" or signals["category_conf"] < policy["min_category_conf"]:
+        return "strong", "low_category_conf"
+    if signals["turns"] > policy["max_turns"]:
+        return "strong", "long_conversation"
+
+    return "fast", "easy"
+
+
+def select_model(
+    docs: list,
+    symptom: Tuple[str, float] = None,
+    history: List[Dict[str, str]] = None,
+    degraded: bool = False,
+    policy: Optional[Dict[str, Any]] = None,
+    policy_name: str = None,
+) -> Dict[str, Any]:
+    """
+    generate 직전 호출: {"tier", "model", "reason", "signals"}
+    policy 를 직접 주지 않으면 policy_name (기본 GEN_TIER_POLICY) 정책 사용
+    """
+    if policy is None:
+        policy = get_policy(policy_name)
+
+    signals = tier_signals(docs, symptom, history)
+    tier, reason = choose_tier(signals, policy, degraded)
+    metrics.incr("generate_tier", tier=tier, reason=reason)
+
+    return {
+        "tier": tier,
+        "model": GEN_FAST_MODEL if tier == "fast" else GEN_MODEL,
+        "reason": reason,
+        "signals": signals,
+    }
+
+
+# =========================
+# 3️⃣ 지연 / 비용
+# =========================
+
+def usage_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    price = MODEL_PRICES_PER_M.get(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def record_generation(
+    tier: str,
+    model: str,
+    elapsed: float,
+    usage: Dict[str, int] = None,
+    ttft: float = None,
+) -> None:
+    """
+    실제 LLM 호출 1회 기록 (replay 재사용은 기록하지 않음)
+    비용은 정수 counter 로 누적하기 위해 micro-USD 단위
+    """
+    metrics.observe("generate_latency", elapsed, tier=tier)
+    if ttft is not None:
+        metrics.observe("generate_ttft", ttft, tier=tier)
+
+    if not usage:
+        return
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    metrics.incr("generate_tokens", input_tokens, tier=tier, kind="input")
+    metrics.incr("generate_tokens", output_tokens, tier=tier, kind="output")
+
+    cost = usage_cost(model, input_tokens, output_tokens)
+    if cost is not None:
+        metrics.incr("generate_cost_microusd", int(round(cost * 1_000_000)), tier=tier)
@@ -0,0 +1,386 @@
+# 버전별 인덱스 snapshot + blue-green 전환
+# - 버전 1개 = INDEX_VERSIONS_DIR/{version}/ (spec.json, corpus.arrow, features/, 로컬 backend면 local/)
+#   + Pinecone namespace ({version} 또는 파티션별 {version}-{dog|cat|unknown})
+# - 새 버전은 서빙 중인 버전과 별개로 색인 → 문서 수 / smoke query recall 검증 → active.json 원자적 교체
+#   검증 실패 시 새 버전만 삭제 (active 는 그대로), rollback 은 previous 버전으로 다시 교체
+# - 서빙 프로세스는 active.json 변경을 감지하면 새 버전을 백그라운드에서 로드 / warm-up 한 뒤 전환
+#   (전환 전까지 기존 버전으로 응답 → 빈 인덱스 / cold load 구간 없음)
+# - 오래된 버전은 gc() 로 namespace / 디렉터리 삭제
+#
+# active.json 이 없으면 기존 단일 인덱스 (CORPUS_PATH / FEATURE_DIR / EMBEDDING_SPEC_PATH) 그대로
+# CLI: python3 reindex.py build | list | activate | rollback | gc  (src에서)
+
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import (
+    CORPUS_PATH,
+    EMBEDDING_SPEC_PATH,
+    FEATURE_DIR,
+    INDEX_ACTIVE_PATH,
+    INDEX_KEEP_VERSIONS,
+    INDEX_POINTER_CHECK_S,
+    INDEX_SMOKE_MIN_RECALL,
+    INDEX_SMOKE_QUERIES,
+    INDEX_SMOKE_TOP_K,
+    INDEX_VALIDATE_TIMEOUT_S,
+    INDEX_VERSIONS_DIR,
+    LOCAL_INDEX_DIR,
+)
+from observe import metrics
+from observe.log import get_logger
+
+log = get_logger("versions")
+
+
+# =========================
+# 1️⃣ 버전 경로 / pointer
+# =========================
+
+def new_version() -> str:
+    return datetime.now().strftime("v%Y%m%d-%H%M%S")
+
+
+def version_paths(version: Optional[str]) -> Dict[str, str]:
+    """
+    version=None → 기존 단일 인덱스 경로
+    """
+    if version is None:
+        return {
+            "dir": os.path.dirname(CORPUS_PATH),
+            "spec": EMBEDDING_SPEC_PATH,
+            "corpus": CORPUS_PATH,
+            "features": FEATURE_DIR,
+            "local": LOCAL_INDEX_DIR,
+        }
+
+    root = os.path.join(INDEX_VERSIONS_DIR, version)
+    return {
+        "dir": root,
+        "spec": os.path.join(root, "spec.json"),
+        "corpus": os.path.join(root, "corpus.arrow"),
+        "features": os.path.join(root, "features"),
+        "local": os.path.join(root, "local"),
+    }
+
+
+def namespace_for(version: str, partition: str = None) -> str:
+    return f"{version}-{partition}" if partition else version
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    # tmp 파일 + rename → 읽는 쪽은 항상 이전 또는 새 내용 전체만 봄
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def read_spec(version: str) -> Optional[Dict[str, Any]]:
+    return _read_json(version_paths(version)["spec"])
+
+
+def write_spec(version: str, spec: Dict[str, Any]) -> None:
+    _write_json(version_paths(version)["spec"], spec)
+
+
+def read_active() -> Optional[Dict[str, Any]]:
+    return _read_json(INDEX_ACTIVE_PATH)
+
+
+def active_version() -> Optional[str]:
+    pointer = read_active()
+    return pointer["version"] if pointer else None
+
+
+def activate(version: str, reason: str = "build") -> Dict[str, Any]:
+    """
+    serving pointer 교체 (검증을 통과한 버전만)
+    """
+    spec = read_spec(version)
+    if spec is None or spec.get("status") != "ready":
+        raise ValueError(f"index version {version} is not ready (spec: {version_paths(version)['spec']})")
+
+    current = active_version()
+    pointer = {
+        "version": version,
+        "previous": current if current != version else (read_active() or {}).get("previous"),
+        "activated_at": datetime.now().isoformat(timespec="seconds"),
+        "reason": reason,
+    }
+    _write_json(INDEX_ACTIVE_PATH, pointer)
+    log.info("index.activated", extra={"fields": pointer})
+    return pointer
+
+
+def rollback() -> Dict[str, Any]:
+    pointer = read_active()
+    if not pointer or not pointer.get("previous"):
+        raise ValueError("no previous index version to roll back to")
+    return activate(pointer["previous"], reason="rollback")
+
+
+def list_versions() -> List[Dict[str, Any]]:
+    """
+    최신 버전부터 (버전 이름 = 생성 시각)
+    """
+    if not os.path.isdir(INDEX_VERSIONS_DIR):
+        return []
+
+    pointer = read_active() or {}
+    versions = []
+    for name in sorted(os.listdir(INDEX_VERSIONS_DIR), reverse=True):
+        spec = read_spec(name)
+        if spec is None:
+            continue
+        role = "active" if name == pointer.get("version") else "previous" if name == pointer.get("previous") else ""
+        versions.append({
+            "version": name,
+            "role": role,
+            "status": spec.get("status"),
+            "backend": spec.get("backend"),
+            "count": spec.get("count"),
+            "created_at": spec.get("created_at"),
+        })
+    return versions
+
+
+# =========================
+# 2️⃣ 서빙 pointer (hot swap)
+# =========================
+
+class ServingPointer:
+    """
+    서빙 프로세스가 현재 사용하는 버전
+    - check_interval 마다 active.json mtime 확인 (요청 경로 비용: stat 1회 이하)
+    - 처음 로드는 동기, 이후 변경은 warmers 실행 (store 로드 + warm-up query) 후 전환
+    - warm-up 실패 시 기존 버전 유지 (active.json 이 다시 바뀔 때까지 재시도 안 함)
+    """
+
+    def __init__(self, path: str = INDEX_ACTIVE_PATH, check_interval: float = INDEX_POINTER_CHECK_S):
+        self.path = path
+        self.check_interval = check_interval
+        self.warmers: List[Callable[[Optional[str]], None]] = []
+        self._lock = threading.Lock()
+        self._serving: Optional[str] = None
+        self._target: Optional[str] = None      # 가장 최근에 요청된 전환 대상
+        self._mtime: Optional[int] = None
+        self._checked = float("-inf")
+        self._initialized = False
+
+    def add_warmer(self, fn: Callable[[Optional[str]], None]) -> None:
+        self.warmers.append(fn)
+
+    def current(self) -> Optional[str]:
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            with self._lock:
+                if now - self._checked >= self.check_interval:
+                    self._checked = now
+                    self._poll()
+        return self._serving
+
+    def _poll(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._initialized = True
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        pointer = _read_json(self.path) or {}
+        version = pointer.get("version")
+        if not self._initialized:
+            self._initialized = True
+            self._serving = version
+            metrics.set_gauge("index_activated_at", time.time())
+            return
+        self._target = version
+        if version == self._serving:
+            return
+
+        threading.Thread(target=self._swap, args=(version,), name="index-swap", daemon=True).start()
+
+    def _swap(self, version: Optional[str]) -> None:
+        started = time.perf_counter()
+        try:
+            for warm in self.warmers:
+                warm(version)
+        except Exception as e:
+            metrics.incr("index_swap", outcome="warm_failed")
+            log.error("index.swap_failed", extra={"fields": {
+                "version": version, "serving": self._serving, "error": str(e),
+            }})
+            return
+
+        if version != self._target:
+            # warm-up 도중 active.json 이 다시 바뀜 → 더 최근 전환에 맡김
+            metrics.incr("index_swap", outcome="superseded")
+            return
+
+        previous, self._serving = self._serving, version
+        metrics.incr("index_swap", outcome="ok")
+        metrics.set_gauge("index_activated_at", time.time())
+        metrics.observe("index_warm_latency", time.perf_counter() - started)
+        log.info("index.swapped", extra={"fields": {
+            "version": version, "previous": previous, "warm_s": round(time.perf_counter() - started, 2),
+        }})
+
+
+serving = ServingPointer()
+
+
+def serving_version() -> Optional[str]:
+    return serving.current()
+
+
+# =========================
+# 3️⃣ 검증
+# =========================
+
+def wait_for_counts(
+    get_counts: Callable[[], Dict[str, int]],
+    expected: Dict[str, int],
+    timeout: float = INDEX_VALIDATE_TIMEOUT_S,
+    interval: float = 2.0,
+) -> Dict[str, int]:
+    """
+    namespace별 벡터 수가 기대값과 같아질 때까지 대기 (Pinecone 집계는 비동기 반영)
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        counts = get_counts()
+        if all(counts.get(k, 0) == v for k, v in expected.items()) or time.monotonic() >= deadline:
+            return counts
+        time.sleep(interval)
+
+
+def smoke_recall(
+    store,
+    corpus,
+    n: int = INDEX_SMOKE_QUERIES,
+    k: int = INDEX_SMOKE_TOP_K,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    corpus 에서 문서 n개를 뽑아 그 질문으로 검색 → 자기 문서가 top-k 안에 있는 비율
+    (임베딩 불일치 / namespace 누락 / hydrate 실패 등을 서빙 전에 잡기 위한 용도)
+    """
+    ids = corpus.table.column("doc_id").to_pylist()
+    questions = corpus.table.column("question").to_pylist()
+    sample = random.Random(seed).sample(range(len(ids)), min(n, len(ids)))
+
+    hits, misses = 0, []
+    for row in sample:
+        results = store.similarity_search(questions[row], k=k)
+        if ids[row] in {d.metadata.get("doc_id") for d in results}:
+            hits += 1
+        elif len(misses) < 10:
+            misses.append(ids[row])
+
+    return {
+        "queries": len(sample),
+        "k": k,
+        "recall": round(hits / len(sample), 3) if sample else 0.0,
+        "misses": misses,
+    }
+
+
+def validate(
+    spec: Dict[str, Any],
+    store,
+    corpus,
+    counts: Dict[str, int],
+    min_recall: float = INDEX_SMOKE_MIN_RECALL,
+    **smoke_kwargs,
+) -> Dict[str, Any]:
+    """
+    counts: 실제 namespace(로컬: 파티션)별 벡터 수
+    """
+    expected = spec["expected"]
+    count_ok = all(counts.get(k, 0) == v for k, v in expected.items()) and len(corpus) == spec["count"]
+    smoke = smoke_recall(store, corpus, **smoke_kwargs)
+
+    report = {
+        "ok": count_ok and smoke["recall"] >= min_recall,
+        "counts": {"expected": expected, "actual": counts, "corpus": len(corpus), "ok": count_ok},
+        "smoke": {**smoke, "min_recall": min_recall},
+    }
+    log.info("index.validated", extra={"fields": {"version": spec["version"], **report}})
+    return report
+
+
+# =========================
+# 4️⃣ 삭제 / GC
+# =========================
+
+def _pinecone_index():
+    from pinecone import Pinecone
+    from config import PINECONE_API_KEY, PINECONE_INDEX
+
+    return Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+
+
+def _version_namespaces(version: str, spec: Dict[str, Any], index) -> List[str]:
+    """
+    spec 에 기록된 namespace + 버전 이름에서 유도되는 namespace ({version}, {version}-{partition}) 중
+    인덱스에 실제로 있는 것 — 업로드 도중 실패해 spec 갱신 전이어도 올라간 벡터를 남기지 않도록
+    """
+    from rag.partitions import PARTITIONS
+
+    candidates = set((spec.get("namespaces") or {}).values())
+    candidates |= {namespace_for(version)} | {namespace_for(version, p) for p in PARTITIONS}
+    existing = index.describe_index_stats()["namespaces"] or {}
+    return sorted(ns for ns in candidates if ns and ns in existing)
+
+
+def discard(version: str, index=None) -> None:
+    """
+    버전의 namespace + 디렉터리 삭제 (active / previous 는 거부)
+    """
+    pointer = read_active() or {}
+    if version in (pointer.get("version"), pointer.get("previous")):
+        raise ValueError(f"refusing to delete {version}: referenced by {INDEX_ACTIVE_PATH}")
+
+    spec = read_spec(version) or {}
+    if spec.get("backend") == "pinecone":
+        index = index or _pinecone_index()
+        for namespace in _version_namespaces(version, spec, index):
+            index.delete(delete_all=True, namespace=namespace)
+
+    shutil.rmtree(version_paths(version)["dir"], ignore_errors=True)
+    log.info("index.discarded", extra={"fields": {"version": version}})
+
+
+def gc(keep: int = INDEX_KEEP_VERSIONS, index=None, dry_run: bool = False) -> List[str]:
+    """
+    ready 버전 중 최신 keep 개 + active / previous 를 제외하고 삭제
+    (중단된 build 처럼 ready 가 아닌 버전은 항상 삭제 대상 → build 와 동시에 실행하지 말 것)
+    """
+    pointer = read_active() or {}
+    protected = {pointer.get("version"), pointer.get("previous")}
+    versions = list_versions()
+    kept = {v["version"] for v in versions if v["status"] == "ready"}
+    kept = set(sorted(kept, reverse=True)[:keep])
+
+    doomed = [v["version"] for v in versions if v["version"] not in protected | kept]
+    if not dry_run:
+        for version in doomed:
+            discard(version, index)
+    return doomed
@@ -0,0 +1,233 @@
+# 무중단 재색인 (버전별 인덱스 snapshot + blue-green 전환, rag/versions.py)
+# - 기존 방식 (ex.py 로 인덱스 전체 삭제 → ingest.py) 은 재색인 동안 검색 결과가 비거나 일부만 나옴
+# - build: 새 버전 namespace / corpus / feature 생성 → 문서 수 + smoke query recall 검증
+#          → 통과하면 active.json 교체 (서빙 프로세스가 warm-up 후 전환), 실패하면 새 버전만 삭제
+# - VECTOR_BACKEND=local 이면 Pinecone 대신 버전 디렉터리의 로컬 인덱스
+#
+# 사용법 (src에서):
+#   python3 reindex.py build --csv data.csv [--partitioned] [--provider local]
+#   python3 reindex.py list
+#   python3 reindex.py rollback
+#   python3 reindex.py activate v20261019-153000
+#   python3 reindex.py gc [--keep 2] [--dry-run]
+
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from config import (
+    INDEX_KEEP_VERSIONS,
+    INDEX_SMOKE_MIN_RECALL,
+    INDEX_SMOKE_QUERIES,
+    PARTITION_BY_ANIMAL,
+    PINECONE_API_KEY,
+    PINECONE_INDEX,
+    VECTOR_BACKEND,
+)
+from ingest import (
+    build_corpus,
+    build_features,
+    check_dimension,
+    ingest_local,
+    load_documents,
+    upload_documents,
+)
+from observe.log import get_logger
+from rag import versions
+from rag.embeddings import embedding_spec, get_embeddings
+from rag.partitions import split_by_partition
+
+log = get_logger("reindex")
+
+
+# =========================
+# 1️⃣ 새 버전 색인
+# =========================
+
+def _index_new_version(version: str, spec: Dict[str, Any], csv_path: str, provider, partitioned: bool, index):
+    """
+    corpus / feature / 벡터 생성 → (spec 갱신분, 실제 벡터 수 조회 함수)
+    """
+    paths = versions.version_paths(version)
+
+    docs = load_documents(csv_path)
+    build_features(docs, paths["features"])
+    build_corpus(docs, paths["corpus"])
+
+    embeddings = get_embeddings(provider)
+    emb_spec = embedding_spec(embeddings)
+    sizes = {name: len(group) for name, group in split_by_partition(docs).items()} if partitioned else None
+
+    if spec["backend"] == "local":
+        store = ingest_local(
+            index_dir=paths["local"],
+            embeddings=embeddings,
+            feature_dir=paths["features"],
+            corpus_path=paths["corpus"],
+            partitioned=partitioned,
+            docs=docs,
+        )
+        expected = {k: n for k, n in (sizes or {"": len(docs)}).items() if n}
+        if partitioned:
+            get_counts = lambda: {name: len(s) for name, s in store.stores.items()}
+        else:
+            get_counts = lambda: {"": len(store)}
+        namespaces = None
+    else:
+        check_dimension(index, emb_spec)
+        # 업로드 전에 namespace 기록 → 도중에 실패해도 discard / gc 가 찾아서 삭제
+        planned = {k: versions.namespace_for(version, k or None) for k in (sizes or {"": None})}
+        versions.write_spec(version, {**spec, **emb_spec, "namespaces": planned})
+        namespaces = upload_documents(index, embeddings, docs, partitioned, paths["corpus"], version)
+        expected = {namespaces[k]: n for k, n in (sizes or {"": len(docs)}).items() if n}
+        get_counts = lambda: {
+            ns: int(stats["vector_count"])
+            for ns, stats in index.describe_index_stats()["namespaces"].items()
+            if ns in expected
+        }
+
+    return {
+        **emb_spec,
+        "count": len(docs),
+        "partitions": sizes,
+        "namespaces": namespaces,
+        "expected": expected,
+    }, get_counts
+
+
+def build(
+    csv_path: str,
+    provider: str = None,
+    partitioned: bool = PARTITION_BY_ANIMAL,
+    min_recall: float = INDEX_SMOKE_MIN_RECALL,
+    smoke_queries: int = INDEX_SMOKE_QUERIES,
+    keep: int = INDEX_KEEP_VERSIONS,
+    activate: bool = True,
+) -> Dict[str, Any]:
+    """
+    새 버전 색인 → 검증 → (activate 면) 전환 → GC
+    검증 실패 / 예외 시 새 버전 삭제, active 버전은 그대로
+    """
+    from rag.corpus import corpus_for
+    from rag.retriever import load_vectorstore
+
+    if VECTOR_BACKEND not in ("pinecone", "pinecone_ids", "local"):
+        raise ValueError(f"versioned reindex does not support VECTOR_BACKEND={VECTOR_BACKEND}")
+
+    version = versions.new_version()
+    backend = "local" if VECTOR_BACKEND == "local" else "pinecone"
+    index = None
+    if backend == "pinecone":
+        from pinecone import Pinecone
+        index = Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+
+    # 먼저 building 상태로 기록 → 중간에 죽어도 gc 가 정리
+    spec = {
+        "version": version,
+        "status": "building",
+        "backend": backend,
+        "vector_backend": VECTOR_BACKEND,
+        "index": PINECONE_INDEX if backend == "pinecone" else None,
+        "csv": csv_path,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    versions.write_spec(version, spec)
+    log.info("reindex.started", extra={"fields": {"version": version, "backend": backend, "partitioned": partitioned}})
+
+    try:
+        built, get_counts = _index_new_version(version, spec, csv_path, provider, partitioned, index)
+        spec.update(built)
+        versions.write_spec(version, spec)
+
+        counts = versions.wait_for_counts(get_counts, spec["expected"]) if backend == "pinecone" else get_counts()
+        report = versions.validate(
+            spec,
+            load_vectorstore(version),
+            corpus_for(version),
+            counts,
+            min_recall=min_recall,
+            n=smoke_queries,
+        )
+    except Exception as e:
+        log.error("reindex.failed", extra={"fields": {"version": version, "error": str(e)}})
+        versions.discard(version, index)
+        raise
+
+    if not report["ok"]:
+        log.error("reindex.validation_failed", extra={"fields": {"version": version, **report}})
+        versions.discard(version, index)
+        return {"version": version, "activated": False, "validation": report}
+
+    spec.update(status="ready", validation=report)
+    versions.write_spec(version, spec)
+
+    pointer = versions.activate(version) if activate else None
+    removed = versions.gc(keep, index) if activate else []
+
+    return {
+        "version": version,
+        "activated": pointer is not None,
+        "previous": (pointer or {}).get("previous"),
+        "validation": report,
+        "gc_removed": removed,
+    }
+
+
+# =========================
+# 2️⃣ CLI
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description="PetDoctor versioned reindex (blue-green)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_build = sub.add_parser("build", help="새 버전 색인 + 검증 + 전환")
+    p_build.add_argument("--csv", default="/home/ys0660/happycat/data/data.csv")
+    p_build.add_argument("--provider", choices=["openai", "local"], default=None,
+                         help="임베딩 provider (기본 EMBEDDING_PROVIDER, 서버도 같은 값으로 실행)")
+    p_build.add_argument("--partitioned", action="store_true", default=PARTITION_BY_ANIMAL)
+    p_build.add_argument("--min-recall", type=float, default=INDEX_SMOKE_MIN_RECALL)
+    p_build.add_argument("--smoke-queries", type=int, default=INDEX_SMOKE_QUERIES)
+    p_build.add_argument("--keep", type=int, default=INDEX_KEEP_VERSIONS)
+    p_build.add_argument("--no-activate", action="store_true", help="검증까지만 (activate 로 나중에 전환)")
+
+    sub.add_parser("list", help="버전 목록")
+
+    p_act = sub.add_parser("activate", help="ready 버전으로 전환")
+    p_act.add_argument("version")
+
+    sub.add_parser("rollback", help="previous 버전으로 전환")
+
+    p_gc = sub.add_parser("gc", help="오래된 버전 namespace / 디렉터리 삭제")
+    p_gc.add_argument("--keep", type=int, default=INDEX_KEEP_VERSIONS)
+    p_gc.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        result = build(
+            args.csv,
+            provider=args.provider,
+            partitioned=args.partitioned,
+            min_recall=args.min_recall,
+            smoke_queries=args.smoke_queries,
+            keep=args.keep,
+            activate=not args.no_activate,
+        )
+    elif args.cmd == "list":
+        result = {"active": versions.read_active(), "versions": versions.list_versions()}
+    elif args.cmd == "activate":
+        result = versions.activate(args.version, reason="manual")
+    elif args.cmd == "rollback":
+        result = versions.rollback()
+    else:
+        result = {"removed": versions.gc(args.keep, dry_run=args.dry_run), "dry_run": args.dry_run}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.cmd == "build" and not result["validation"]["ok"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
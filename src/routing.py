@@ -0,0 +1,103 @@
+# 질의 유형 분류 + 그래프 조건부 라우팅
+# (이미 계산되는 cheap signal만 사용: animal / symptom category / rerank score)
+
+from typing import Any, Dict, Tuple
+
+from categorize import categorize_text, rule_based_scores
+from ingest import detect_animal
+from observe import metrics
+
+
+# =========================
+# 1️⃣ 잡담 / 비관련 질의
+# =========================
+
+GREETING_KEYWORDS = [
+    "안녕", "하이", "반가", "고마", "감사", "수고", "잘자", "ㅎㅎ", "ㅋㅋ", "hello", "hi",
+]
+
+# 짧은 인사말만 잡담으로 간주
+CHITCHAT_MAX_LEN = 15
+
+# 미분류 + SBERT 유사도가 이보다 낮으면 반려동물 의료와 무관한 질의로 간주
+OFFTOPIC_MAX_CONF = 0.25
+
+DIRECT_RESPONSES: Dict[str, str] = {
+    "chitchat": (
+        "안녕하세요! 반려동물 건강 상담 AI입니다. "
+        "강아지나 고양이의 증상이나 궁금한 점을 편하게 말씀해 주세요."
+    ),
+    "offtopic": (
+        "죄송하지만 반려동물 건강과 관련된 질문에만 답변드릴 수 있어요. "
+        "반려동물의 종류와 증상을 함께 알려주시면 더 정확히 안내해 드릴게요."
+    ),
+}
+
+
+def classify_query(
+    question: str,
+    has_history: bool = False,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    질의 유형 판단: "pet" | "chitchat" | "offtopic"
+    - 함께 계산한 animal / symptom 을 signals로 반환 (retrieve에서 재사용)
+    - 멀티턴 후속 질문은 항상 "pet"
+    """
+    text = question.strip()
+    animal = detect_animal(question=text)
+    rule_hits = sum(rule_based_scores(text).values())
+
+    signals: Dict[str, Any] = {"animal": animal}
+
+    if not has_history and rule_hits == 0 and animal == "unknown":
+        lowered = text.lower()
+        if len(text) <= CHITCHAT_MAX_LEN and any(kw in lowered for kw in GREETING_KEYWORDS):
+            return "chitchat", signals
+
+    signals["symptom"] = categorize_text(text)
+    symptom_category, symptom_conf = signals["symptom"]
+
+    if (
+        not has_history
+        and rule_hits == 0
+        and animal == "unknown"
+        and symptom_category == "미분류"
+        and symptom_conf < OFFTOPIC_MAX_CONF
+    ):
+        return "offtopic", signals
+
+    return "pet", signals
+
+
+# =========================
+# 2️⃣ 조건부 edge 함수
+# =========================
+
+def _route(stage: str, route: str) -> str:
+    metrics.incr("graph_route", stage=stage, route=route)
+    return route
+
+
+def route_after_triage(s: Dict[str, Any]) -> str:
+    if s.get("emergency_type"):
+        return _route("triage", "emergency")
+    if s.get("query_type") in DIRECT_RESPONSES:
+        return _route("triage", "direct")
+    return _route("triage", "retrieve")
+
+
+def route_after_retrieve(s: Dict[str, Any]) -> str:
+    # 근거가 없으면 citation 단계를 건너뛰고 바로 생성
+    if not s.get("docs"):
+        return _route("retrieve", "generate")
+    return _route("retrieve", "cite")
+
+
+def route_after_safety(s: Dict[str, Any]) -> str:
+    # 인용 근거가 없으면 judge 생략 (evidence_score 산정 불가)
+    if not s.get("citations"):
+        return _route("safety", "postprocess")
+    # 과부하 (admission degraded) 시 judge 생략
+    if s.get("degraded"):
+        return _route("safety", "postprocess_degraded")
+    return _route("safety", "judge")
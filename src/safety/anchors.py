@@ -0,0 +1,77 @@
+# 응급 키워드 앵커 매칭 (safety/triage.py rule 단계)
+# - 앵커 바로 뒤 서술어가 그 증상을 부정 ("경련은 없고", "발작은 안 해요") 하거나
+#   허용 여부를 묻는 질문 ("초콜릿 먹어도 되나요", "포도를 먹여도 되나요") 안에 있으면 응급으로 보지 않음
+# - 모델 의존성 없는 순수 rule (테스트 / 재사용용으로 triage.py 에서 분리)
+
+import re
+from typing import Dict, List, Tuple
+
+
+EMERGENCY_ANCHORS: Dict[str, list] = {
+    "경련": ["경련", "발작", "간질", "거품을 물", "쓰러졌", "의식이 없", "의식을 잃"],
+    "중독": ["중독", "초콜릿", "초콜렛", "자일리톨", "포도를 먹", "양파를 먹", "쥐약", "살충제", "부동액", "세제를 먹"],
+    "출혈": ["출혈", "피를 토", "피를 흘", "피가 멈추지 않", "피가 계속", "혈변", "피오줌"],
+    "호흡곤란": ["호흡곤란", "숨을 못", "숨을 헐떡", "숨쉬기 힘들", "혀가 파랗", "잇몸이 파랗", "잇몸이 하얗"],
+    "외상": ["교통사고", "차에 치", "추락", "뼈가 튀어", "물렸는데 피"],
+}
+
+# 앵커 뒤 같은 절 안에서만 판단 (다음 절의 "안 먹어요" 등은 무시)
+CLAUSE_WINDOW = 15
+_CLAUSE_END_RE = re.compile(r"[,.?!~\n]|고\s|는데|지만|서\s")
+
+# 증상 자체를 부정하는 서술어만: 앵커 직후 (조사 / 부사) + 없 / 아니 / 안 해 / 하지 않
+# 절 안 아무 데나 있는 "않" 은 보지 않음 ("숨을 헐떡이며 일어나지 않아요" 는 응급)
+# (앵커 자체가 부정 표현인 "의식이 없" 등은 앵커 뒤부터 보므로 영향 없음)
+_NEGATION_RE = re.compile(
+    r"^\s*(은|는|이|가|도|을|를)?\s*(전혀|아직|별로|따로)?\s*"
+    r"(없|아니|안\s*(해|했|하|보|나|생|일|있|먹|줬)|(하|했|먹|먹이|보이)?지\s*(는|도|은)?\s*않)"
+)
+
+# 증상이 계속된다는 표현 → 부정이 아니라 응급 ("출혈이 멈추지 않아요", "경련이 그치지 않아요")
+_CONTINUATION_RE = re.compile(r"(멈추|멈|그치|멎|가라앉)지\s*(는|도|가)?\s*않|계속")
+
+# 먹어도 / 먹여도 / 줘도 / 해도 + 되나요·돼요·괜찮나요, 먹으면 안 되나요
+_PERMISSION_RE = re.compile(r"(어도|여도|아도|워도|해도|줘도)\s*(되|돼|괜찮)|(으면|면)\s*안\s*(되|돼)")
+
+
+def _clause_after(text: str, end: int) -> str:
+    tail = text[end:end + CLAUSE_WINDOW]
+    m = _CLAUSE_END_RE.search(tail)
+    return tail[:m.start()] if m else tail
+
+
+def anchor_hits(text: str) -> List[Tuple[str, str, str]]:
+    """
+    앵커 등장마다 (응급 유형, 앵커, 판정) — 판정: "hit" | "negated" | "question"
+    """
+    hits = []
+    for etype, keywords in EMERGENCY_ANCHORS.items():
+        for kw in keywords:
+            start = text.find(kw)
+            while start != -1:
+                clause = _clause_after(text, start + len(kw))
+                if _CONTINUATION_RE.search(clause):
+                    verdict = "hit"
+                elif _NEGATION_RE.search(clause):
+                    verdict = "negated"
+                elif _PERMISSION_RE.search(clause):
+                    verdict = "question"
+                else:
+                    verdict = "hit"
+                hits.append((etype, kw, verdict))
+                start = text.find(kw, start + len(kw))
+    return hits
+
+
+def rule_scores(text: str) -> Tuple[Dict[str, int], int]:
+    """
+    (유형별 유효 앵커 수, 부정 / 질문으로 제외된 앵커 수)
+    """
+    scores = {etype: 0 for etype in EMERGENCY_ANCHORS}
+    suppressed = 0
+    for etype, _, verdict in anchor_hits(text):
+        if verdict == "hit":
+            scores[etype] += 1
+        else:
+            suppressed += 1
+    return scores, suppressed
@@ -1,10 +1,196 @@
+# 답변 안전성 가드레일 (스트리밍 대응 rule engine)
+import json
+import os
+import re
+from collections import deque
+from typing import Dict, List, Optional
+
+from observe import metrics
+
+
+SAFE_FALLBACK = (
+    "의학적 판단은 개별 상황에 따라 다를 수 있으므로 "
+    "가까운 동물병원 상담을 권장드립니다."
+)
+
+
+# =========================
+# 1️⃣ 기본 Rule set
+# =========================
+# type   : "phrase" (부분 문자열) | "regex"
+# action : "block" (답변 차단, 생성 중단) | "flag" (기록만)
+
+DEFAULT_RULES: List[Dict] = [
+    {
+        "name": "overconfident",
+        "type": "phrase",
+        "patterns": ["확실히", "무조건", "100%"],
+        "action": "block",
+    },
+    {
+        "name": "human_drug_dosage",
+        "type": "regex",
+        "patterns": [r"(타이레놀|아세트아미노펜|이부프로펜)[^.\n]{0,20}\d+\s*(mg|밀리그램|알)"],
+        "action": "block",
+    },
+    {
+        "name": "emergency",
+        "type": "phrase",
+        "patterns": ["경련", "발작", "호흡곤란", "중독", "출혈", "의식"],
+        "action": "flag",
+    },
+]
+
+# regex는 청크 경계를 넘는 매치를 위해 최근 N글자를 함께 검사
+REGEX_WINDOW = 64
+
+
+def load_rules(path: Optional[str] = None) -> List[Dict]:
+    """
+    GUARDRAIL_RULES_PATH(JSON list)가 있으면 해당 rule set 사용
+    """
+    path = path or os.getenv("GUARDRAIL_RULES_PATH")
+    if not path:
+        return DEFAULT_RULES
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =========================
+# 2️⃣ Rule 컴파일 (Aho-Corasick + 통합 regex)
+# =========================
+
+class CompiledRules:
+    """
+    phrase rule → 하나의 Aho-Corasick 오토마톤
+    regex rule  → named group으로 묶은 하나의 정규식
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.actions: Dict[str, str] = {r["name"]: r.get("action", "block") for r in rules}
+
+        # goto / fail / output 테이블
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[str]] = [[]]
+
+        regex_parts = []
+        self.group_to_rule: Dict[str, str] = {}
+
+        for rule in rules:
+            if rule.get("type", "phrase") == "regex":
+                for pattern in rule["patterns"]:
+                    group = f"r{len(self.group_to_rule)}"
+                    self.group_to_rule[group] = rule["name"]
+                    regex_parts.append(f"(?P<{group}>{pattern})")
+            else:
+                for phrase in rule["patterns"]:
+                    self._add_phrase(phrase, rule["name"])
+
+        self._build_fail_links()
+        self.regex = re.compile("|".join(regex_parts)) if regex_parts else None
+
+    def _add_phrase(self, phrase: str, rule_name: str) -> None:
+        state = 0
+        for ch in phrase:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        if rule_name not in self.out[state]:
+            self.out[state].append(rule_name)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + [
+                    r for r in self.out[self.fail[nxt]] if r not in self.out[nxt]
+                ]
+
+    def step(self, state: int, ch: str) -> int:
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+
+_compiled: Optional[CompiledRules] = None
+
+
+def get_rules() -> CompiledRules:
+    global _compiled
+    if _compiled is None:
+        _compiled = CompiledRules(load_rules())
+    return _compiled
+
+
+# =========================
+# 3️⃣ 스트리밍 검사기
+# =========================
+
+class GuardrailStream:
+    """
+    토큰(청크) 단위 점진 검사
+    - feed(chunk) → block rule이 걸리면 rule 이름 반환 (생성 중단 신호)
+    - hits: 이번 답변에서 걸린 rule 목록 (rule당 1회)
+    """
+
+    def __init__(self, rules: CompiledRules = None):
+        self.rules = rules or get_rules()
+        self.state = 0
+        self.tail = ""
+        self.hits: List[str] = []
+        self.blocked_by: Optional[str] = None
+
+    def _hit(self, rule_name: str) -> None:
+        if rule_name in self.hits:
+            return
+        self.hits.append(rule_name)
+        metrics.incr("guardrail_hits", rule=rule_name)
+        if self.blocked_by is None and self.rules.actions.get(rule_name) == "block":
+            self.blocked_by = rule_name
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.blocked_by:
+            return self.blocked_by
+
+        for ch in chunk:
+            self.state = self.rules.step(self.state, ch)
+            for rule_name in self.rules.out[self.state]:
+                self._hit(rule_name)
+
+        if self.rules.regex is not None:
+            window = self.tail + chunk
+            for m in self.rules.regex.finditer(window):
+                self._hit(self.rules.group_to_rule[m.lastgroup])
+            self.tail = window[-REGEX_WINDOW:]
+
+        return self.blocked_by
+
+    @property
+    def blocked(self) -> bool:
+        return self.blocked_by is not None
+
+
+# =========================
+# 4️⃣ 전체 답변 검사 (비스트리밍 경로)
+# =========================
+
 def apply_guardrail(answer):
-    risky_phrases = ["확실히", "무조건", "100%"]
-
-    for p in risky_phrases:
-        if p in answer:
-            return (
-                "의학적 판단은 개별 상황에 따라 다를 수 있으므로 "
-                "가까운 동물병원 상담을 권장드립니다."
-            )
+    guard = GuardrailStream()
+    guard.feed(answer)
+
+    if guard.blocked:
+        return SAFE_FALLBACK
     return answer
@@ -0,0 +1,163 @@
+# 응급 상황 triage (Rule + SBERT) → 전체 RAG 우회 fast path
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sentence_transformers import util
+
+from categorize import embedder, encode_text
+from config import EMERGENCY_SBERT_THRESHOLD
+from observe import metrics
+from safety.anchors import rule_scores
+
+
+# =========================
+# 1️⃣ 응급 키워드 앵커 (safety/anchors.py)
+# =========================
+
+# =========================
+# 2️⃣ SBERT 응급 프로토타입 (보조용)
+# =========================
+
+EMERGENCY_PROTOTYPES: Dict[str, str] = {
+    "경련": "반려동물이 갑자기 몸을 떨며 쓰러지고 경련을 일으켜요",
+    "중독": "반려동물이 먹으면 안 되는 음식이나 약, 독성 물질을 먹었어요",
+    "출혈": "반려동물이 피를 많이 흘리거나 피를 토해요",
+    "호흡곤란": "반려동물이 숨을 제대로 못 쉬고 헐떡이며 호흡이 힘들어 보여요",
+    "외상": "반려동물이 사고를 당해 크게 다쳤어요",
+}
+
+PROTOTYPE_EMBEDS = {
+    etype: embedder.encode(desc, convert_to_tensor=True)
+    for etype, desc in EMERGENCY_PROTOTYPES.items()
+}
+
+
+# =========================
+# 3️⃣ 사전 승인된 응급 안내 템플릿
+# =========================
+
+_COMMON_NOTICE = (
+    "\n\n지금은 온라인 상담보다 병원 진료가 우선입니다. "
+    "가까운 동물병원이나 24시 응급 동물병원에 즉시 연락 후 내원해 주세요. "
+    "이동 중에는 반려동물을 담요 등으로 감싸 체온을 유지하고 최대한 안정시켜 주세요."
+)
+
+EMERGENCY_TEMPLATES: Dict[str, str] = {
+    "경련": (
+        "경련이나 발작, 의식 저하는 응급 상황일 수 있습니다.\n"
+        "- 주변의 위험한 물건을 치우고, 입 안에 손이나 물건을 넣지 마세요.\n"
+        "- 발작 시작 시각과 지속 시간을 기록하고, 가능하면 영상으로 남겨 주세요.\n"
+        "- 5분 이상 지속되거나 반복되면 지체 없이 병원으로 이동하세요."
+    ),
+    "중독": (
+        "독성 물질 섭취가 의심되는 응급 상황입니다.\n"
+        "- 임의로 구토를 유도하거나 우유, 소금물 등을 먹이지 마세요.\n"
+        "- 먹은 물질의 포장지, 성분, 양, 섭취 시각을 확인해 병원에 알려 주세요.\n"
+        "- 증상이 없어 보여도 시간이 지나며 나타날 수 있으니 바로 병원에 연락하세요."
+    ),
+    "출혈": (
+        "출혈이 있는 응급 상황일 수 있습니다.\n"
+        "- 외부 출혈은 깨끗한 거즈나 수건으로 상처 부위를 지그시 눌러 지혈해 주세요.\n"
+        "- 피를 토하거나 혈변, 피오줌이 보이면 사진을 찍어 병원에 보여 주세요.\n"
+        "- 잇몸이 창백하거나 기운이 급격히 떨어지면 매우 위급한 신호입니다."
+    ),
+    "호흡곤란": (
+        "호흡곤란은 즉각적인 처치가 필요한 응급 상황일 수 있습니다.\n"
+        "- 목줄, 하네스 등 목과 가슴을 조이는 것을 풀어 주세요.\n"
+        "- 시원하고 조용한 곳에서 안정시키고, 억지로 물이나 음식을 주지 마세요.\n"
+        "- 혀나 잇몸이 파랗거나 하얗게 변하면 매우 위급한 신호입니다."
+    ),
+    "외상": (
+        "사고로 인한 외상은 겉으로 멀쩡해 보여도 내부 손상이 있을 수 있습니다.\n"
+        "- 통증으로 물 수 있으니 조심해서 다루고, 몸을 평평하게 받쳐 이동하세요.\n"
+        "- 출혈 부위는 깨끗한 천으로 눌러 지혈해 주세요.\n"
+        "- 골절이 의심되는 부위는 억지로 펴거나 움직이지 마세요."
+    ),
+}
+
+
+def emergency_response(emergency_type: str) -> str:
+    return EMERGENCY_TEMPLATES[emergency_type] + _COMMON_NOTICE
+
+
+# =========================
+# 4️⃣ 응급 분류 (Rule 우선, SBERT 보조)
+# =========================
+
+def detect_emergency(
+    text: str,
+    sbert_threshold: float = EMERGENCY_SBERT_THRESHOLD,
+) -> Tuple[Optional[str], float]:
+    """
+    응급 여부 판단
+    - Rule-based: 부정 / 허용 질문이 아닌 응급 앵커가 하나라도 있으면 확정
+    - 앵커가 모두 부정 / 질문 안에 있으면 ("경련은 없고", "초콜릿 먹어도 되나요") rule 로 확정하지 않음
+    - SBERT fallback: 응급 프로토타입과의 유사도 (rule 이 억제된 경우도 포함 — rule 오판으로 응급을 놓치지 않도록)
+    응급이 아니면 (None, score)
+    """
+
+    scores, suppressed = rule_scores(text)
+    best_type = max(scores, key=scores.get)
+
+    if scores[best_type] > 0:
+        metrics.incr("triage", result="rule")
+        return best_type, 1.0
+
+    if suppressed:
+        metrics.incr("triage", result="rule_suppressed")
+
+    text_embed = encode_text(text)
+    scores = {
+        etype: util.cos_sim(text_embed, proto).item()
+        for etype, proto in PROTOTYPE_EMBEDS.items()
+    }
+    best_type = max(scores, key=scores.get)
+    best_score = round(scores[best_type], 3)
+
+    if best_score >= sbert_threshold:
+        metrics.incr("triage", result="sbert")
+        return best_type, best_score
+
+    metrics.incr("triage", result="normal")
+    return None, best_score
+
+
+# =========================
+# 5️⃣ 백그라운드 근거 보강 (선택)
+# =========================
+
+_enrich_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="triage-enrich")
+_enrich_lock = threading.Lock()
+_enrichments: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+MAX_ENRICHMENTS = 1024
+
+
+def _store_enrichment(request_id: str, value: Dict[str, Any]) -> None:
+    with _enrich_lock:
+        _enrichments[request_id] = value
+        _enrichments.move_to_end(request_id)
+        while len(_enrichments) > MAX_ENRICHMENTS:
+            _enrichments.popitem(last=False)
+
+
+def submit_enrichment(request_id: str, fn: Callable[[], Dict[str, Any]]) -> None:
+    """
+    응급 응답을 먼저 반환한 뒤, 근거 검색은 백그라운드에서 수행
+    """
+    _store_enrichment(request_id, {"status": "pending"})
+
+    def _run():
+        try:
+            _store_enrichment(request_id, {"status": "done", **fn()})
+        except Exception as e:
+            _store_enrichment(request_id, {"status": "error", "error": str(e)})
+
+    _enrich_executor.submit(_run)
+
+
+def get_enrichment(request_id: str) -> Optional[Dict[str, Any]]:
+    with _enrich_lock:
+        return _enrichments.get(request_id)
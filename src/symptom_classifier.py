@@ -0,0 +1,432 @@
+# 경량 증상 카테고리 분류기 (categorize.py 의 SBERT fallback 대체)
+# - 문자 n-gram (1~3) hashing → 다항 로지스틱 회귀 (numpy, 외부 ML 의존성 없음)
+# - 학습 데이터: ingest 된 corpus 에서 rule 로 확정되는 행 + 사람이 수정한 라벨 (corrections)
+# - 가중치는 .npy 로 저장, mmap 로드 (import / 로드 시 모델 계산 없음), batch 추론은 행렬 연산 1회
+#
+# 학습 + 평가 리포트 (src 에서):
+#   python3 symptom_classifier.py train --out ../data/index/symptom_clf --report clf_report.json
+#   python3 symptom_classifier.py eval --report clf_report.json
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import SYMPTOM_CLF_DIR, SYMPTOM_CORRECTIONS_PATH
+
+
+N_FEATURES = 2 ** 18
+NGRAM_RANGE = (1, 3)
+UNCLASSIFIED = "미분류"
+
+_WS_RE = re.compile(r"\s+")
+
+
+# =========================
+# 1️⃣ Feature (문자 n-gram hashing)
+# =========================
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+    text = f" {_WS_RE.sub(' ', text.lower()).strip()} "
+    lo, hi = ngram_range
+    return [text[i:i + n] for n in range(lo, hi + 1) for i in range(len(text) - n + 1)]
+
+
+def _hash_row(text: str, n_features: int, ngram_range: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # crc32: 프로세스마다 바뀌는 hash() 대신 학습 / 서빙 간 고정된 hash
+    ids = np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in char_ngrams(text, ngram_range)),
+        dtype=np.int64,
+    ) % n_features
+    idx, counts = np.unique(ids, return_counts=True)
+    values = 1.0 + np.log(counts.astype(np.float32))
+    values /= np.linalg.norm(values)
+    return idx, values.astype(np.float32)
+
+
+def featurize(
+    texts: Iterable[str],
+    n_features: int = N_FEATURES,
+    ngram_range: Tuple[int, int] = NGRAM_RANGE,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    texts → CSR (indptr, indices, values), 행마다 sublinear tf + L2 정규화
+    """
+    rows = [_hash_row(t, n_features, ngram_range) for t in texts]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(idx) for idx, _ in rows])
+    if not rows:
+        return indptr, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    return (
+        indptr,
+        np.concatenate([idx for idx, _ in rows]),
+        np.concatenate([v for _, v in rows]),
+    )
+
+
+def _logits(W: np.ndarray, b: np.ndarray, X: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> np.ndarray:
+    indptr, indices, values = X
+    # 행마다 최소 1개 n-gram (앞뒤 공백 padding) → reduceat 빈 구간 없음
+    contrib = np.asarray(W[indices]) * values[:, None]
+    return np.add.reduceat(contrib, indptr[:-1], axis=0) + b
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+# =========================
+# 2️⃣ 모델
+# =========================
+
+class SymptomClassifier:
+
+    def __init__(self, W: np.ndarray, b: np.ndarray, labels: List[str], ngram_range=NGRAM_RANGE, meta=None):
+        self.W = W
+        self.b = b
+        self.labels = labels
+        self.n_features = W.shape[0]
+        self.ngram_range = tuple(ngram_range)
+        self.meta = meta or {}
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return _softmax(_logits(self.W, self.b, featurize(texts, self.n_features, self.ngram_range)))
+
+    def predict(self, texts: List[str], threshold: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        최고 확률 카테고리, threshold 미만이면 미분류
+        빈 / 공백뿐인 입력은 padding n-gram 만 남아 bias 로 분류되므로 미분류
+        """
+        results: List[Tuple[str, float]] = [(UNCLASSIFIED, 0.0)] * len(texts)
+        valid = [i for i, t in enumerate(texts) if t and t.strip()]
+        probs = self.predict_proba([texts[i] for i in valid])
+        best = probs.argmax(axis=1)
+        for i, label, p in zip(valid, best, probs[np.arange(len(best)), best]):
+            results[i] = (self.labels[label] if p >= threshold else UNCLASSIFIED, round(float(p), 3))
+        return results
+
+    def top(self, text: str, n: int = 2, min_prob: float = 0.0) -> List[Tuple[str, float]]:
+        if not text or not text.strip():
+            return []
+        probs = self.predict_proba([text])[0]
+        order = np.argsort(-probs)[:n]
+        return [(self.labels[i], round(float(probs[i]), 3)) for i in order if probs[i] >= min_prob]
+
+    # -------------------------
+    # 저장 / 로드
+    # -------------------------
+    def save(self, model_dir: str) -> None:
+        os.makedirs(model_dir, exist_ok=True)
+        np.save(os.path.join(model_dir, "W.npy"), self.W.astype(np.float32))
+        np.save(os.path.join(model_dir, "b.npy"), self.b.astype(np.float32))
+        with open(os.path.join(model_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                **self.meta,
+                "labels": self.labels,
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, model_dir: str) -> "SymptomClassifier":
+        with open(os.path.join(model_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # mmap → 필요한 행만 page-in
+        W = np.load(os.path.join(model_dir, "W.npy"), mmap_mode="r")
+        b = np.load(os.path.join(model_dir, "b.npy"))
+        return cls(W, b, meta["labels"], meta["ngram_range"], meta)
+
+
+@lru_cache(maxsize=1)
+def get_classifier() -> Optional[SymptomClassifier]:
+    """
+    학습된 모델이 없으면 None (categorize.py 는 SBERT fallback 유지)
+    """
+    if not os.path.exists(os.path.join(SYMPTOM_CLF_DIR, "meta.json")):
+        return None
+    return SymptomClassifier.load(SYMPTOM_CLF_DIR)
+
+
+# =========================
+# 3️⃣ 학습
+# =========================
+
+def train(
+    texts: List[str],
+    labels: List[str],
+    n_features: int = N_FEATURES,
+    epochs: int = 10,
+    batch_size: int = 256,
+    lr: float = 10.0,
+    l2: float = 1e-6,
+    seed: int = 42,
+) -> SymptomClassifier:
+    """
+    mini-batch SGD softmax 회귀 (class 불균형은 빈도 역수 가중치)
+    """
+    classes = sorted(set(labels))
+    y = np.array([classes.index(l) for l in labels])
+    counts = np.bincount(y, minlength=len(classes))
+    class_weight = (len(y) / (len(classes) * np.maximum(counts, 1))).astype(np.float32)
+
+    rows = [_hash_row(t, n_features, NGRAM_RANGE) for t in texts]
+    W = np.zeros((n_features, len(classes)), dtype=np.float32)
+    b = np.zeros(len(classes), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+
+    for epoch in range(epochs):
+        order = rng.permutation(len(rows))
+        step_lr = lr / (1 + epoch)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            lengths = [len(rows[i][0]) for i in batch]
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            indices = np.concatenate([rows[i][0] for i in batch])
+            values = np.concatenate([rows[i][1] for i in batch])
+
+            probs = _softmax(_logits(W, b, (indptr, indices, values)))
+            delta = probs
+            delta[np.arange(len(batch)), y[batch]] -= 1.0
+            delta *= class_weight[y[batch]][:, None] / len(batch)
+
+            grad = np.repeat(delta, lengths, axis=0) * values[:, None]
+            if l2:
+                W *= 1.0 - step_lr * l2
+            np.add.at(W, indices, -step_lr * grad)
+            b -= step_lr * delta.sum(axis=0)
+
+    return SymptomClassifier(W, b, classes, meta={
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_train": len(texts),
+        "class_counts": {c: int(n) for c, n in zip(classes, counts)},
+        "epochs": epochs,
+    })
+
+
+def load_corrections(path: str = SYMPTOM_CORRECTIONS_PATH) -> Tuple[Dict[str, str], List[Tuple[str, str]]]:
+    """
+    사람이 수정한 라벨 (JSONL)
+    {"doc_id": ..., "category": ...}  → corpus 행 라벨 덮어쓰기
+    {"text": ..., "category": ...}    → 학습 / 평가 행 추가
+    """
+    by_doc, extra = {}, []
+    if not path or not os.path.exists(path):
+        return by_doc, extra
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            if obj.get("doc_id"):
+                by_doc[obj["doc_id"]] = obj["category"]
+            elif obj.get("text"):
+                extra.append((obj["text"], obj["category"]))
+    return by_doc, extra
+
+
+def build_dataset(
+    corpus_path: str = None,
+    corrections_path: str = SYMPTOM_CORRECTIONS_PATH,
+) -> List[Dict[str, Any]]:
+    """
+    corpus 질문 중 라벨이 있는 행
+    - source="gold": 사람이 수정한 라벨
+    - source="rule": rule 로 확정되는 행 (categorize.rule_label)
+    미분류 라벨은 학습에서 제외 (threshold 로 처리)
+    corpus_path 가 없으면 현재 active 인덱스 버전의 corpus (rag/versions.py)
+    """
+    from categorize import rule_label
+    from rag.corpus import CorpusStore
+    from rag.versions import active_version, version_paths
+
+    corpus_path = corpus_path or version_paths(active_version())["corpus"]
+
+    by_doc, extra = load_corrections(corrections_path)
+    table = CorpusStore.load(corpus_path).table
+    doc_ids = table.column("doc_id").to_pylist()
+    questions = table.column("question").to_pylist()
+
+    rows = []
+    for doc_id, question in zip(doc_ids, questions):
+        if not question:
+            continue
+        if doc_id in by_doc:
+            rows.append({"text": question, "label": by_doc[doc_id], "source": "gold"})
+            continue
+        ruled = rule_label(question)
+        if ruled is not None:
+            rows.append({"text": question, "label": ruled[0], "source": "rule"})
+
+    rows += [{"text": t, "label": c, "source": "gold"} for t, c in extra]
+    return [r for r in rows if r["label"] != UNCLASSIFIED]
+
+
+def training_examples(rows: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """
+    원문 + 키워드 제거본 (mask_keywords)
+    서빙 시 분류기는 rule 이 놓친 (키워드 없는) 질문만 받음 → 원문만 학습하면 키워드에 기대는 모델이 됨
+    """
+    texts, labels = [], []
+    for r in rows:
+        texts.append(r["text"])
+        labels.append(r["label"])
+        masked = mask_keywords(r["text"])
+        if masked.strip() and masked != r["text"]:
+            texts.append(masked)
+            labels.append(r["label"])
+    return texts, labels
+
+
+# =========================
+# 4️⃣ 평가 (현재 hybrid 대비)
+# =========================
+
+def mask_keywords(text: str) -> str:
+    """
+    rule 키워드 제거 → rule 이 놓치는 (fallback 으로 넘어가는) 질문 흉내
+    """
+    from categorize import KEYWORD_ANCHORS
+
+    for keywords in KEYWORD_ANCHORS.values():
+        for kw in sorted(keywords, key=len, reverse=True):
+            text = text.replace(kw, " ")
+    return text
+
+
+def _accuracy(pred: List[str], gold: List[str]) -> Dict[str, float]:
+    n = len(gold) or 1
+    covered = [(p, g) for p, g in zip(pred, gold) if p != UNCLASSIFIED]
+    return {
+        "n": len(gold),
+        "accuracy": round(sum(p == g for p, g in zip(pred, gold)) / n, 4),
+        "coverage": round(len(covered) / n, 4),
+        "precision_covered": round(sum(p == g for p, g in covered) / len(covered), 4) if covered else 0.0,
+    }
+
+
+def _timed(fn, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - started
+
+
+def evaluate(clf: SymptomClassifier, rows: List[Dict[str, Any]], threshold: float) -> Dict[str, Any]:
+    """
+    - rule_masked: 키워드를 지운 질문 → fallback 단독 비교 (SBERT vs 분류기)
+    - gold: 사람이 수정한 라벨 → 전체 파이프라인 비교 (rule + SBERT vs rule + 분류기)
+    - latency: 질문 1건 / batch 당 fallback 지연
+    """
+    from categorize import CATEGORY_SBERT_THRESHOLD, rule_label, sbert_fallback
+
+    masked = [mask_keywords(r["text"]) for r in rows]
+    gold = [r["label"] for r in rows]
+
+    sbert_pred, sbert_wall = _timed(lambda: [sbert_fallback(t, CATEGORY_SBERT_THRESHOLD)[0] for t in masked])
+    clf_single, clf_single_wall = _timed(lambda: [clf.predict([t], threshold)[0][0] for t in masked])
+    clf_batch, clf_batch_wall = _timed(clf.predict, masked, threshold)
+
+    report: Dict[str, Any] = {
+        "rule_masked": {
+            "sbert": _accuracy(sbert_pred, gold),
+            "classifier": _accuracy(clf_single, gold),
+        },
+        "latency_ms": {
+            "sbert_per_item": round(sbert_wall / max(len(rows), 1) * 1000, 3),
+            "classifier_per_item": round(clf_single_wall / max(len(rows), 1) * 1000, 3),
+            "classifier_batch_per_item": round(clf_batch_wall / max(len(rows), 1) * 1000, 4),
+        },
+    }
+
+    gold_rows = [r for r in rows if r["source"] == "gold"]
+    if gold_rows:
+        def _pipeline(fallback):
+            out = []
+            for r in gold_rows:
+                ruled = rule_label(r["text"])
+                out.append(ruled[0] if ruled else fallback(r["text"]))
+            return out
+
+        report["gold"] = {
+            "hybrid_sbert": _accuracy(
+                _pipeline(lambda t: sbert_fallback(t, CATEGORY_SBERT_THRESHOLD)[0]),
+                [r["label"] for r in gold_rows],
+            ),
+            "hybrid_classifier": _accuracy(
+                _pipeline(lambda t: clf.predict([t], threshold)[0][0]),
+                [r["label"] for r in gold_rows],
+            ),
+        }
+
+    t0 = time.perf_counter()
+    SymptomClassifier.load(clf.meta.get("model_dir", SYMPTOM_CLF_DIR))
+    report["latency_ms"]["classifier_load"] = round((time.perf_counter() - t0) * 1000, 3)
+    return report
+
+
+def _split(rows: List[Dict[str, Any]], holdout: float, seed: int) -> Tuple[list, list]:
+    order = np.random.default_rng(seed).permutation(len(rows))
+    cut = int(len(rows) * (1 - holdout))
+    return [rows[i] for i in order[:cut]], [rows[i] for i in order[cut:]]
+
+
+def main():
+    from config import CATEGORY_CLF_THRESHOLD
+
+    parser = argparse.ArgumentParser(description="Symptom category classifier")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_train = sub.add_parser("train")
+    p_train.add_argument("--corpus", default=None)
+    p_train.add_argument("--corrections", default=SYMPTOM_CORRECTIONS_PATH)
+    p_train.add_argument("--out", default=SYMPTOM_CLF_DIR)
+    p_train.add_argument("--epochs", type=int, default=10)
+    p_train.add_argument("--holdout", type=float, default=0.2)
+    p_train.add_argument("--report", default=None)
+
+    p_eval = sub.add_parser("eval")
+    p_eval.add_argument("--corpus", default=None)
+    p_eval.add_argument("--corrections", default=SYMPTOM_CORRECTIONS_PATH)
+    p_eval.add_argument("--model", default=SYMPTOM_CLF_DIR)
+    p_eval.add_argument("--holdout", type=float, default=0.2)
+    p_eval.add_argument("--report", default=None)
+
+    args = parser.parse_args()
+
+    rows = build_dataset(args.corpus, args.corrections)
+    train_rows, test_rows = _split(rows, args.holdout, seed=42)
+    print(f"▶ {len(rows)} labelled rows (gold={sum(r['source'] == 'gold' for r in rows)}), "
+          f"train={len(train_rows)} holdout={len(test_rows)}")
+
+    if args.cmd == "train":
+        started = time.perf_counter()
+        texts, labels = training_examples(train_rows)
+        clf = train(texts, labels, epochs=args.epochs)
+        clf.meta["train_s"] = round(time.perf_counter() - started, 2)
+        clf.save(args.out)
+        clf.meta["model_dir"] = args.out
+        print(f"Saved classifier to {args.out} ({clf.meta['train_s']}s)")
+    else:
+        clf = SymptomClassifier.load(args.model)
+        clf.meta["model_dir"] = args.model
+
+    report = evaluate(clf, test_rows, CATEGORY_CLF_THRESHOLD)
+    report["threshold"] = CATEGORY_CLF_THRESHOLD
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
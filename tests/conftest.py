@@ -0,0 +1,5 @@
+# src 의 flat import (from config import ..., from safety.anchors import ...) 그대로 사용
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,25 @@
+# 경량 증상 분류기: 빈 입력은 미분류
+import pytest
+
+pytest.importorskip("dotenv")  # config.py
+
+from symptom_classifier import UNCLASSIFIED, train  # noqa: E402
+
+
+def _classifier():
+    texts = ["밥을 안 먹어요", "사료를 거부해요", "계속 토해요", "노란 토를 했어요"] * 5
+    labels = ["식욕", "식욕", "구토", "구토"] * 5
+    return train(texts, labels, n_features=2 ** 12, epochs=5)
+
+
+def test_blank_input_is_unclassified():
+    clf = _classifier()
+    preds = clf.predict(["", "   ", "계속 토해요"])
+    assert preds[0] == (UNCLASSIFIED, 0.0)
+    assert preds[1] == (UNCLASSIFIED, 0.0)
+    assert preds[2][0] == "구토"
+    assert clf.top("  ") == []
+
+
+def test_predict_empty_batch():
+    assert _classifier().predict([]) == []
@@ -0,0 +1,54 @@
+# 응급 triage rule 단계: 부정문 / 허용 질문은 응급 fast path 로 보내지 않음
+import pytest
+
+from safety.anchors import anchor_hits, rule_scores
+
+
+def _emergency(text):
+    scores, _ = rule_scores(text)
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else None
+
+
+@pytest.mark.parametrize("text", [
+    "초콜릿 먹어도 되나요?",
+    "강아지한테 포도를 먹여도 되나요",
+    "경련은 없고 밥을 안 먹어요",
+    "발작은 안 해요. 그냥 기운이 없어요",
+    "고양이가 혈변은 아니고 설사만 해요",
+    "자일리톨 껌 먹으면 안 되나요?",
+    "출혈은 없어요",
+    "피를 토하지는 않았어요",
+    "경련이 전혀 없고 잘 놀아요",
+])
+def test_negated_or_question_is_not_emergency(text):
+    assert _emergency(text) is None
+    assert any(verdict != "hit" for _, _, verdict in anchor_hits(text))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("강아지가 초콜릿을 먹었어요", "중독"),
+    ("초콜릿 먹었는데 괜찮을까요?", "중독"),
+    ("갑자기 경련을 하고 밥을 안 먹어요", "경련"),
+    ("고양이가 피를 토했어요", "출혈"),
+    ("상처에서 피가 멈추지 않아요", "출혈"),
+    ("숨을 못 쉬고 혀가 파래졌어요", "호흡곤란"),
+    ("의식이 없어요", "경련"),
+    # 증상 지속 / 다른 서술어의 부정은 응급
+    ("출혈이 멈추지 않아요", "출혈"),
+    ("경련이 멈추지 않아요", "경련"),
+    ("발작이 그치지 않아요", "경련"),
+    ("숨을 헐떡이며 일어나지 않아요", "호흡곤란"),
+])
+def test_emergency_anchor(text, expected):
+    assert _emergency(text) == expected
+
+
+def test_detect_emergency_suppressed_anchor_falls_back_to_sbert():
+    pytest.importorskip("sentence_transformers")
+    from safety.triage import detect_emergency
+
+    # rule 로 확정하지 않고 SBERT 유사도로 판단 (score 1.0 은 rule 확정)
+    assert detect_emergency("초콜릿 먹어도 되나요?")[1] != 1.0
+    assert detect_emergency("강아지가 초콜릿을 먹었어요") == ("중독", 1.0)
+    assert detect_emergency("출혈이 멈추지 않아요") == ("출혈", 1.0)